@@ -1,5 +1,5 @@
 # #!/bin/bash
-celery -A employee_project worker --queue=image_generation --concurrency=4 --loglevel=info
+celery -A employee_project worker --queue=image_generation --concurrency=${IMAGE_WORKER_CONCURRENCY:-4} --loglevel=info
 
 
 
@@ -13,7 +13,7 @@
 
 #! Prathamesh
 from django.contrib import admin
-from .models import Employee, EmployeeLoginHistory, DoctorVideo, VideoTemplates, ImageContent, Brand,Designation
+from .models import Employee, EmployeeLoginHistory, DoctorVideo, VideoTemplates, ImageContent, ImageRenderMetrics, RenderJob, Brand,Designation
 
 # Employee Admin
 @admin.register(Employee)
@@ -170,7 +170,7 @@ class VideoTemplatesAdmin(admin.ModelAdmin):
             'description': 'Settings specific to video templates'
         }),
         ('Image Template Settings', {
-            'fields': ('template_image', 'text_positions', 'custom_text', 'brand_area_settings'),
+            'fields': ('template_image', 'text_positions', 'custom_text', 'brand_area_settings', 'output_profile'),
             'classes': ('collapse',),
             'description': 'Settings specific to image templates. Text positions should be JSON format: {"field_name": {"x": 100, "y": 50}}'
         }),
@@ -209,8 +209,8 @@ class ImageContentAdmin(admin.ModelAdmin):
             'description': 'JSON data containing the form inputs used to generate the image'
         }),
         ('Generated Output', {
-            'fields': ('output_image',),
-            'description': 'The generated image with text overlay'
+            'fields': ('output_image', 'share_image', 'thumbnail_image'),
+            'description': 'The generated image with text overlay, and its share-sized and thumbnail copies'
         }),
     )
     
@@ -241,6 +241,24 @@ class ImageContentAdmin(admin.ModelAdmin):
         return "No content"
     content_preview.short_description = 'Content Preview'
 
+@admin.register(ImageRenderMetrics)
+class ImageRenderMetricsAdmin(admin.ModelAdmin):
+    list_display = ['id', 'template', 'image_content', 'reused', 'queue_wait_ms', 'encode_ms', 'storage_ms', 'total_ms', 'rss_mb', 'memory_action', 'created_at']
+    list_filter = ['reused', 'memory_action', 'template__name', 'created_at']
+    ordering = ['-created_at']
+    readonly_fields = ['image_content', 'template', 'reused', 'queue_wait_ms', 'db_fetch_ms', 'decode_ms', 'text_ms',
+                       'overlay_ms', 'brands_ms', 'encode_ms', 'storage_ms', 'total_ms', 'rss_mb', 'rss_growth_mb',
+                       'memory_action', 'created_at']
+
+@admin.register(RenderJob)
+class RenderJobAdmin(admin.ModelAdmin):
+    list_display = ['job_id', 'kind', 'status', 'employee_id', 'template', 'image_content', 'attempts', 'created_at', 'finished_at']
+    list_filter = ['status', 'kind', 'created_at']
+    search_fields = ['job_id', 'employee_id']
+    ordering = ['-created_at']
+    readonly_fields = ['job_id', 'kind', 'status', 'employee_id', 'template', 'image_content', 'result', 'error',
+                       'attempts', 'created_at', 'started_at', 'finished_at']
+
 @admin.register(Brand)
 class BrandAdmin(admin.ModelAdmin):
     list_display = ('name', 'category', 'uploaded_by', 'uploaded_at')
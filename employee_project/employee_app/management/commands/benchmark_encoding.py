@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from PIL import Image
+
+from employee_app.models import VideoTemplates
+from employee_app.rendering import benchmark_profiles, load_template_canvas, output_profiles
+
+
+class Command(BaseCommand):
+    help = "Report encode time against file size for each image output profile"
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--image', help="Path of a rendered image to encode")
+        source.add_argument('--template', type=int, help="ID of an image template whose canvas to encode")
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help="Profile to benchmark (repeatable); defaults to all profiles")
+        parser.add_argument('--repeat', type=int, default=5, help="Encodes per profile; the fastest is reported")
+
+    def handle(self, *args, **options):
+        if options['image']:
+            with Image.open(options['image']) as image:
+                image.load()
+                canvas = image.copy()
+        else:
+            try:
+                template = VideoTemplates.objects.get(id=options['template'], template_type='image')
+            except VideoTemplates.DoesNotExist:
+                raise CommandError(f"Image template {options['template']} not found")
+            canvas = load_template_canvas(template.template_image.path)
+            # Renders with a doctor photo or brands are RGBA
+            canvas = canvas.convert('RGBA')
+
+        profiles = options['profiles'] or list(output_profiles())
+        unknown = [name for name in profiles if name not in output_profiles()]
+        if unknown:
+            raise CommandError(f"Unknown profiles: {', '.join(unknown)}")
+
+        self.stdout.write(f"{canvas.width}x{canvas.height} {canvas.mode}, best of {options['repeat']}")
+        self.stdout.write(f"{'profile':<16}{'format':<8}{'encode ms':>12}{'size KB':>12}")
+        for result in benchmark_profiles(canvas, profiles, repeat=options['repeat']):
+            self.stdout.write(
+                f"{result['profile']:<16}{result['extension']:<8}"
+                f"{result['encode_ms']:>12.1f}{result['bytes'] / 1024:>12.1f}"
+            )
@@ -0,0 +1,117 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+
+import PIL
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from employee_app.rendering import RENDER_KEY_VERSION, RENDER_STAGES
+from employee_app.rendering.benchmark import SCENARIOS, compare_golden, run_benchmark
+from employee_app.rendering.memory import peak_rss_mb
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time each renderer stage over synthetic templates, photos and logos, report peak RSS "
+        "and check the renders against golden images. Run with --update-golden on a known-good "
+        "commit first, then without it to catch visual changes; a missing golden fails the check "
+        "unless --allow-missing-golden is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', dest='scenarios', choices=list(SCENARIOS),
+                            help="Scenario to run (repeatable); defaults to all")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed renders per scenario; medians are reported")
+        parser.add_argument('--cold', action='store_true', help="Clear every render cache before each render")
+        parser.add_argument('--golden-dir', default=os.path.join(settings.BASE_DIR, 'benchmarks', 'golden'),
+                            help="Directory of golden PNGs, one per scenario")
+        parser.add_argument('--update-golden', action='store_true', help="Overwrite the golden images with these renders")
+        parser.add_argument('--allow-missing-golden', action='store_true',
+                            help="Only time scenarios that have no golden image instead of failing")
+        parser.add_argument('--tolerance', type=int, default=8,
+                            help="Per-channel difference (0-255) a pixel may have before it counts as changed")
+        parser.add_argument('--max-diff-pixels', type=int, default=0,
+                            help="Changed pixels allowed per scenario before the check fails")
+        parser.add_argument('--json', dest='json_path', help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        with tempfile.TemporaryDirectory(prefix='render-benchmark-') as workdir:
+            results = run_benchmark(
+                workdir, scenarios=options['scenarios'], repeat=options['repeat'], cold=options['cold'],
+            )
+
+            golden_dir = options['golden_dir']
+            if options['update_golden']:
+                os.makedirs(golden_dir, exist_ok=True)
+
+            failures = []
+            for name, result, image in results:
+                golden_path = os.path.join(golden_dir, f'{name}.png')
+                if options['update_golden']:
+                    image.save(golden_path, 'PNG')
+                    result['golden'] = 'updated'
+                elif os.path.exists(golden_path):
+                    changed, max_diff = compare_golden(image, golden_path, options['tolerance'])
+                    result['golden'] = {'changed_pixels': changed, 'max_diff': max_diff}
+                    if changed > options['max_diff_pixels']:
+                        failures.append(f"{name}: {changed} pixels changed (max channel diff {max_diff})")
+                else:
+                    result['golden'] = 'missing'
+                    if not options['allow_missing_golden']:
+                        failures.append(f"{name}: no golden image at {golden_path} (create it with --update-golden)")
+                image.close()
+
+        self._print_table(results, options)
+
+        if options['json_path']:
+            report = {
+                'commit': _git_commit(),
+                'render_key_version': RENDER_KEY_VERSION,
+                'python': platform.python_version(),
+                'pillow': PIL.__version__,
+                'repeat': options['repeat'],
+                'cold': options['cold'],
+                'peak_rss_mb': peak_rss_mb(),
+                'scenarios': {name: result for name, result, _ in results},
+            }
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['json_path']}")
+
+        if failures:
+            raise CommandError("Golden image check failed:\n" + "\n".join(failures))
+
+    def _print_table(self, results, options):
+        mode = 'cold' if options['cold'] else 'warm'
+        self.stdout.write(f"Median of {options['repeat']} {mode} renders, times in ms")
+        header = f"{'scenario':<12}" + ''.join(f"{stage:>10}" for stage in RENDER_STAGES)
+        header += f"{'total':>10}{'KB':>9}{'+RSS MB':>9}  golden"
+        self.stdout.write(header)
+        for name, result, _ in results:
+            golden = result['golden']
+            if isinstance(golden, dict):
+                golden = 'ok' if golden['changed_pixels'] <= options['max_diff_pixels'] else (
+                    f"{golden['changed_pixels']} px changed"
+                )
+            row = f"{name:<12}" + ''.join(f"{result['stages'][stage]:>10.2f}" for stage in RENDER_STAGES)
+            row += f"{result['total_ms']:>10.2f}{result['bytes'] / 1024:>9.1f}{result['rss_growth_mb']:>9.1f}  {golden}"
+            self.stdout.write(row)
+        peak = peak_rss_mb()
+        if peak is not None:
+            self.stdout.write(f"Peak RSS of the whole run: {peak:.1f} MB")
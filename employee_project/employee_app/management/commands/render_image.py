@@ -0,0 +1,40 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from employee_app.models import DoctorVideo, VideoTemplates
+from employee_app.rendering import build_render_spec, get_render_plan, render_bytes
+from employee_app.tasks import brands_in_order
+
+
+class Command(BaseCommand):
+    help = "Render an image template for a doctor to a local file, without storing an ImageContent"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', type=int, required=True, help="ID of the image template")
+        parser.add_argument('--doctor', type=int, required=True, help="ID of the doctor")
+        parser.add_argument('--brand', type=int, action='append', dest='brands', default=[],
+                            help="Brand ID to place in the brand area (repeatable, in slot order)")
+        parser.add_argument('--output', required=True,
+                            help="Output file; the extension is replaced by the one the output profile picks")
+
+    def handle(self, *args, **options):
+        try:
+            template = VideoTemplates.objects.get(id=options['template'], template_type='image')
+        except VideoTemplates.DoesNotExist:
+            raise CommandError(f"Image template {options['template']} not found")
+        if not template.template_image or not os.path.exists(template.template_image.path):
+            raise CommandError(f"Template image file for template {template.id} not found")
+        try:
+            doctor = DoctorVideo.objects.get(id=options['doctor'])
+        except DoctorVideo.DoesNotExist:
+            raise CommandError(f"Doctor {options['doctor']} not found")
+
+        brands = brands_in_order(options['brands'])
+        plan = get_render_plan(template)
+        data, extension = render_bytes(build_render_spec(plan, doctor, {}, brands))
+
+        output = f"{os.path.splitext(options['output'])[0]}.{extension}"
+        with open(output, 'wb') as f:
+            f.write(data)
+        self.stdout.write(f"Wrote {output} ({len(data) / 1024:.1f} KB)")
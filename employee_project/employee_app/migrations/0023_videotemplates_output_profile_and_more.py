@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 08:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_app', '0022_alter_employeeloginhistory_employee_identifier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='videotemplates',
+            name='output_profile',
+            field=models.CharField(blank=True, help_text='Output encoding profile from IMAGE_OUTPUT_PROFILES (png, webp, jpeg, ...). Empty uses IMAGE_OUTPUT_PROFILE.', max_length=30, null=True),
+        ),
+        migrations.AlterField(
+            model_name='brand',
+            name='uploaded_by',
+            field=models.ForeignKey(limit_choices_to={'user_type__in': ['Admin', 'SuperAdmin']}, on_delete=django.db.models.deletion.CASCADE, related_name='uploaded_brands', to='employee_app.employee'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_app', '0023_videotemplates_output_profile_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagecontent',
+            name='render_key',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+    ]
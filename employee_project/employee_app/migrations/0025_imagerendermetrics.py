@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 08:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_app', '0024_imagecontent_render_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageRenderMetrics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reused', models.BooleanField(default=False)),
+                ('queue_wait_ms', models.FloatField(blank=True, help_text='Enqueue to task start', null=True)),
+                ('db_fetch_ms', models.FloatField(blank=True, null=True)),
+                ('decode_ms', models.FloatField(blank=True, null=True)),
+                ('text_ms', models.FloatField(blank=True, null=True)),
+                ('overlay_ms', models.FloatField(blank=True, null=True)),
+                ('brands_ms', models.FloatField(blank=True, null=True)),
+                ('encode_ms', models.FloatField(blank=True, null=True)),
+                ('storage_ms', models.FloatField(blank=True, null=True)),
+                ('total_ms', models.FloatField(blank=True, help_text='Task start to stored output', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('image_content', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='render_metrics', to='employee_app.imagecontent')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='render_metrics', to='employee_app.videotemplates')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['template', 'created_at'], name='employee_ap_templat_79fa63_idx')],
+            },
+        ),
+    ]
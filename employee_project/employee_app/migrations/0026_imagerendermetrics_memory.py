@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 08:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_app', '0025_imagerendermetrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagerendermetrics',
+            name='memory_action',
+            field=models.CharField(blank=True, choices=[('', 'None'), ('collect', 'Garbage collected'), ('recycle', 'Worker recycled')], default='', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='imagerendermetrics',
+            name='rss_growth_mb',
+            field=models.FloatField(blank=True, help_text='RSS growth during the task', null=True),
+        ),
+        migrations.AddField(
+            model_name='imagerendermetrics',
+            name='rss_mb',
+            field=models.FloatField(blank=True, help_text='Worker RSS after the task', null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_app', '0026_imagerendermetrics_memory'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagecontent',
+            name='share_image',
+            field=models.ImageField(blank=True, null=True, upload_to='generated-images/share/'),
+        ),
+        migrations.AddField(
+            model_name='imagecontent',
+            name='thumbnail_image',
+            field=models.ImageField(blank=True, null=True, upload_to='generated-images/thumbnails/'),
+        ),
+    ]
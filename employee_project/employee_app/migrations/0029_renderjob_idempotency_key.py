@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employee_app', '0028_renderjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='renderjob',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=80, null=True, unique=True),
+        ),
+    ]
@@ -141,6 +141,10 @@ class VideoTemplates(models.Model):
         null=True, blank=True,
         help_text="Brand placement area: {'enabled': True, 'x': 50, 'y': 400, 'width': 700, 'height': 150, 'brandWidth': 100, 'brandHeight': 60}"
     )
+    output_profile = models.CharField(
+        max_length=30, null=True, blank=True,
+        help_text="Output encoding profile from IMAGE_OUTPUT_PROFILES (png, webp, jpeg, ...). Empty uses IMAGE_OUTPUT_PROFILE."
+    )
     def __str__(self):
         return f"Video for {self.template_video} and {self.template_image}"
 
@@ -169,8 +173,16 @@ class ImageContent(models.Model):
 
     # Generated output image
     output_image = models.ImageField(upload_to='generated-images/', null=True, blank=True)
+    # Smaller copies encoded from the same render, for sharing to phones and for dashboards
+    share_image = models.ImageField(upload_to='generated-images/share/', null=True, blank=True)
+    thumbnail_image = models.ImageField(upload_to='generated-images/thumbnails/', null=True, blank=True)
+    # Hash of every render input; rows with the same key share one stored output file
+    render_key = models.CharField(max_length=64, null=True, blank=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # render_outputs() key -> field storing that output
+    OUTPUT_FIELDS = {'full': 'output_image', 'share': 'share_image', 'thumbnail': 'thumbnail_image'}
+
     def __str__(self):
         return f"Image Content for Dr. {self.doctor.name} - {self.template.name}"
 
@@ -178,6 +190,109 @@ class ImageContent(models.Model):
         ordering = ['-created_at']
 
 
+class ImageRenderMetrics(models.Model):
+    """Stage timings of one generated image, in milliseconds"""
+    image_content = models.OneToOneField(
+        ImageContent,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='render_metrics'
+    )
+    template = models.ForeignKey(
+        VideoTemplates,
+        on_delete=models.CASCADE,
+        related_name='render_metrics'
+    )
+    # True when an identical stored render was reused instead of rendering
+    reused = models.BooleanField(default=False)
+
+    queue_wait_ms = models.FloatField(null=True, blank=True, help_text="Enqueue to task start")
+    db_fetch_ms = models.FloatField(null=True, blank=True)
+    decode_ms = models.FloatField(null=True, blank=True)
+    text_ms = models.FloatField(null=True, blank=True)
+    overlay_ms = models.FloatField(null=True, blank=True)
+    brands_ms = models.FloatField(null=True, blank=True)
+    encode_ms = models.FloatField(null=True, blank=True)
+    storage_ms = models.FloatField(null=True, blank=True)
+    total_ms = models.FloatField(null=True, blank=True, help_text="Task start to stored output")
+
+    # Worker memory after the task, as seen by the memory governor
+    MEMORY_ACTIONS = [
+        ('', 'None'),
+        ('collect', 'Garbage collected'),
+        ('recycle', 'Worker recycled'),
+    ]
+    rss_mb = models.FloatField(null=True, blank=True, help_text="Worker RSS after the task")
+    rss_growth_mb = models.FloatField(null=True, blank=True, help_text="RSS growth during the task")
+    memory_action = models.CharField(max_length=10, choices=MEMORY_ACTIONS, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    # Stage columns in render order, as reported by the metrics endpoint
+    STAGES = ('queue_wait', 'db_fetch', 'decode', 'text', 'overlay', 'brands', 'encode', 'storage', 'total')
+
+    def __str__(self):
+        return f"Render metrics for {self.template_id} at {self.created_at}"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['template', 'created_at'])]
+
+
+
+class RenderJob(models.Model):
+    """Status of one image generation task, written by the worker as the task runs"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('single', 'Single image'),
+        ('batch', 'Batch'),
+    ]
+
+    # Celery task id of the job
+    job_id = models.CharField(max_length=36, unique=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='single')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    # Employee code of whoever submitted the job
+    employee_id = models.CharField(max_length=100, null=True, blank=True)
+    # Hash of the submitting request plus ':<chunk>'; a repeated request gets these jobs back
+    idempotency_key = models.CharField(max_length=80, unique=True, null=True, blank=True)
+    template = models.ForeignKey(
+        VideoTemplates,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='render_jobs'
+    )
+    # Generated image of a single job; a batch lists its images in ``result``
+    image_content = models.ForeignKey(
+        ImageContent,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='render_jobs'
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    FINISHED = ('done', 'failed')
+
+    def __str__(self):
+        return f"Render job {self.job_id} ({self.status})"
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['employee_id', 'created_at'])]
+
+
 # def doctor_video_upload_path(instance, filename):
 #     employee_id = instance.doctor.employee.id if instance.doctor and instance.doctor.employee else 'unknown_employee'
 #     doctor_id = instance.doctor.id if instance.doctor else 'unknown_doctor'
@@ -0,0 +1,140 @@
+"""
+Image rendering engine shared by the image generation tasks, views and commands.
+"""
+from .base_layers import build_base_layer, discard_template_bases, load_base_canvas
+from .bitmaps import ImageLRUCache, decode_template, load_template_canvas, template_canvases
+from .brand_logos import (
+    BrandStrip,
+    brand_logos,
+    brand_strips,
+    discard_brand,
+    fit_logo,
+    get_brand_logo,
+    get_brand_strip,
+    prescale_brand,
+    slot_sizes,
+)
+from .dedup import RENDER_KEY_VERSION, compute_render_key, effective_image_settings, file_digest
+from .encoding import (
+    OutputProfile,
+    OutputVariant,
+    benchmark_profiles,
+    encode_image,
+    get_output_profile,
+    output_profiles,
+    output_variants,
+)
+from .fonts import clear_fonts, get_font, preload_fonts
+from .memory import MemoryGovernor, MemoryReport, memory_governor
+from .overlays import doctor_overlays, get_photo_overlay, rounded_mask
+from .photos import check_decode_size, normalize_photo, open_photo
+from .plans import (
+    FontSpec,
+    RenderPlan,
+    center_in_row,
+    clear_render_plans,
+    compile_image_settings,
+    compile_render_plan,
+    get_render_plan,
+    grid_rows,
+    parse_css_shadow,
+    resolve_text_values,
+    solve_layout,
+    static_text_values,
+    template_version,
+)
+from .renderer import (
+    PREVIEW_PROFILE,
+    RENDER_STAGES,
+    BrandAsset,
+    RenderSpec,
+    build_render_spec,
+    render_bitmap,
+    render_bytes,
+    render_outputs,
+    render_preview,
+)
+from .text import (
+    clear_text_cache,
+    draw_text_fields,
+    estimate_width,
+    fit_text,
+    get_text_layer,
+    measure_text,
+    text_layers,
+    text_width,
+    wrap_words,
+)
+
+__all__ = (
+    'BrandAsset',
+    'BrandStrip',
+    'FontSpec',
+    'ImageLRUCache',
+    'MemoryGovernor',
+    'MemoryReport',
+    'OutputProfile',
+    'OutputVariant',
+    'PREVIEW_PROFILE',
+    'RENDER_KEY_VERSION',
+    'RENDER_STAGES',
+    'RenderPlan',
+    'RenderSpec',
+    'benchmark_profiles',
+    'brand_logos',
+    'brand_strips',
+    'build_base_layer',
+    'build_render_spec',
+    'center_in_row',
+    'check_decode_size',
+    'clear_fonts',
+    'clear_render_plans',
+    'clear_text_cache',
+    'compile_image_settings',
+    'compile_render_plan',
+    'compute_render_key',
+    'decode_template',
+    'discard_brand',
+    'discard_template_bases',
+    'doctor_overlays',
+    'draw_text_fields',
+    'effective_image_settings',
+    'encode_image',
+    'estimate_width',
+    'file_digest',
+    'fit_logo',
+    'fit_text',
+    'get_brand_logo',
+    'get_brand_strip',
+    'get_font',
+    'get_output_profile',
+    'get_photo_overlay',
+    'get_render_plan',
+    'get_text_layer',
+    'grid_rows',
+    'load_base_canvas',
+    'load_template_canvas',
+    'measure_text',
+    'memory_governor',
+    'normalize_photo',
+    'open_photo',
+    'output_profiles',
+    'output_variants',
+    'parse_css_shadow',
+    'preload_fonts',
+    'prescale_brand',
+    'render_bitmap',
+    'render_bytes',
+    'render_outputs',
+    'render_preview',
+    'resolve_text_values',
+    'rounded_mask',
+    'slot_sizes',
+    'solve_layout',
+    'static_text_values',
+    'template_canvases',
+    'template_version',
+    'text_layers',
+    'text_width',
+    'wrap_words',
+)
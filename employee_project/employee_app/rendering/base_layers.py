@@ -0,0 +1,98 @@
+"""
+Pre-flattened template base layers.
+
+Everything on a template that is the same for every doctor - the template
+image and its static text such as ``customText`` - is composited once into a
+base canvas. Per-doctor renders start from a copy of that base and only draw
+the doctor fields, the photo and the brands.
+
+Bases are built when a template is saved and written next to the media files
+as ``<template id>/<plan version>_<source stamp>.png``, so the name changes
+whenever the template settings or its image change. Workers decode a base
+once and keep it in the template canvas cache. Plans without a template id
+(benchmarks) are flattened in memory only, and non-persistent plans (preview
+overrides) are flattened for each render without touching the cache.
+"""
+import logging
+import os
+import shutil
+
+from django.conf import settings
+
+from .bitmaps import decode_template, load_template_canvas, save_png_atomic, source_stamp, template_canvases
+from .plans import static_text_values
+from .text import draw_text_fields
+
+logger = logging.getLogger(__name__)
+
+
+def base_cache_dir(template_id=None):
+    cache_dir = getattr(settings, 'IMAGE_TEMPLATE_BASE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'template-cache')
+    if template_id is None:
+        return cache_dir
+    return os.path.join(cache_dir, str(template_id))
+
+
+def _base_name(plan):
+    return f"{plan.version}_{source_stamp(plan.template_path)}"
+
+
+def flatten_base(plan):
+    """Template image with every static text field composited on it."""
+    base = decode_template(plan.template_path)
+    draw_text_fields(base, static_text_values(plan))
+    return base
+
+
+def build_base_layer(plan):
+    """Write the base of a saved template to disk unless it is already there -> True when built."""
+    base_path = os.path.join(base_cache_dir(plan.template_id), f"{_base_name(plan)}.png")
+    if not static_text_values(plan) or os.path.exists(base_path):
+        return False
+
+    base = flatten_base(plan)
+    save_png_atomic(base, base_path, compress_level=1)
+    logger.info(f"Built base layer {base_path}")
+    return True
+
+
+def load_base_canvas(plan):
+    """Private copy of the template with its static text already drawn."""
+    if not static_text_values(plan):
+        return load_template_canvas(plan.template_path)
+    if not plan.persistent:
+        base = load_template_canvas(plan.template_path)
+        draw_text_fields(base, static_text_values(plan))
+        return base
+
+    name = _base_name(plan)
+    key = ('base', plan.template_id, name)
+    base = template_canvases.get(key)
+    if base is None:
+        base_path = os.path.join(base_cache_dir(plan.template_id), f"{name}.png")
+        if plan.template_id is not None and os.path.exists(base_path):
+            base = decode_template(base_path)
+        else:
+            # Not built yet (or an unsaved plan): flatten here, the save-time task writes the file
+            base = flatten_base(plan)
+        base = template_canvases.put(key, base)
+        # Older bases of this template can never be hit again
+        template_canvases.discard(lambda k: k[:2] == ('base', plan.template_id) and k != key)
+    return base.copy()
+
+
+def discard_template_bases(template_id, keep=None):
+    """Forget the bases of a template (memory and disk), except the one for plan ``keep``."""
+    keep_name = _base_name(keep) if keep is not None and os.path.exists(keep.template_path) else None
+    template_canvases.discard(lambda k: k[:2] == ('base', template_id) and k[2] != keep_name)
+
+    template_dir = base_cache_dir(template_id)
+    if keep_name is None:
+        shutil.rmtree(template_dir, ignore_errors=True)
+        return
+    for name in os.listdir(template_dir) if os.path.isdir(template_dir) else []:
+        if not name.startswith(keep_name):
+            try:
+                os.remove(os.path.join(template_dir, name))
+            except OSError:
+                pass
@@ -0,0 +1,233 @@
+"""
+Offline renderer benchmark.
+
+Builds deterministic synthetic assets - a template canvas, a phone-sized doctor
+photo and brand logos of assorted aspect ratios - and renders a fixed set of
+scenarios through the real renderer with per-stage timing. Renders are
+compared against the golden images in BASE_DIR/benchmarks/golden so an
+optimization cannot silently change the output. Only the fonts bundled in
+BASE_DIR/fonts are used, never system fonts, so the goldens do not depend on
+what is installed on the machine running the check.
+"""
+import os
+import shutil
+import statistics
+import time
+from dataclasses import replace
+from io import BytesIO
+
+from django.conf import settings
+from django.test import override_settings
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+from .bitmaps import template_canvases
+from .brand_logos import brand_logos, brand_strips
+from .encoding import encode_image, get_output_profile
+from .fonts import clear_fonts
+from .memory import current_rss_mb
+from .overlays import doctor_overlays
+from .plans import STATIC_FIELDS, clear_render_plans, compile_render_plan
+from .renderer import RENDER_STAGES, BrandAsset, RenderSpec, render_bitmap
+from .text import clear_text_cache
+
+CANVAS_SIZE = (1080, 1080)
+PHOTO_SIZE = (2400, 1800)
+LOGO_SIZES = [(300 + 60 * i, 120 + 15 * (i % 4)) for i in range(10)]
+
+# Bundled families only (see the module docstring)
+TEXT_POSITIONS = {
+    'name': {'y': 120, 'fontSize': 56, 'fontFamily': 'Dancing Script', 'color': '#1d2b53',
+             'textShadow': '2px 2px 4px rgba(0,0,0,0.5)'},
+    'specialization': {'y': 200, 'fontSize': 34, 'fontFamily': 'Alex Brush'},
+    'city': {'y': 250, 'fontSize': 30, 'fontFamily': 'Pacifico'},
+    'customText': {'x': 60, 'y': 24, 'fontSize': 44, 'fontFamily': 'Allura', 'textShadow': '1px 1px 2px'},
+}
+LOGO_FONT = 'Pacifico-Regular.ttf'
+
+IMAGE_SETTINGS = {'enabled': True, 'x': 780, 'y': 60, 'width': 240, 'height': 240,
+                  'fit': 'cover', 'borderRadius': 50, 'opacity': 90}
+BRAND_AREA = {
+    'enabled': True, 'x': 120, 'y': 560, 'width': 840, 'height': 440,
+    'slots': [{'x': 280 * col, 'y': 150 * row, 'width': 240, 'height': 120}
+              for row in range(3) for col in range(3)],
+}
+
+# name -> (text_positions overrides, overlay enabled, brand count, text values)
+SCENARIOS = {
+    'text-only': ({}, False, 0, {}),
+    'photo': ({}, True, 0, {}),
+    'brands-4': ({}, True, 4, {}),
+    'brands-9': ({}, True, 9, {}),
+    'autofit': (
+        {'name': {'maxWidth': 560, 'minFontSize': 28, 'wrap': True, 'maxLines': 2}},
+        True, 2,
+        {'name': 'Dr. Venkatasubramanian Raghunathan Iyer'},
+    ),
+}
+
+DEFAULT_TEXT = {
+    'name': 'Dr. Benchmark Kumar',
+    'specialization': 'Interventional Cardiology',
+    'city': 'Pune, Maharashtra',
+    'customText': 'Wishing you good health',
+}
+
+
+def _gradient(size, start, end):
+    """Deterministic diagonal gradient with a few shapes, so encoders see real detail."""
+    width, height = size
+    horizontal = Image.linear_gradient('L').resize(size)
+    vertical = Image.linear_gradient('L').rotate(90).resize(size)
+    mask = ImageChops.add(horizontal, vertical, scale=2)
+    image = Image.composite(Image.new('RGB', size, end), Image.new('RGB', size, start), mask)
+    draw = ImageDraw.Draw(image)
+    for i in range(6):
+        box = (width * i // 7, height * i // 9, width * i // 7 + width // 5, height * i // 9 + height // 6)
+        draw.ellipse(box, outline=(255 - 30 * i, 40 * i, 120), width=max(2, width // 200))
+    return image
+
+
+def create_assets(workdir):
+    """Write the synthetic template, photo and logos under ``workdir``; returns their paths."""
+    os.makedirs(workdir, exist_ok=True)
+    template_path = os.path.join(workdir, 'template.png')
+    _gradient(CANVAS_SIZE, (245, 240, 228), (205, 225, 240)).save(template_path)
+
+    photo_path = os.path.join(workdir, 'photo.jpg')
+    _gradient(PHOTO_SIZE, (190, 140, 110), (60, 80, 120)).save(photo_path, 'JPEG', quality=92)
+
+    logo_font = ImageFont.truetype(os.path.join(settings.BASE_DIR, 'fonts', LOGO_FONT), 40)
+    logo_paths = []
+    for i, size in enumerate(LOGO_SIZES):
+        logo = Image.new('RGBA', size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(logo)
+        draw.rounded_rectangle((4, 4, size[0] - 4, size[1] - 4), radius=size[1] // 4,
+                               fill=(30 + 20 * i, 90, 200 - 15 * i, 255))
+        draw.text((size[0] // 2, size[1] // 2), f"Brand {i + 1}", fill='white', font=logo_font, anchor='mm')
+        path = os.path.join(workdir, f'logo_{i + 1}.png')
+        logo.save(path)
+        logo_paths.append(path)
+    return {'template': template_path, 'photo': photo_path, 'logos': logo_paths}
+
+
+def build_scenario(name, assets):
+    """RenderSpec for a named scenario over the synthetic ``assets``."""
+    # Imported here so the rendering package does not load models at import time
+    from employee_app.models import VideoTemplates
+
+    overrides, with_photo, brand_count, text_overrides = SCENARIOS[name]
+    positions = {field: dict(pos, **overrides.get(field, {})) for field, pos in TEXT_POSITIONS.items()}
+    if with_photo:
+        positions['imageSettings'] = IMAGE_SETTINGS
+
+    template = VideoTemplates(
+        name=f'benchmark {name}', template_type='image', text_positions=positions,
+        brand_area_settings=BRAND_AREA, custom_text=text_overrides.get('customText', DEFAULT_TEXT['customText']),
+    )
+    plan = replace(compile_render_plan(template), template_path=assets['template'])
+
+    values = dict(DEFAULT_TEXT, **text_overrides)
+    return RenderSpec(
+        plan=plan,
+        texts=tuple((field, values[field.name]) for field in plan.text_fields if field.name not in STATIC_FIELDS),
+        image_settings=plan.image_settings,
+        photo_path=assets['photo'] if with_photo else None,
+        # Negative ids keep synthetic logos apart from real brands in the caches
+        brands=tuple(BrandAsset(-(i + 1), f'Brand {i + 1}', path)
+                     for i, path in enumerate(assets['logos'][:brand_count])),
+    )
+
+
+def clear_render_caches():
+    """Drop every per-process render cache, for cold-start measurements."""
+    template_canvases.clear()
+    brand_logos.clear()
+    brand_strips.clear()
+    doctor_overlays.clear()
+    clear_text_cache()
+    clear_fonts()
+    clear_render_plans()
+
+
+def run_scenario(spec, repeat=5, cold=False, brand_cache_dir=None):
+    """
+    Render ``spec`` ``repeat`` times -> (result dict, last rendered bitmap).
+
+    Warm runs discard one untimed render first so every cache is populated;
+    cold runs clear the caches (and the on-disk logo variants) before each
+    render. Stage times are medians in ms; ``rss_growth_mb`` is how much the
+    process grew over the scenario (peak RSS only means anything per run).
+    """
+    rss_before = current_rss_mb()
+    profile = get_output_profile(spec.plan.output_profile)
+    if not cold:
+        render_bitmap(spec).close()
+
+    stage_runs = {stage: [] for stage in RENDER_STAGES}
+    totals = []
+    image = None
+    encoded_bytes = 0
+    for _ in range(repeat):
+        if cold:
+            clear_render_caches()
+            if brand_cache_dir:
+                shutil.rmtree(brand_cache_dir, ignore_errors=True)
+        if image is not None:
+            image.close()
+
+        timings = {}
+        started = time.perf_counter()
+        image = render_bitmap(spec, timings)
+        encode_started = time.perf_counter()
+        buffer = BytesIO()
+        encode_image(image, buffer, profile)
+        timings['encode'] = (time.perf_counter() - encode_started) * 1000
+        totals.append((time.perf_counter() - started) * 1000)
+        encoded_bytes = buffer.tell()
+
+        for stage in RENDER_STAGES:
+            stage_runs[stage].append(timings.get(stage, 0.0))
+
+    return {
+        'stages': {stage: round(statistics.median(runs), 2) for stage, runs in stage_runs.items()},
+        'total_ms': round(statistics.median(totals), 2),
+        'bytes': encoded_bytes,
+        'profile': profile.name,
+        'rss_growth_mb': round(current_rss_mb() - rss_before, 1),
+    }, image
+
+
+def compare_golden(image, golden_path, tolerance=0):
+    """
+    Compare ``image`` with the golden PNG at ``golden_path``.
+
+    Returns (differing pixel count, largest channel difference); a pixel
+    differs when any channel is more than ``tolerance`` levels away.
+    """
+    with Image.open(golden_path) as golden:
+        golden = golden.convert('RGBA')
+    current = image.convert('RGBA')
+    if current.size != golden.size:
+        return current.width * current.height, 255
+
+    diff = ImageChops.difference(current, golden)
+    per_pixel = diff.getchannel(0)
+    for band in range(1, 4):
+        per_pixel = ImageChops.lighter(per_pixel, diff.getchannel(band))
+    max_diff = per_pixel.getextrema()[1]
+    histogram = per_pixel.histogram()
+    return sum(histogram[tolerance + 1:]), max_diff
+
+
+def run_benchmark(workdir, scenarios=None, repeat=5, cold=False):
+    """Render each scenario over fresh synthetic assets -> [(name, result, bitmap)]."""
+    assets = create_assets(os.path.join(workdir, 'assets'))
+    brand_cache_dir = os.path.join(workdir, 'brand-cache')
+    results = []
+    # Logo variants go to the scratch directory, not MEDIA_ROOT
+    with override_settings(IMAGE_BRAND_CACHE_DIR=brand_cache_dir):
+        for name in scenarios or SCENARIOS:
+            spec = build_scenario(name, assets)
+            result, image = run_scenario(spec, repeat=repeat, cold=cold, brand_cache_dir=brand_cache_dir)
+            results.append((name, result, image))
+    return results
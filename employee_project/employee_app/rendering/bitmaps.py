@@ -0,0 +1,134 @@
+"""
+Process-wide caches of decoded bitmaps.
+
+Image workers render the same few template PNGs all day. Decoding them once
+per process and handing each render a copy of the decoded canvas removes the
+PNG decode from per-image latency.
+"""
+import hashlib
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+
+def image_nbytes(image):
+    """Approximate in-memory size of a decoded image."""
+    return image.width * image.height * len(image.getbands())
+
+
+class ImageLRUCache:
+    """Thread-safe LRU of PIL images bounded by their decoded size in bytes."""
+
+    def __init__(self, name, max_bytes):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._items.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        size = image_nbytes(image)
+        if size > self.max_bytes:
+            logger.info(f"{self.name}: {key} ({size} bytes) exceeds the cache budget, not cached")
+            return image
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._bytes -= image_nbytes(previous)
+            self._items[key] = image
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= image_nbytes(evicted)
+        return image
+
+    def discard(self, predicate):
+        """Drop every entry whose key matches ``predicate``."""
+        with self._lock:
+            for key in [k for k in self._items if predicate(k)]:
+                self._bytes -= image_nbytes(self._items.pop(key))
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._items),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+template_canvases = ImageLRUCache(
+    'template canvases',
+    getattr(settings, 'IMAGE_TEMPLATE_CACHE_MAX_MB', 256) * 1024 * 1024,
+)
+
+
+def file_cache_key(path):
+    """(path, mtime, size) so a replaced file is never served from cache."""
+    stat = os.stat(path)
+    return (path, stat.st_mtime_ns, stat.st_size)
+
+
+def source_stamp(path):
+    """
+    Short hash of file_cache_key() - path, mtime and size, not the content -
+    for naming and keying files derived from ``path``. For a digest of the
+    content use dedup.file_digest.
+    """
+    path, mtime_ns, size = file_cache_key(path)
+    return hashlib.sha1(f"{path}:{mtime_ns}:{size}".encode('utf-8')).hexdigest()[:12]
+
+
+def save_png_atomic(image, path, **options):
+    """Save ``image`` as PNG at ``path``; written then renamed so concurrent workers never read a partial file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    image.save(tmp_path, 'PNG', **options)
+    os.replace(tmp_path, path)
+
+
+def decode_template(path):
+    """Decode a template image as RGB or RGBA."""
+    with Image.open(path) as image:
+        # Convert to RGB if needed to reduce memory
+        if image.mode not in ('RGB', 'RGBA'):
+            return image.convert('RGB')
+        image.load()
+        return image.copy()
+
+
+def load_template_canvas(path):
+    """Return a private copy of the decoded template image at ``path``."""
+    key = file_cache_key(path)
+    canvas = template_canvases.get(key)
+    if canvas is None:
+        canvas = template_canvases.put(key, decode_template(path))
+        # A new mtime/size means the file was replaced; older decodes are dead
+        template_canvases.discard(lambda k: k[0] == path and k != key)
+    return canvas.copy()
@@ -0,0 +1,204 @@
+"""
+Pre-scaled brand logo variants and composited brand strips.
+
+Brand logos are converted to RGBA, LANCZOS-resized to a slot and padded onto
+a transparent slot-sized canvas. The catalogue is small and changes rarely,
+so every (brand, slot size) variant is built once - when a brand is saved or
+a template's brand area changes - and kept on disk and in memory, ready to
+be pasted by the renderer.
+
+Brand selections repeat heavily, so the logos of a whole selection are also
+composited once into a strip covering the slots they use; a repeat of the
+same template layout and ordered brands is then a single paste.
+"""
+import logging
+import os
+import shutil
+from collections import namedtuple
+
+from django.conf import settings
+from PIL import Image
+
+from .bitmaps import ImageLRUCache, save_png_atomic, source_stamp
+
+logger = logging.getLogger(__name__)
+
+brand_logos = ImageLRUCache(
+    'brand logos',
+    getattr(settings, 'IMAGE_BRAND_CACHE_MAX_MB', 64) * 1024 * 1024,
+)
+
+brand_strips = ImageLRUCache(
+    'brand strips',
+    getattr(settings, 'IMAGE_BRAND_STRIP_CACHE_MAX_MB', 64) * 1024 * 1024,
+)
+
+# Composited logos of a brand selection and the template position of the strip's top-left
+BrandStrip = namedtuple('BrandStrip', 'image x y')
+
+
+def brand_cache_dir(brand_id=None):
+    cache_dir = getattr(settings, 'IMAGE_BRAND_CACHE_DIR', None) or os.path.join(settings.MEDIA_ROOT, 'brand-cache')
+    if brand_id is None:
+        return cache_dir
+    return os.path.join(cache_dir, str(brand_id))
+
+
+def fit_logo(brand_img, slot_width, slot_height):
+    """Scale a logo to fit the slot and center it on a transparent slot-sized canvas."""
+    # Force RGBA mode to ensure transparency support
+    if brand_img.mode != 'RGBA':
+        brand_img = brand_img.convert('RGBA')
+
+    original_ratio = brand_img.width / brand_img.height
+    slot_ratio = slot_width / slot_height
+
+    if original_ratio > slot_ratio:
+        new_width = slot_width
+        new_height = int(slot_width / original_ratio)
+    else:
+        new_height = slot_height
+        new_width = int(slot_height * original_ratio)
+
+    brand_img = brand_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+
+    if new_width != slot_width or new_height != slot_height:
+        centered_img = Image.new('RGBA', (slot_width, slot_height), (0, 0, 0, 0))
+        paste_x = (slot_width - new_width) // 2
+        paste_y = (slot_height - new_height) // 2
+        centered_img.paste(brand_img, (paste_x, paste_y), brand_img)
+        brand_img = centered_img
+    return brand_img
+
+
+def _variant_path(brand_id, stamp, width, height):
+    return os.path.join(brand_cache_dir(brand_id), f"{stamp}_{width}x{height}.png")
+
+
+def _build_variant(source_path, variant_path, width, height):
+    with Image.open(source_path) as brand_img:
+        logo = fit_logo(brand_img, width, height)
+
+    save_png_atomic(logo, variant_path)
+    return logo
+
+
+def get_brand_logo(brand_id, source_path, width, height, persist=True):
+    """
+    Return the slot-sized RGBA logo of a brand's image; shared, do not modify.
+
+    With ``persist=False`` a variant that is not built yet is made for this
+    call only, without writing it to disk or adding it to the cache.
+    """
+    stamp = source_stamp(source_path)
+    key = (brand_id, stamp, width, height)
+
+    logo = brand_logos.get(key)
+    if logo is not None:
+        return logo
+
+    variant_path = _variant_path(brand_id, stamp, width, height)
+    if os.path.exists(variant_path):
+        with Image.open(variant_path) as cached:
+            cached.load()
+            logo = cached if cached.mode == 'RGBA' else cached.convert('RGBA')
+    elif not persist:
+        with Image.open(source_path) as brand_img:
+            return fit_logo(brand_img, width, height)
+    else:
+        logo = _build_variant(source_path, variant_path, width, height)
+    return brand_logos.put(key, logo)
+
+
+def prescale_brand(brand, sizes):
+    """Write the disk variants of ``brand`` for every (width, height) in ``sizes``."""
+    if not brand.brand_image or not os.path.exists(brand.brand_image.path):
+        return 0
+
+    source_path = brand.brand_image.path
+    stamp = source_stamp(source_path)
+    built = 0
+    for width, height in sizes:
+        variant_path = _variant_path(brand.pk, stamp, width, height)
+        if not os.path.exists(variant_path):
+            _build_variant(source_path, variant_path, width, height)
+            built += 1
+
+    # Variants of a replaced logo can never be hit again
+    brand_dir = brand_cache_dir(brand.pk)
+    for name in os.listdir(brand_dir) if os.path.isdir(brand_dir) else []:
+        if not name.startswith(stamp):
+            try:
+                os.remove(os.path.join(brand_dir, name))
+            except OSError:
+                pass
+    return built
+
+
+def slot_sizes(plans):
+    """Distinct (width, height) brand slot sizes used by the given render plans."""
+    sizes = set()
+    for plan in plans:
+        if plan.brand_area:
+            sizes.update((slot.width, slot.height) for slot in plan.brand_area.slots)
+    return sizes
+
+
+def _slots_overlap(slots):
+    return any(
+        a.x < b.x + b.width and b.x < a.x + a.width and a.y < b.y + b.height and b.y < a.y + a.height
+        for i, a in enumerate(slots) for b in slots[i + 1:]
+    )
+
+
+def _build_strip(brands, slots):
+    """Paste each logo unblended onto a transparent strip -> (image, left, top), or None if a logo failed."""
+    left = min(slot.x for slot in slots)
+    top = min(slot.y for slot in slots)
+    right = max(slot.x + slot.width for slot in slots)
+    bottom = max(slot.y + slot.height for slot in slots)
+    strip = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+    for brand, slot in zip(brands, slots):
+        if not brand.path:
+            logger.warning(f"Brand image file not found for brand {brand.id}")
+            continue
+        try:
+            logo = get_brand_logo(brand.id, brand.path, slot.width, slot.height)
+        except Exception as e:
+            logger.error(f"Failed to render brand {brand.name}: {e}")
+            return None
+        strip.paste(logo, (slot.x - left, slot.y - top))
+    return strip, left, top
+
+
+def get_brand_strip(layout_key, brands, slots):
+    """
+    The logos of ``brands`` (objects with id, name and path) composited into
+    their ``slots`` -> BrandStrip, shared, do not modify.
+
+    ``layout_key`` identifies the template layout, e.g. (template id, plan
+    version). Pasting the strip with its own alpha as mask gives the same
+    pixels as pasting each logo in turn because the slots do not overlap;
+    overlapping layouts return None and are pasted logo by logo.
+    """
+    brands, slots = tuple(brands[:len(slots)]), tuple(slots[:len(brands)])
+    if not slots or _slots_overlap(slots):
+        return None
+
+    key = (layout_key, tuple((brand.id, source_stamp(brand.path) if brand.path else None) for brand in brands))
+    cached = brand_strips.get(key)
+    if cached is not None:
+        return BrandStrip(cached, min(slot.x for slot in slots), min(slot.y for slot in slots))
+
+    built = _build_strip(brands, slots)
+    if built is None:
+        return None
+    strip, left, top = built
+    return BrandStrip(brand_strips.put(key, strip), left, top)
+
+
+def discard_brand(brand_id):
+    """Forget every cached variant and strip of a brand (memory and disk)."""
+    brand_logos.discard(lambda key: key[0] == brand_id)
+    brand_strips.discard(lambda key: any(cached_id == brand_id for cached_id, _ in key[1]))
+    shutil.rmtree(brand_cache_dir(brand_id), ignore_errors=True)
@@ -0,0 +1,70 @@
+"""
+Content-addressed render keys.
+
+A render key is a stable hash of every input that affects a generated image.
+Two requests with the same key produce the same pixels, so the second one can
+reuse the stored output of the first instead of rendering again.
+"""
+import hashlib
+import json
+import threading
+from dataclasses import asdict
+
+from .bitmaps import file_cache_key
+from .encoding import get_output_profile, output_variants
+from .plans import compile_image_settings
+
+# Bump whenever a renderer change alters the pixels of an existing render key,
+# so outputs from the old renderer are not reused.
+RENDER_KEY_VERSION = 6
+
+_MAX_FILE_DIGESTS = 4096
+_file_digests = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path):
+    """SHA-1 of a file's content, memoized per (path, mtime, size)."""
+    key = file_cache_key(path)
+    digest = _file_digests.get(key)
+    if digest is not None:
+        return digest
+
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha1.update(chunk)
+    digest = sha1.hexdigest()
+    with _digest_lock:
+        if len(_file_digests) >= _MAX_FILE_DIGESTS:
+            _file_digests.clear()
+        _file_digests[key] = digest
+    return digest
+
+
+def effective_image_settings(plan, content_data):
+    """The doctor overlay settings a render uses: request overrides win over the template."""
+    if content_data and 'imageSettings' in content_data:
+        return compile_image_settings(content_data['imageSettings'])
+    return plan.image_settings
+
+
+def compute_render_key(spec):
+    """
+    Hash of a RenderSpec: template version, text, overlay settings, photo,
+    ordered brands and the resolved output encodings, so changing
+    IMAGE_OUTPUT_PROFILE or IMAGE_OUTPUT_VARIANTS does not reuse old files.
+    """
+    payload = {
+        'renderer': RENDER_KEY_VERSION,
+        'template': [spec.plan.template_id, spec.plan.version],
+        'text': [[field.name, text] for field, text in spec.texts],
+        'image_settings': asdict(spec.image_settings) if spec.image_settings else None,
+        'photo': file_digest(spec.photo_path) if spec.photo_path else None,
+        'brands': [[brand.id, file_digest(brand.path) if brand.path else None] for brand in spec.brands],
+        'output': asdict(get_output_profile(spec.plan.output_profile)),
+        'variants': [
+            [asdict(variant), asdict(get_output_profile(variant.profile))] for variant in output_variants()
+        ],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
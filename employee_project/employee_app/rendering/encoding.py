@@ -0,0 +1,126 @@
+"""
+Output encoding profiles for generated images.
+
+A profile picks the format, quality and compression used to encode a
+finished render. Lossy profiles only apply to images without transparency;
+a render with real transparency falls back to a lossless encode so logos
+and rounded photos keep their alpha.
+"""
+import time
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from django.conf import settings
+
+DEFAULT_OUTPUT_PROFILES = {
+    # compress_level=1 is about as fast as no compression at a fraction of the size
+    'png': {'format': 'PNG', 'compress_level': 1},
+    'png-raw': {'format': 'PNG', 'compress_level': 0},
+    'png-optimized': {'format': 'PNG', 'optimize': True},
+    'webp': {'format': 'WEBP', 'quality': 85, 'lossy': True},
+    'jpeg': {'format': 'JPEG', 'quality': 85, 'lossy': True},
+}
+
+EXTENSIONS = {'PNG': 'png', 'WEBP': 'webp', 'JPEG': 'jpg'}
+
+# Smaller copies encoded from the same finished canvas as the full output:
+# 'share' for sending to phones, 'thumbnail' for dashboards. Sizes are the
+# longest edge in pixels; renders already smaller are not upscaled. A variant
+# with a background is flattened onto it, so lossy profiles apply to
+# transparent renders too (messaging apps show transparency as black anyway).
+DEFAULT_OUTPUT_VARIANTS = {
+    'share': {'max_edge': 1280, 'profile': 'jpeg', 'background': '#ffffff'},
+    'thumbnail': {'max_edge': 320, 'profile': 'webp'},
+}
+
+
+@dataclass(frozen=True)
+class OutputProfile:
+    name: str
+    format: str = 'PNG'
+    quality: int = 90
+    compress_level: int = 1
+    optimize: bool = False
+    lossy: bool = False
+    # WEBP encoder effort, 0 (fast) to 6 (small)
+    method: int = 4
+
+
+@dataclass(frozen=True)
+class OutputVariant:
+    name: str
+    max_edge: int
+    profile: str
+    background: Optional[str] = None
+
+
+def output_profiles():
+    return getattr(settings, 'IMAGE_OUTPUT_PROFILES', None) or DEFAULT_OUTPUT_PROFILES
+
+
+def get_output_profile(name=None):
+    """Resolve a profile by name; unknown or empty names use IMAGE_OUTPUT_PROFILE."""
+    profiles = output_profiles()
+    if not name or name not in profiles:
+        name = getattr(settings, 'IMAGE_OUTPUT_PROFILE', 'png')
+    options = profiles.get(name) or DEFAULT_OUTPUT_PROFILES['png']
+    return OutputProfile(name=name, **options)
+
+
+def output_variants():
+    """Derived outputs, largest first; IMAGE_OUTPUT_VARIANTS can override the size or profile of each."""
+    overrides = getattr(settings, 'IMAGE_OUTPUT_VARIANTS', None) or {}
+    variants = [
+        OutputVariant(name=name, **dict(options, **overrides.get(name, {})))
+        for name, options in DEFAULT_OUTPUT_VARIANTS.items()
+    ]
+    return sorted(variants, key=lambda variant: variant.max_edge, reverse=True)
+
+
+def has_transparency(image):
+    if image.mode in ('RGBA', 'LA'):
+        return image.getchannel('A').getextrema()[0] < 255
+    return image.mode == 'P' and 'transparency' in image.info
+
+
+def encode_image(image, fp, profile):
+    """Encode ``image`` into the file object ``fp``; returns the file extension used."""
+    image_format = profile.format.upper()
+    lossy = profile.lossy and not has_transparency(image)
+
+    if image_format == 'JPEG' and not lossy:
+        # JPEG cannot carry alpha; keep transparent renders lossless
+        image_format = 'PNG'
+
+    if image_format == 'PNG':
+        image.save(fp, 'PNG', optimize=profile.optimize, compress_level=profile.compress_level, dpi=(96, 96))
+    elif image_format == 'WEBP':
+        image.save(fp, 'WEBP', quality=profile.quality, method=profile.method, lossless=not lossy)
+    elif image_format == 'JPEG':
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.save(fp, 'JPEG', quality=profile.quality, optimize=profile.optimize, dpi=(96, 96))
+    else:
+        raise ValueError(f"Unsupported output format: {profile.format}")
+    return EXTENSIONS[image_format]
+
+
+def benchmark_profiles(image, profile_names=None, repeat=3):
+    """Encode ``image`` with each profile -> [{'profile', 'extension', 'encode_ms', 'bytes'}]"""
+    results = []
+    for name in profile_names or output_profiles():
+        profile = get_output_profile(name)
+        timings = []
+        for _ in range(repeat):
+            buffer = BytesIO()
+            started = time.perf_counter()
+            extension = encode_image(image, buffer, profile)
+            timings.append((time.perf_counter() - started) * 1000)
+        results.append({
+            'profile': name,
+            'extension': extension,
+            'encode_ms': round(min(timings), 2),
+            'bytes': buffer.tell(),
+        })
+    return results
@@ -0,0 +1,87 @@
+"""
+Process-level font registry for the text renderer.
+
+``ImageFont.truetype`` re-reads the font file on every call, and a bare name
+like ``arial.ttf`` that is not installed makes PIL walk every system font
+directory before failing. The registry resolves each font file once, keeps
+loaded font objects keyed by (family, size, weight, style) and remembers
+failed lookups so they are not retried.
+"""
+import logging
+import os
+import threading
+
+from django.conf import settings
+from PIL import ImageFont
+
+logger = logging.getLogger(__name__)
+
+_fonts = {}
+# font file name -> resolved path, or None when it cannot be loaded
+_resolved_paths = {}
+_lock = threading.Lock()
+
+
+def _project_font_path(font_path):
+    """Bare font names are looked up in BASE_DIR/fonts before the system dirs."""
+    if os.path.isabs(font_path):
+        return font_path
+    local_path = os.path.join(settings.BASE_DIR, "fonts", font_path)
+    return local_path if os.path.exists(local_path) else font_path
+
+
+def _load_candidate(font_path, size):
+    if font_path in _resolved_paths:
+        resolved = _resolved_paths[font_path]
+        if resolved is None:
+            return None
+        return ImageFont.truetype(resolved, size)
+
+    try:
+        font = ImageFont.truetype(_project_font_path(font_path), size)
+    except (IOError, OSError):
+        logger.info(f"Font {font_path} not available, falling back")
+        _resolved_paths[font_path] = None
+        return None
+    # PIL reports the full path it found, so later sizes skip the search
+    _resolved_paths[font_path] = font.path
+    return font
+
+
+def get_font(font):
+    """Return the loaded font for a ``FontSpec``, loading it at most once."""
+    key = (font.family, font.size, font.weight, font.style)
+    cached = _fonts.get(key)
+    if cached is not None:
+        return cached
+
+    with _lock:
+        cached = _fonts.get(key)
+        if cached is not None:
+            return cached
+        loaded = None
+        for font_path in font.candidates:
+            loaded = _load_candidate(font_path, font.size)
+            if loaded is not None:
+                break
+        if loaded is None:
+            loaded = ImageFont.load_default()
+        _fonts[key] = loaded
+        return loaded
+
+
+def preload_fonts(plans):
+    """Load every font used by the given render plans."""
+    count = 0
+    for plan in plans:
+        for field in plan.text_fields:
+            get_font(field.font)
+            count += 1
+    return count
+
+
+def clear_fonts():
+    with _lock:
+        _fonts.clear()
+        _resolved_paths.clear()
+
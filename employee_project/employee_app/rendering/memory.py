@@ -0,0 +1,101 @@
+"""
+Worker memory governor.
+
+Renders allocate large, short-lived bitmaps that reference counting frees as
+soon as a task returns, so forcing a full collection after every render only
+adds latency. The governor instead measures resident memory around each task
+and runs ``gc.collect()`` only when the process has grown past the RSS left
+by its first task by more than IMAGE_WORKER_GC_BUDGET_MB. Recycling is left to
+Celery's ``worker_max_memory_per_child``, which settings derive from
+IMAGE_WORKER_RECYCLE_MB; the governor reports when a task pushed the peak past
+that budget so the replacement shows up in the render metrics.
+"""
+import gc
+import logging
+from collections import namedtuple
+
+import psutil
+from django.conf import settings
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# What happened to process memory over one task; ``action`` is '', 'collect' or 'recycle'
+MemoryReport = namedtuple('MemoryReport', 'rss_mb growth_mb action')
+
+COLLECT = 'collect'
+RECYCLE = 'recycle'
+
+
+def current_rss_mb():
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def peak_rss_mb():
+    """Peak RSS of this process, as Celery measures it for recycling (None where unsupported)."""
+    if resource is None:
+        return None
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class MemoryGovernor:
+    """
+    Per-process memory accounting for render tasks.
+
+    Call ``task_started()`` when a task begins and ``task_finished()`` when it
+    is done. The RSS left after the first task - with plans and fonts loaded -
+    is the baseline and never moves, so a slow leak keeps tripping the check
+    until the worker is recycled. The collect budget must therefore leave room
+    for the render caches to fill to their byte budgets (settings derive it
+    from them). Celery's prefork children run one task at a time, so no
+    locking is done.
+    """
+
+    def __init__(self, collect_budget_mb, recycle_budget_mb=None):
+        self.collect_budget_mb = collect_budget_mb
+        self.recycle_budget_mb = recycle_budget_mb
+        self.baseline_mb = None
+        self.collections = 0
+        self._task_start_mb = None
+
+    def task_started(self):
+        self._task_start_mb = current_rss_mb()
+
+    def task_finished(self):
+        """Collect if the process is over budget -> MemoryReport for this task"""
+        rss = current_rss_mb()
+        growth = rss - self._task_start_mb if self._task_start_mb is not None else 0.0
+        self._task_start_mb = None
+        if self.baseline_mb is None:
+            self.baseline_mb = rss
+
+        action = ''
+        if rss - self.baseline_mb > self.collect_budget_mb:
+            unreachable = gc.collect()
+            collected_rss = current_rss_mb()
+            self.collections += 1
+            logger.info(
+                f"RSS {rss:.0f} MB is {rss - self.baseline_mb:.0f} MB over the warm baseline; "
+                f"collected {unreachable} objects, now {collected_rss:.0f} MB"
+            )
+            rss = collected_rss
+            action = COLLECT
+
+        peak = peak_rss_mb()
+        if self.recycle_budget_mb and peak is not None and peak > self.recycle_budget_mb:
+            logger.warning(
+                f"Peak RSS {peak:.0f} MB exceeds {self.recycle_budget_mb} MB, worker will be replaced"
+            )
+            action = RECYCLE
+        return MemoryReport(round(rss, 1), round(growth, 1), action)
+
+
+memory_governor = MemoryGovernor(
+    getattr(settings, 'IMAGE_WORKER_GC_BUDGET_MB', 96),
+    getattr(settings, 'IMAGE_WORKER_RECYCLE_MB', None),
+)
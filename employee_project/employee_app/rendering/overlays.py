@@ -0,0 +1,90 @@
+"""
+Processed doctor photo overlays.
+
+The same doctor is rendered into many templates that share one imageSettings
+block, so the fitted, rounded and faded photo is built once and kept keyed by
+(photo digest, width, height, fit, border radius, opacity). Rounded-corner
+masks depend only on geometry and are shared across doctors.
+"""
+from functools import lru_cache
+
+from django.conf import settings
+from PIL import Image, ImageDraw
+
+from .bitmaps import ImageLRUCache
+from .dedup import file_digest
+from .fonts import get_font
+from .photos import open_photo
+from .plans import FontSpec
+
+doctor_overlays = ImageLRUCache(
+    'doctor overlays',
+    getattr(settings, 'IMAGE_OVERLAY_CACHE_MAX_MB', 64) * 1024 * 1024,
+)
+
+
+@lru_cache(maxsize=64)
+def rounded_mask(width, height, border_radius):
+    """``L`` mask with rounded corners; shared, do not modify."""
+    mask = Image.new('L', (width, height), 0)
+    mask_draw = ImageDraw.Draw(mask)
+    actual_radius = min(width, height) * border_radius // 200
+    mask_draw.rounded_rectangle([(0, 0), (width, height)], radius=actual_radius, fill=255)
+    return mask
+
+
+@lru_cache(maxsize=101)
+def opacity_table(opacity):
+    """Lookup table scaling an alpha band to ``opacity`` percent in a single C pass."""
+    return [max(0, min(255, int(p * opacity / 100))) for p in range(256)]
+
+
+def _placeholder(width, height):
+    placeholder = Image.new('RGB', (width, height), color='#4A90E2')
+    draw_placeholder = ImageDraw.Draw(placeholder)
+    fsz = max(20, min(width, height) // 4)
+    placeholder_font = get_font(FontSpec('Arial', fsz))
+    draw_placeholder.text((width // 2, height // 2), "DR", fill='white', font=placeholder_font, anchor="mm")
+    return placeholder
+
+
+def build_overlay(photo_path, image_settings):
+    """Fit, round and fade a photo (or the "DR" placeholder when ``photo_path`` is None)."""
+    width, height = image_settings.width, image_settings.height
+
+    if photo_path:
+        overlay = open_photo(photo_path, (width, height))
+        if image_settings.fit == 'contain':
+            overlay.thumbnail((width, height), Image.Resampling.LANCZOS)
+        elif image_settings.fit in ('cover', 'stretch'):
+            overlay = overlay.resize((width, height), Image.Resampling.LANCZOS)
+    else:
+        overlay = _placeholder(width, height)
+
+    if image_settings.border_radius > 0:
+        if overlay.mode != 'RGBA':
+            overlay = overlay.convert('RGBA')
+        overlay.putalpha(rounded_mask(overlay.width, overlay.height, image_settings.border_radius))
+
+    if image_settings.opacity < 100:
+        if overlay.mode != 'RGBA':
+            overlay = overlay.convert('RGBA')
+        overlay.putalpha(overlay.getchannel('A').point(opacity_table(image_settings.opacity)))
+    return overlay
+
+
+def get_photo_overlay(photo_path, image_settings):
+    """The processed overlay for the photo at ``photo_path`` (None for the placeholder); shared, do not modify."""
+    digest = file_digest(photo_path) if photo_path else None
+    key = (
+        digest,
+        image_settings.width,
+        image_settings.height,
+        image_settings.fit,
+        image_settings.border_radius,
+        image_settings.opacity,
+    )
+    overlay = doctor_overlays.get(key)
+    if overlay is None:
+        overlay = doctor_overlays.put(key, build_overlay(photo_path, image_settings))
+    return overlay
@@ -0,0 +1,112 @@
+"""
+Doctor photo normalization.
+
+Phone uploads are often 12+ megapixel JPEGs with an EXIF rotation flag, while
+templates place the photo at a few hundred pixels. Uploads are normalized once
+at ingest - rotated upright and capped to IMAGE_PHOTO_MAX_PIXELS - so renders
+decode a small working copy. Legacy photos stored before normalization are
+read with JPEG draft mode, which lets the decoder downscale by 1/2, 1/4 or
+1/8 instead of decoding every pixel.
+"""
+import math
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Encoded photo formats kept as-is in extension; everything else is stored as PNG
+_JPEG_FORMATS = ('JPEG', 'MPO')
+
+
+def max_photo_pixels():
+    return getattr(settings, 'IMAGE_PHOTO_MAX_PIXELS', 2_000_000)
+
+
+def max_decode_pixels():
+    return getattr(settings, 'IMAGE_MAX_DECODE_PIXELS', 40_000_000)
+
+
+def check_decode_size(image):
+    """Refuse images whose header claims more pixels than we are willing to decode."""
+    width, height = image.size
+    if width * height > max_decode_pixels():
+        raise ValidationError(
+            f"Image dimensions {width}x{height} exceed the limit of {max_decode_pixels()} pixels"
+        )
+
+
+def _capped_size(width, height, max_pixels):
+    if width * height <= max_pixels:
+        return width, height
+    scale = math.sqrt(max_pixels / (width * height))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def normalize_photo(uploaded):
+    """
+    Upright, pixel-capped working copy of an uploaded photo as a ContentFile.
+
+    Raises ValidationError for files Pillow cannot read or re-encode and for
+    decompression bombs; the header is checked before any pixel data is decoded.
+    """
+    if hasattr(uploaded, 'seek'):
+        uploaded.seek(0)
+    try:
+        with Image.open(uploaded) as image:
+            check_decode_size(image)
+            source_format = image.format
+            orientation = image.getexif().get(0x0112, 1)
+
+            # Orientations 5-8 swap the axes, so cap against the upright size
+            width, height = image.size
+            if orientation in (5, 6, 7, 8):
+                width, height = height, width
+            target = _capped_size(width, height, max_photo_pixels())
+
+            if source_format in _JPEG_FORMATS and target != (width, height):
+                draft_size = target if orientation not in (5, 6, 7, 8) else target[::-1]
+                image.draft('RGB', draft_size)
+
+            photo = ImageOps.exif_transpose(image)
+            if photo.size != target:
+                photo = photo.resize(target, Image.Resampling.LANCZOS)
+            if photo.mode not in ('RGB', 'RGBA', 'L'):
+                # CMYK, palette and 16-bit uploads; renders only use RGB(A)
+                photo = photo.convert('RGBA' if photo.has_transparency_data else 'RGB')
+
+        buffer = BytesIO()
+        base_name = os.path.splitext(os.path.basename(getattr(uploaded, 'name', '') or 'photo'))[0]
+        if source_format in _JPEG_FORMATS and photo.mode in ('RGB', 'L'):
+            photo.save(buffer, 'JPEG', quality=90)
+            name = f"{base_name}.jpg"
+        else:
+            photo.save(buffer, 'PNG', compress_level=1)
+            name = f"{base_name}.png"
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError) as e:
+        raise ValidationError(f"Invalid image file: {e}")
+    finally:
+        if hasattr(uploaded, 'seek'):
+            uploaded.seek(0)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def open_photo(path, size):
+    """
+    Decode a stored photo for placement at ``size`` (width, height).
+
+    JPEGs larger than needed are reduced during decode; the result is loaded
+    and detached from the file so the handle is closed on return.
+    """
+    with Image.open(path) as image:
+        check_decode_size(image)
+        if image.format in _JPEG_FORMATS:
+            # Draft works on the stored axes, before the EXIF rotation
+            if image.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                size = size[::-1]
+            image.draft('RGB', size)
+        photo = ImageOps.exif_transpose(image)
+        photo.load()
+    return photo
@@ -0,0 +1,494 @@
+"""
+Compiled render plans for image templates.
+
+A ``RenderPlan`` is the parsed, immutable form of an image template's
+``text_positions``, ``imageSettings`` and ``brand_area_settings``. Plans are
+compiled once per template version and cached per worker process, so a
+render only has to fill in the doctor's values.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Font mapping for PIL
+FONT_MAP = {
+    'Arial': 'arial.ttf',
+    'Times New Roman': 'times.ttf',
+    'Helvetica': 'arial.ttf',
+    'Georgia': 'georgia.ttf',
+    'Verdana': 'verdana.ttf',
+    'Impact': 'impact.ttf',
+    'Comic Sans MS': 'comic.ttf',
+    'Dancing Script': 'DancingScript-Regular.ttf',
+    'Great Vibes': 'GreatVibes-Regular.ttf',
+    'Pacifico': 'Pacifico-Regular.ttf',
+    'Allura': 'Allura-Regular.ttf',
+    'Alex Brush': 'AlexBrush-Regular.ttf'
+}
+
+# Cursive fonts ship with the project and are naturally slanted, so they never
+# get the bold/italic treatment applied to system fonts.
+CURSIVE_FONTS = frozenset(['Dancing Script', 'Great Vibes', 'Pacifico', 'Allura', 'Alex Brush'])
+
+# Doctor fields are centered on the template; 'state' is folded into 'city'.
+DOCTOR_FIELDS = ('name', 'specialization', 'city')
+STATIC_FIELDS = ('customText',)
+
+# GenerateImageContentView accepts at most this many brands per request.
+MAX_BRANDS = 10
+# Gap between two brands centered in a 3-slot row.
+BRAND_ROW_GAP = 60
+
+
+@dataclass(frozen=True)
+class FontSpec:
+    family: str
+    size: int
+    weight: str = 'normal'
+    style: str = 'normal'
+
+    @property
+    def is_cursive(self):
+        return self.family in CURSIVE_FONTS
+
+    @property
+    def candidates(self):
+        """Font files to try, in order, before falling back to PIL's default."""
+        base_font = FONT_MAP.get(self.family, 'arial.ttf')
+        if self.is_cursive:
+            font_path = os.path.join(settings.BASE_DIR, "fonts", base_font)
+        else:
+            font_path = base_font
+
+        if self.weight == 'bold' and not self.is_cursive:
+            return (font_path.replace('.ttf', 'bd.ttf'), font_path)
+        return (font_path, 'arial.ttf')
+
+
+@dataclass(frozen=True)
+class ShadowSpec:
+    offset_x: int
+    offset_y: int
+    color: tuple
+
+
+@dataclass(frozen=True)
+class TextFieldPlan:
+    name: str
+    x: int
+    y: int
+    centered: bool
+    font: FontSpec
+    color: str
+    shadow: Optional[ShadowSpec]
+    synthetic_italic: bool
+    # Opt-in auto-fit: shrink (and optionally wrap) to stay within max_width
+    max_width: Optional[int] = None
+    min_font_size: Optional[int] = None
+    wrap: bool = False
+    max_lines: int = 2
+    line_spacing: float = 1.2
+
+
+@dataclass(frozen=True)
+class ImageSettingsPlan:
+    x: int
+    y: int
+    width: int
+    height: int
+    fit: str
+    border_radius: int
+    opacity: int
+
+
+@dataclass(frozen=True)
+class BrandSlot:
+    """A brand slot in template coordinates (brand area offset already applied)."""
+    x: int
+    y: int
+    width: int
+    height: int
+
+
+@dataclass(frozen=True)
+class BrandAreaPlan:
+    slots: tuple
+    # layouts[n] holds the slots used for n brands.
+    layouts: tuple
+
+    def layout_for(self, count):
+        if count < len(self.layouts):
+            return self.layouts[count]
+        return self.slots[:count]
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    template_id: int
+    version: str
+    template_path: str
+    text_fields: tuple
+    image_settings: Optional[ImageSettingsPlan]
+    brand_area: Optional[BrandAreaPlan]
+    custom_text: str = ''
+    output_profile: str = ''
+    # False for request-only plans (preview overrides): nothing built from them
+    # is written to disk or kept in the shared caches
+    persistent: bool = True
+
+
+def parse_css_shadow(shadow_str):
+    """Parse CSS-like text-shadow: '2px 2px 4px rgba(0,0,0,0.7)' -> dict or None"""
+    if shadow_str == 'none' or not shadow_str:
+        return None
+    try:
+        if 'rgba' in shadow_str:
+            rgba_start = shadow_str.find('rgba(')
+            rgba_end = shadow_str.find(')', rgba_start)
+            rgba_str = shadow_str[rgba_start+5:rgba_end]
+            rgba_values = [float(x.strip()) for x in rgba_str.split(',')]
+            shadow_color = (int(rgba_values[0]), int(rgba_values[1]), int(rgba_values[2]))
+            offset_part = shadow_str[:rgba_start].strip()
+            offsets = offset_part.replace('px', '').split()
+            if len(offsets) >= 2:
+                return {
+                    'offset_x': int(float(offsets[0])),
+                    'offset_y': int(float(offsets[1])),
+                    'color': shadow_color
+                }
+        elif 'px' in shadow_str:
+            parts = shadow_str.replace('px', '').split()
+            if len(parts) >= 2:
+                return {
+                    'offset_x': int(float(parts[0])),
+                    'offset_y': int(float(parts[1])),
+                    'color': (128, 128, 128)
+                }
+    except:  # noqa: E722
+        pass
+    return {'offset_x': 2, 'offset_y': 2, 'color': (128, 128, 128)}
+
+
+def template_version(template):
+    """Fingerprint of every template column that affects rendering."""
+    payload = json.dumps(
+        [
+            template.text_positions,
+            template.brand_area_settings,
+            template.custom_text,
+            template.template_image.name if template.template_image else None,
+            template.output_profile,
+        ],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _compile_text_field(field_name, pos, centered):
+    font = FontSpec(
+        family=pos.get('fontFamily', 'Arial'),
+        size=int(pos.get('fontSize', 40)),
+        weight=pos.get('fontWeight', 'normal'),
+        style=pos.get('fontStyle', 'normal'),
+    )
+    shadow_info = parse_css_shadow(pos.get('textShadow', 'none'))
+    shadow = ShadowSpec(**shadow_info) if shadow_info else None
+    return TextFieldPlan(
+        name=field_name,
+        # Centered fields only keep their Y position
+        x=0 if centered else int(pos['x']),
+        y=int(pos['y']),
+        centered=centered,
+        font=font,
+        color=pos.get('color', 'black'),
+        shadow=shadow,
+        synthetic_italic=font.style in ('italic', 'oblique') and not font.is_cursive,
+        **_compile_auto_fit(pos, font.size),
+    )
+
+
+def _compile_auto_fit(pos, font_size):
+    """``maxWidth``/``minFontSize``/``wrap``/``maxLines``/``lineHeight`` -> TextFieldPlan kwargs."""
+    if not pos.get('maxWidth'):
+        return {}
+    try:
+        return {
+            'max_width': max(1, int(pos['maxWidth'])),
+            'min_font_size': max(1, min(font_size, int(pos.get('minFontSize', font_size // 2 or 1)))),
+            'wrap': bool(pos.get('wrap', False)),
+            'max_lines': max(1, int(pos.get('maxLines', 2))),
+            'line_spacing': float(pos.get('lineHeight', 1.2)),
+        }
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid auto-fit settings {pos}: {e}")
+        return {}
+
+
+def compile_image_settings(image_settings):
+    """Compile an ``imageSettings`` dict; returns None when the overlay is off."""
+    if not image_settings or not image_settings.get('enabled', False):
+        return None
+    try:
+        return ImageSettingsPlan(
+            x=int(image_settings.get('x', 400)),
+            y=int(image_settings.get('y', 50)),
+            width=int(image_settings.get('width', 150)),
+            height=int(image_settings.get('height', 150)),
+            fit=image_settings.get('fit', 'cover'),
+            border_radius=int(image_settings.get('borderRadius', 0)),
+            opacity=int(image_settings.get('opacity', 100)),
+        )
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid imageSettings {image_settings}: {e}")
+        return None
+
+
+def _center_brands_in_row(row_slots, brand_count):
+    """Center align brands within a 3-slot row"""
+    if brand_count == 1:
+        return [row_slots[1]]
+    if brand_count == 2:
+        # Pull the outer slots in towards the middle slot's center
+        center_slot = row_slots[1]
+        center_x = center_slot['x'] + center_slot['width'] // 2
+        brand_width = row_slots[0]['width']
+        left_slot = dict(row_slots[0], x=center_x - brand_width - BRAND_ROW_GAP // 2)
+        right_slot = dict(row_slots[2], x=center_x + BRAND_ROW_GAP // 2)
+        return [left_slot, right_slot]
+    return row_slots[:brand_count]
+
+
+def _preset_3x3(slots, brands_count):
+    """Hand-tuned layouts of the standard 9-slot brand area, kept so those templates render as before."""
+    # Slots: [0=right, 1=center, 2=left] for row 1, left to right for rows 2 and 3
+    rows = (
+        [slots[2], slots[1], slots[0]],
+        [slots[3], slots[4], slots[5]],
+        [slots[6], slots[7], slots[8]],
+    )
+    layouts = {
+        0: lambda: [],
+        1: lambda: _center_brands_in_row(rows[1], 1),
+        2: lambda: _center_brands_in_row(rows[0], 2),
+        3: lambda: rows[0],
+        4: lambda: _center_brands_in_row(rows[0], 2) + _center_brands_in_row(rows[1], 2),
+        5: lambda: _center_brands_in_row(rows[0], 2) + rows[1],
+        6: lambda: rows[0] + rows[1],
+        7: lambda: rows[0] + rows[1] + _center_brands_in_row(rows[2], 1),
+        8: lambda: rows[0] + rows[1] + _center_brands_in_row(rows[2], 2),
+    }
+    return layouts[brands_count]()
+
+
+def _slot_box(slot):
+    return int(slot['x']), int(slot['y']), int(slot['width']), int(slot['height'])
+
+
+def grid_rows(slots):
+    """Group slots into rows, top to bottom and each left to right.
+
+    A slot joins the current row when its vertical center falls inside the
+    row's first slot, so slightly misaligned grids still form rows.
+    """
+    rows = []
+    for slot in sorted(slots, key=lambda slot: (int(slot['y']), int(slot['x']))):
+        _, y, _, height = _slot_box(slot)
+        if rows:
+            _, row_y, _, row_height = _slot_box(rows[-1][0])
+            if row_y <= y + height // 2 < row_y + row_height:
+                rows[-1].append(slot)
+                continue
+        rows.append([slot])
+    return [sorted(row, key=lambda slot: int(slot['x'])) for row in rows]
+
+
+def center_in_row(row, count):
+    """The first ``count`` slots of ``row``, moved to sit centered on the row at its own spacing."""
+    if count >= len(row):
+        return list(row)
+    first_x, _, first_width, _ = _slot_box(row[0])
+    last_x, _, last_width, _ = _slot_box(row[-1])
+    gap = int(row[1]['x']) - (first_x + first_width) if len(row) > 1 else 0
+
+    used = row[:count]
+    span = sum(int(slot['width']) for slot in used) + gap * (count - 1)
+    x = (first_x + last_x + last_width) // 2 - span // 2
+    centered = []
+    for slot in used:
+        centered.append(dict(slot, x=x))
+        x += int(slot['width']) + gap
+    return centered
+
+
+def solve_layout(rows, brands_count):
+    """Fill rows top to bottom; a partly filled last row is centered."""
+    layout = []
+    for row in rows:
+        remaining = brands_count - len(layout)
+        if remaining <= 0:
+            break
+        layout.extend(row if remaining >= len(row) else center_in_row(row, remaining))
+    return layout
+
+
+def _slots_for_count(slots, brands_count):
+    """Pick the slots used for ``brands_count`` brands from any slot grid."""
+    if len(slots) == 9:
+        # Full areas keep their saved slot order
+        return _preset_3x3(slots, brands_count) if brands_count < 9 else slots[:brands_count]
+    return solve_layout(grid_rows(slots), brands_count)
+
+
+def _valid_slot(slot):
+    try:
+        _, _, width, height = _slot_box(slot)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return width > 0 and height > 0
+
+
+def compile_brand_area(area_settings):
+    """
+    Compile ``brand_area_settings``; returns None when brands are not rendered.
+
+    Malformed slots are dropped (and logged) so a bad brand area cannot stop
+    the rest of the template from rendering.
+    """
+    if not isinstance(area_settings, dict) or not area_settings.get('enabled', False):
+        return None
+    slots = area_settings.get('slots') or []
+    if not isinstance(slots, list):
+        logger.error(f"Invalid brand slots {slots!r}")
+        return None
+    raw_slots = [slot for slot in slots if _valid_slot(slot)]
+    if len(raw_slots) < len(slots):
+        logger.error(f"Dropped {len(slots) - len(raw_slots)} invalid brand slots of {slots}")
+    if not raw_slots:
+        return None
+
+    try:
+        area_x = int(area_settings.get('x', 50))
+        area_y = int(area_settings.get('y', 400))
+    except (TypeError, ValueError) as e:
+        logger.error(f"Invalid brand area position {area_settings}: {e}")
+        area_x, area_y = 50, 400
+
+    def to_slot(slot):
+        return BrandSlot(
+            x=area_x + int(slot['x']),
+            y=area_y + int(slot['y']),
+            width=int(slot['width']),
+            height=int(slot['height']),
+        )
+
+    layouts = tuple(
+        tuple(to_slot(slot) for slot in _slots_for_count(raw_slots, count))
+        for count in range(max(MAX_BRANDS, len(raw_slots)) + 1)
+    )
+    return BrandAreaPlan(slots=tuple(to_slot(slot) for slot in raw_slots), layouts=layouts)
+
+
+def compile_render_plan(template, version=None):
+    """Turn an image template row into an immutable ``RenderPlan``."""
+    positions = template.text_positions or {}
+
+    text_fields = []
+    for field_name in DOCTOR_FIELDS:
+        if field_name in positions:
+            text_fields.append(_compile_text_field(field_name, positions[field_name], centered=True))
+    for field_name in STATIC_FIELDS:
+        if field_name in positions:
+            text_fields.append(_compile_text_field(field_name, positions[field_name], centered=False))
+
+    return RenderPlan(
+        template_id=template.pk,
+        version=version or template_version(template),
+        template_path=template.template_image.path if template.template_image else '',
+        text_fields=tuple(text_fields),
+        image_settings=compile_image_settings(positions.get('imageSettings')),
+        brand_area=compile_brand_area(template.brand_area_settings),
+        custom_text=template.custom_text or '',
+        output_profile=template.output_profile or '',
+    )
+
+
+_plan_cache = OrderedDict()
+_plan_lock = threading.Lock()
+
+
+def get_render_plan(template):
+    """Return the cached plan for this template version, compiling it on a miss."""
+    version = template_version(template)
+    key = (template.pk, version)
+    with _plan_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = compile_render_plan(template, version=version)
+    logger.info(f"Compiled render plan for template {template.pk} (version {version})")
+
+    max_plans = getattr(settings, 'IMAGE_RENDER_PLAN_CACHE_SIZE', 64)
+    with _plan_lock:
+        # Older versions of the same template can never be hit again
+        for stale_key in [k for k in _plan_cache if k[0] == template.pk and k != key]:
+            del _plan_cache[stale_key]
+        _plan_cache[key] = plan
+        while len(_plan_cache) > max_plans:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def clear_render_plans():
+    with _plan_lock:
+        _plan_cache.clear()
+
+
+def resolve_text_values(plan, doctor, content_data):
+    """Fill the plan's doctor text fields with doctor values -> [(TextFieldPlan, str)].
+
+    Static fields are part of the template base layer (``static_text_values``).
+    """
+    content_data = content_data or {}
+
+    # Combine city and state with comma if both exist
+    city_state = []
+    if content_data.get('doctor_city', doctor.city):
+        city_state.append(content_data.get('doctor_city', doctor.city))
+    if content_data.get('doctor_state', doctor.state):
+        city_state.append(content_data.get('doctor_state', doctor.state))
+
+    all_text_data = {
+        'name': content_data.get('doctor_name', doctor.name),
+        'clinic': content_data.get('doctor_clinic', doctor.clinic),
+        'city': ', '.join(city_state),
+        'specialization': content_data.get('doctor_specialization', doctor.specialization),
+        'mobile': doctor.mobile_number,
+    }
+    return [
+        (field, str(all_text_data[field.name]))
+        for field in plan.text_fields
+        if field.name not in STATIC_FIELDS and all_text_data.get(field.name)
+    ]
+
+
+def static_text_values(plan):
+    """Text fields that are the same for every doctor -> [(TextFieldPlan, str)]."""
+    values = {'customText': plan.custom_text}
+    return [
+        (field, str(values[field.name]))
+        for field in plan.text_fields
+        if field.name in STATIC_FIELDS and values.get(field.name)
+    ]
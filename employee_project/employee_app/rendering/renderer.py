@@ -0,0 +1,259 @@
+"""
+The image renderer.
+
+Every image render - the Celery tasks, views and management commands - goes
+through ``render_bitmap``. It is a pure function of a ``RenderSpec``: a
+compiled plan, the resolved text, the overlay settings and file handles for
+the doctor photo and brand logos. It does not touch the database, so specs can
+be built from model rows (``build_render_spec``) or from plain files.
+"""
+import logging
+import os
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from .base_layers import load_base_canvas
+from .brand_logos import get_brand_logo, get_brand_strip
+from .dedup import effective_image_settings
+from .encoding import OutputProfile, encode_image, get_output_profile, output_variants
+from .overlays import get_photo_overlay
+from .plans import ImageSettingsPlan, RenderPlan, resolve_text_values
+from .text import draw_text_fields
+
+logger = logging.getLogger(__name__)
+
+# A brand logo to paste; ``path`` is None when the brand has no usable image
+BrandAsset = namedtuple('BrandAsset', 'id name path')
+
+
+@dataclass(frozen=True)
+class RenderSpec:
+    plan: RenderPlan
+    # ((TextFieldPlan, str), ...) doctor fields in drawing order; static fields are in the base layer
+    texts: tuple
+    image_settings: Optional[ImageSettingsPlan]
+    # None draws the "DR" placeholder when the overlay is enabled
+    photo_path: Optional[str]
+    # BrandAsset tuple in slot order
+    brands: tuple = ()
+
+
+# Stage names recorded by ``render_bytes(spec, timings={})``, in render order
+RENDER_STAGES = ('decode', 'text', 'overlay', 'brands', 'encode')
+
+# Previews are small, flattened JPEGs: quick to encode and to send to the editor
+PREVIEW_PROFILE = OutputProfile(name='preview', format='JPEG', quality=75, lossy=True)
+
+
+@contextmanager
+def _stage(timings, name):
+    """Add the wall time of the block to ``timings[name]`` in ms, when timing is requested."""
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - started) * 1000
+
+
+def _existing_path(field_file):
+    if field_file and field_file.path and os.path.exists(field_file.path):
+        return field_file.path
+    return None
+
+
+def build_render_spec(plan, doctor, content_data, brands):
+    """Spec for rendering ``doctor`` (a DoctorVideo) with ``brands`` (Brand rows) from ``plan``."""
+    image_settings = effective_image_settings(plan, content_data)
+    photo_path = _existing_path(doctor.image) if image_settings else None
+    if image_settings and photo_path is None:
+        logger.info(f"No image file for doctor {doctor.name}, using placeholder")
+    return RenderSpec(
+        plan=plan,
+        texts=tuple(resolve_text_values(plan, doctor, content_data)),
+        image_settings=image_settings,
+        photo_path=photo_path,
+        brands=tuple(
+            BrandAsset(brand.id, brand.name, _existing_path(brand.brand_image))
+            for brand in brands
+        ) if plan.brand_area else (),
+    )
+
+
+def render_bitmap(spec, timings=None):
+    """
+    Render ``spec`` onto a private copy of its template and return the image.
+
+    Pass a dict as ``timings`` to collect per-stage wall time in ms.
+    """
+    plan = spec.plan
+    with _stage(timings, 'decode'):
+        # Private copy of the template with its static text already drawn, cached per worker process
+        template_image = load_base_canvas(plan)
+
+    with _stage(timings, 'text'):
+        # Doctor fields are centered on the template. Each field is drawn once
+        # (with its shadow and slant) and composited as a layer.
+        draw_text_fields(template_image, spec.texts)
+
+    # Optional doctor image overlay
+    if spec.image_settings:
+        with _stage(timings, 'overlay'):
+            try:
+                # Fitted, rounded and faded photo, shared across renders with the same settings
+                doctor_img = get_photo_overlay(spec.photo_path, spec.image_settings)
+                img_position = (spec.image_settings.x, spec.image_settings.y)
+
+                if template_image.mode != 'RGBA':
+                    template_image = template_image.convert('RGBA')
+                if doctor_img.mode == 'RGBA':
+                    template_image.paste(doctor_img, img_position, doctor_img)
+                else:
+                    template_image.paste(doctor_img, img_position)
+            except Exception as e:
+                logger.error(f"Error compositing doctor image: {e}")
+
+    # Render brands in predefined area with smart layout
+    if spec.brands and plan.brand_area:
+        with _stage(timings, 'brands'):
+            try:
+                # Ensure template_image is in RGBA mode before brand rendering
+                if template_image.mode != 'RGBA':
+                    template_image = template_image.convert('RGBA')
+
+                layout_key = (plan.template_id, plan.version) if plan.persistent else None
+                render_brands_in_area(template_image, spec.brands, plan.brand_area, layout_key, persist=plan.persistent)
+            except Exception as e:
+                logger.error(f"Error in render_brands_in_area: {e}", exc_info=True)
+    return template_image
+
+
+def render_brands_in_area(template_image, brands, brand_area, layout_key=None, persist=True):
+    """
+    Paste ``brands`` (BrandAsset) into the slots the plan picked for this brand count.
+
+    With a ``layout_key`` the selection is pasted as one cached strip. With
+    ``persist=False`` missing logo variants are not written to disk.
+    """
+    needed_slots = brand_area.layout_for(len(brands))
+    logger.info(f"Rendering {len(brands)} brands into {len(needed_slots)} slots")
+
+    strip = get_brand_strip(layout_key, brands, needed_slots) if layout_key else None
+    if strip is not None:
+        template_image.paste(strip.image, (strip.x, strip.y), strip.image)
+        return
+
+    # Render brands in selected slots (no additional centering offset needed)
+    for i, (brand, slot) in enumerate(zip(brands, needed_slots)):
+        if not brand.path:
+            logger.warning(f"Brand image file not found for brand {brand.id}")
+            continue
+        try:
+            # Slot-sized RGBA variant, pre-scaled at upload time
+            logo = get_brand_logo(brand.id, brand.path, slot.width, slot.height, persist=persist)
+            template_image.paste(logo, (slot.x, slot.y), logo)
+            logger.info(f"Rendered brand {brand.name} in slot {i+1} at ({slot.x}, {slot.y})")
+        except Exception as e:
+            logger.error(f"Failed to render brand {brand.name}: {e}")
+
+
+def render_bytes(spec, timings=None):
+    """Render and encode ``spec`` with its template's output profile -> (bytes, extension)"""
+    image = render_bitmap(spec, timings)
+    try:
+        with _stage(timings, 'encode'):
+            # Save with transparency preserved - lossy profiles skip transparent renders
+            buffer = BytesIO()
+            extension = encode_image(image, buffer, get_output_profile(spec.plan.output_profile))
+        return buffer.getvalue(), extension
+    finally:
+        image.close()
+
+
+def _downscale(image, max_edge):
+    """``image`` scaled so its longest edge is at most ``max_edge`` (unchanged when already smaller)"""
+    scale = max_edge / max(image.size)
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+
+def _flatten(image, background):
+    flattened = Image.new('RGB', image.size, background)
+    flattened.paste(image, mask=image.getchannel('A'))
+    return flattened
+
+
+def render_outputs(spec, timings=None):
+    """
+    Render ``spec`` once and encode the full image plus every output variant.
+
+    Returns {'full': ContentFile, <variant name>: ContentFile, ...}. Variants
+    are resized from the finished canvas, each from the next larger one, so
+    the expensive part of the render is never repeated.
+    """
+    image = render_bitmap(spec, timings)
+    outputs = {}
+    try:
+        with _stage(timings, 'encode'):
+            buffer = BytesIO()
+            extension = encode_image(image, buffer, get_output_profile(spec.plan.output_profile))
+            outputs['full'] = ContentFile(buffer.getvalue(), name=f"generated.{extension}")
+
+            source = image
+            for variant in output_variants():
+                scaled = _downscale(source, variant.max_edge)
+                encoded = scaled
+                if variant.background and scaled.mode == 'RGBA':
+                    encoded = _flatten(scaled, variant.background)
+                buffer = BytesIO()
+                extension = encode_image(encoded, buffer, get_output_profile(variant.profile))
+                if encoded is not scaled:
+                    encoded.close()
+                outputs[variant.name] = ContentFile(buffer.getvalue(), name=f"{variant.name}.{extension}")
+                if source is not image:
+                    source.close()
+                source = scaled
+            if source is not image:
+                source.close()
+        return outputs
+    finally:
+        image.close()
+
+
+def render_preview(spec, max_edge, timings=None):
+    """
+    Render ``spec`` as a small preview JPEG -> bytes.
+
+    Composition runs at full size, where the template canvas, fonts, text
+    layers, photo overlay and logo variants all come from the per-process
+    caches; only the downscale (box reduce plus bilinear) and the encode of
+    the small image are new work. Transparency is flattened onto white.
+    """
+    image = render_bitmap(spec, timings)
+    try:
+        with _stage(timings, 'encode'):
+            scale = max_edge / max(image.size)
+            if scale < 1:
+                size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+                preview = image.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0)
+            else:
+                preview = image.copy()
+            if preview.mode == 'RGBA':
+                preview = _flatten(preview, '#ffffff')
+            buffer = BytesIO()
+            encode_image(preview, buffer, PREVIEW_PROFILE)
+            preview.close()
+        return buffer.getvalue()
+    finally:
+        image.close()
@@ -0,0 +1,243 @@
+"""
+Text layers.
+
+Each text field is rendered once onto a tight transparent RGBA layer - shadow
+pass first, then the text - and the finished layer is composited onto the
+canvas. Oblique text is produced by shearing the layer instead of drawing the
+string several times. Measurements are memoized per (font, string) and
+finished layers are cached, so static text such as the template's custom text
+and repeated doctor values are drawn once per process.
+"""
+import math
+import threading
+from collections import namedtuple
+from dataclasses import replace
+from functools import lru_cache
+
+from django.conf import settings
+from PIL import Image, ImageDraw
+
+from .bitmaps import ImageLRUCache
+from .fonts import get_font
+
+# Horizontal shift per pixel of height for synthetic italics (about 11 degrees)
+ITALIC_SHEAR = 0.2
+
+text_layers = ImageLRUCache(
+    'text layers',
+    getattr(settings, 'IMAGE_TEXT_CACHE_MAX_MB', 32) * 1024 * 1024,
+)
+
+# A finished layer and where its top-left sits relative to the text origin
+TextLayer = namedtuple('TextLayer', 'image offset_x offset_y')
+
+# Glyph advances are recorded at this size and scaled linearly for auto-fit
+ADVANCE_REFERENCE_SIZE = 100
+
+# (family, weight, style) -> {character: advance at ADVANCE_REFERENCE_SIZE}
+_advance_tables = {}
+_advance_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
+def measure_text(font, text):
+    """Ink bounding box of ``text`` drawn at the origin, like ``draw.textbbox((0, 0), ...)``."""
+    return get_font(font).getbbox(text)
+
+
+def text_width(font, text):
+    left, _, right, _ = measure_text(font, text)
+    return right - left
+
+
+def clear_text_cache():
+    measure_text.cache_clear()
+    text_layers.clear()
+    with _advance_lock:
+        _advance_tables.clear()
+
+
+def estimate_width(font, text):
+    """Approximate advance width of ``text``, from per-character advances scaled to the font size."""
+    key = (font.family, font.weight, font.style)
+    table = _advance_tables.get(key)
+    if table is None:
+        with _advance_lock:
+            table = _advance_tables.setdefault(key, {})
+
+    missing = set(text).difference(table)
+    if missing:
+        reference = get_font(replace(font, size=ADVANCE_REFERENCE_SIZE))
+        with _advance_lock:
+            for char in missing:
+                table[char] = reference.getlength(char)
+    return sum(table[char] for char in text) * font.size / ADVANCE_REFERENCE_SIZE
+
+
+def wrap_words(font, text, max_width):
+    """Greedy word wrap by estimated width; a single long word keeps its own line."""
+    lines = []
+    current = ''
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and estimate_width(font, candidate) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines or [text]
+
+
+def _split(field, font, text):
+    if field.wrap:
+        return wrap_words(font, text, field.max_width)
+    return [text]
+
+
+def _fits_estimate(field, font, text):
+    lines = _split(field, font, text)
+    return len(lines) <= field.max_lines and all(
+        estimate_width(font, line) <= field.max_width for line in lines
+    )
+
+
+def _fits_exact(field, font, lines):
+    return all(text_width(font, line) <= field.max_width for line in lines)
+
+
+def fit_text(field, text):
+    """
+    Font and lines for ``text`` in ``field``.
+
+    Fields without ``max_width`` are returned unchanged. Otherwise the largest
+    size between ``min_font_size`` and the configured size whose (wrapped)
+    lines fit is found by binary search over the estimated widths, then
+    confirmed against the real ink width of the chosen lines.
+    """
+    if not field.max_width:
+        return field.font, [text]
+
+    low, high = field.min_font_size, field.font.size
+    best = low
+    while low <= high:
+        size = (low + high) // 2
+        if _fits_estimate(field, replace(field.font, size=size), text):
+            best = size
+            low = size + 1
+        else:
+            high = size - 1
+
+    # Kerning and side bearings are not in the advance estimate
+    font = replace(field.font, size=best)
+    lines = _split(field, font, text)
+    while best > field.min_font_size and not _fits_exact(field, font, lines):
+        best -= 1
+        font = replace(field.font, size=best)
+        lines = _split(field, font, text)
+
+    if len(lines) > field.max_lines:
+        # Even the minimum size needs more lines: fold the rest into the last one
+        lines = lines[:field.max_lines - 1] + [' '.join(lines[field.max_lines - 1:])]
+    return font, lines
+
+
+def _italic_pad(height):
+    return math.ceil(ITALIC_SHEAR * height)
+
+
+def _shear(layer, baseline):
+    """Slant ``layer`` to the right around ``baseline``, widening it to fit."""
+    pad = _italic_pad(layer.height)
+    widened = Image.new('RGBA', (layer.width + 2 * pad, layer.height), (0, 0, 0, 0))
+    widened.paste(layer, (pad, 0))
+    # Output (x, y) samples input (x + shear * (y - baseline), y): rows above
+    # the baseline move right, descenders move left.
+    return widened.transform(
+        widened.size,
+        Image.Transform.AFFINE,
+        (1, ITALIC_SHEAR, -ITALIC_SHEAR * baseline, 0, 1, 0),
+        resample=Image.Resampling.BICUBIC,
+    )
+
+
+def _layer_box(field, text):
+    """Box covering the text and its shadow, relative to the text origin."""
+    left, top, right, bottom = measure_text(field.font, text)
+    if field.shadow:
+        left = min(left, left + field.shadow.offset_x)
+        top = min(top, top + field.shadow.offset_y)
+        right = max(right, right + field.shadow.offset_x)
+        bottom = max(bottom, bottom + field.shadow.offset_y)
+    return left, top, max(right, left + 1), max(bottom, top + 1)
+
+
+def build_text_layer(field, text):
+    """Draw ``text`` with the field's shadow and style onto a tight RGBA layer."""
+    left, top, right, bottom = _layer_box(field, text)
+    layer = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(layer)
+    styled_font = get_font(field.font)
+    if field.shadow:
+        draw.text(
+            (field.shadow.offset_x - left, field.shadow.offset_y - top),
+            text, fill=field.shadow.color, font=styled_font
+        )
+    draw.text((-left, -top), text, fill=field.color, font=styled_font)
+
+    if field.synthetic_italic:
+        ascent, _ = styled_font.getmetrics()
+        layer = _shear(layer, ascent - top)
+    return layer
+
+
+def get_text_layer(field, text):
+    """The layer for ``text`` in ``field``'s style and its offset from the text origin.
+
+    Layers are cached and shared; do not modify them.
+    """
+    key = (field.font, field.color, field.shadow, field.synthetic_italic, text)
+    layer = text_layers.get(key)
+    if layer is None:
+        layer = text_layers.put(key, build_text_layer(field, text))
+
+    left, top, _, bottom = _layer_box(field, text)
+    if field.synthetic_italic:
+        left -= _italic_pad(bottom - top)
+    return TextLayer(layer, left, top)
+
+
+def composite_layer(canvas, layer, x, y):
+    """Blend ``layer`` onto ``canvas`` with its top-left at (x, y), clipped to the canvas."""
+    crop_left, crop_top = max(0, -x), max(0, -y)
+    crop_right = min(layer.width, canvas.width - x)
+    crop_bottom = min(layer.height, canvas.height - y)
+    if crop_left >= crop_right or crop_top >= crop_bottom:
+        return
+    if (crop_left, crop_top, crop_right, crop_bottom) != (0, 0, layer.width, layer.height):
+        layer = layer.crop((crop_left, crop_top, crop_right, crop_bottom))
+    dest = (x + crop_left, y + crop_top)
+
+    if canvas.mode == 'RGBA':
+        canvas.alpha_composite(layer, dest)
+    else:
+        canvas.paste(layer, dest, layer)
+
+
+def draw_text_fields(canvas, fields):
+    """Composite (field, text) pairs; centered fields are centered on the canvas width."""
+    center_x = canvas.width // 2
+    for field, text in fields:
+        font, lines = fit_text(field, text)
+        if font != field.font:
+            field = replace(field, font=font)
+        line_height = int(font.size * field.line_spacing)
+
+        for index, line in enumerate(lines):
+            if field.centered:
+                x_pos = center_x - (text_width(font, line) // 2)
+            else:
+                x_pos = field.x
+            layer = get_text_layer(field, line)
+            composite_layer(canvas, layer.image, x_pos + layer.offset_x, field.y + index * line_height + layer.offset_y)
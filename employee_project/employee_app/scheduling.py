@@ -0,0 +1,200 @@
+"""
+Fair dispatch of image generation tasks across employees.
+
+Image tasks are not sent to Celery directly. Each one is parked in a Redis
+list per tenant (an employee, or an RBM region with
+IMAGE_FAIR_SCHEDULING_KEY = 'rbm_region'), and tenants with pending work take
+turns in a ring. At most IMAGE_FAIR_MAX_IN_FLIGHT tasks are handed to Celery
+at a time; whenever one finishes, the next tenant in the ring gets to send
+one. A large batch from one employee therefore waits behind everyone else's
+single images instead of in front of them. Each tenant has two FIFO lanes:
+interactive requests are taken before batch chunks.
+
+Task ids are allocated at submission, so callers can poll them before the
+task reaches Celery (it reads as PENDING meanwhile). When Redis cannot be
+reached, tasks run eagerly, or IMAGE_FAIR_SCHEDULING is off, tasks are sent
+straight to Celery.
+"""
+import json
+import logging
+import time
+import uuid
+
+import redis
+from celery import current_app
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'image-fair-queue'
+RING_KEY = f'{KEY_PREFIX}:ring'
+MEMBERS_KEY = f'{KEY_PREFIX}:members'
+IN_FLIGHT_KEY = f'{KEY_PREFIX}:in-flight'
+INTERACTIVE_KEY_PREFIX = f'{KEY_PREFIX}:interactive:'
+BATCH_KEY_PREFIX = f'{KEY_PREFIX}:batch:'
+
+# Tasks that go through the fair queue; their completion frees a slot
+FAIR_TASKS = ('employee_app.tasks.generate_image_async', 'employee_app.tasks.generate_images_batch')
+
+# KEYS: lane list, ring, members; ARGV: job, 'back' (or 'front' to requeue), tenant
+_ENQUEUE = """
+if ARGV[2] == 'front' then
+    redis.call('LPUSH', KEYS[1], ARGV[1])
+else
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+end
+if redis.call('SADD', KEYS[3], ARGV[3]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[3])
+end
+return redis.call('LLEN', KEYS[1])
+"""
+
+# KEYS: ring, members, in-flight; ARGV: interactive prefix, batch prefix, limit, now, stale before
+_TAKE_NEXT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[3], '-inf', ARGV[5])
+if redis.call('ZCARD', KEYS[3]) >= tonumber(ARGV[3]) then
+    return nil
+end
+local tenants = redis.call('LLEN', KEYS[1])
+for i = 1, tenants do
+    local tenant = redis.call('RPOPLPUSH', KEYS[1], KEYS[1])
+    local job = redis.call('LPOP', ARGV[1] .. tenant)
+    if not job then
+        job = redis.call('LPOP', ARGV[2] .. tenant)
+    end
+    if job then
+        redis.call('ZADD', KEYS[3], ARGV[4], cjson.decode(job)['task_id'])
+        return job
+    end
+    redis.call('LREM', KEYS[1], 0, tenant)
+    redis.call('SREM', KEYS[2], tenant)
+end
+return nil
+"""
+
+_client = None
+
+
+def redis_url():
+    return getattr(settings, 'IMAGE_FAIR_QUEUE_REDIS_URL', None) or settings.CELERY_BROKER_URL
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(redis_url(), socket_timeout=2, decode_responses=True)
+    return _client
+
+
+def fair_scheduling_enabled():
+    return getattr(settings, 'IMAGE_FAIR_SCHEDULING', False) and not getattr(settings, 'CELERY_TASK_ALWAYS_EAGER', False)
+
+
+def tenant_key(employee_id):
+    """Scheduling tenant of the employee who submitted the work"""
+    if getattr(settings, 'IMAGE_FAIR_SCHEDULING_KEY', 'employee') == 'rbm_region' and employee_id:
+        from .models import Employee
+
+        region = Employee.objects.filter(employee_id=employee_id).values_list('rbm_region', flat=True).first()
+        if region:
+            return f"region:{region}"
+    return f"employee:{employee_id or 'anonymous'}"
+
+
+def _lane_key(tenant, interactive):
+    return f"{INTERACTIVE_KEY_PREFIX if interactive else BATCH_KEY_PREFIX}{tenant}"
+
+
+def _in_flight_limit():
+    return settings.IMAGE_FAIR_MAX_IN_FLIGHT
+
+
+def submit(task, tenant, kwargs, interactive=True, task_id=None):
+    """Queue ``task`` with ``kwargs`` for ``tenant`` -> task id (``task_id`` when given, else a new one)"""
+    task_id = task_id or str(uuid.uuid4())
+    kwargs = dict(kwargs, enqueued_at=time.time())
+    if not fair_scheduling_enabled():
+        task.apply_async(kwargs=kwargs, task_id=task_id)
+        return task_id
+
+    job = json.dumps({
+        'task': task.name, 'task_id': task_id, 'tenant': tenant, 'interactive': interactive, 'kwargs': kwargs,
+    })
+    try:
+        get_redis().eval(_ENQUEUE, 3, _lane_key(tenant, interactive), RING_KEY, MEMBERS_KEY, job, 'back', tenant)
+    except redis.RedisError as e:
+        logger.warning(f"Fair queue unavailable, sending task {task_id} directly: {e}")
+        task.apply_async(kwargs=kwargs, task_id=task_id)
+        return task_id
+
+    dispatch()
+    return task_id
+
+
+def dispatch():
+    """Send queued tasks to Celery, one tenant at a time, while in-flight slots are free -> count sent"""
+    if not fair_scheduling_enabled():
+        return 0
+    client = get_redis()
+    now = time.time()
+    # Slots of tasks lost without finishing are reclaimed after the hard time limit
+    stale_before = now - getattr(settings, 'CELERY_TASK_TIME_LIMIT', 600) * 2
+    sent = 0
+    while True:
+        try:
+            job = client.eval(
+                _TAKE_NEXT, 3, RING_KEY, MEMBERS_KEY, IN_FLIGHT_KEY,
+                INTERACTIVE_KEY_PREFIX, BATCH_KEY_PREFIX, _in_flight_limit(), now, stale_before,
+            )
+        except redis.RedisError as e:
+            logger.warning(f"Fair queue dispatch failed: {e}")
+            return sent
+        if job is None:
+            return sent
+
+        job = json.loads(job)
+        try:
+            current_app.send_task(job['task'], kwargs=job['kwargs'], task_id=job['task_id'])
+            sent += 1
+        except Exception as e:
+            logger.error(f"Could not send queued task {job['task_id']}, requeueing it: {e}")
+            client.zrem(IN_FLIGHT_KEY, job['task_id'])
+            # Back to the head of its lane, where it was taken from
+            client.eval(
+                _ENQUEUE, 3, _lane_key(job['tenant'], job['interactive']), RING_KEY, MEMBERS_KEY,
+                json.dumps(job), 'front', job['tenant'],
+            )
+            return sent
+
+
+def task_finished(task_id):
+    """Free the slot of a fair-queued task and let the next tenant send one"""
+    try:
+        if get_redis().zrem(IN_FLIGHT_KEY, task_id):
+            dispatch()
+    except redis.RedisError as e:
+        logger.warning(f"Fair queue release failed for task {task_id}: {e}")
+
+
+def _pending_images(job):
+    kwargs = json.loads(job)['kwargs']
+    return len(kwargs.get('doctor_ids') or []) or 1
+
+
+def queue_depths(tenant=None):
+    """{'in_flight', 'limit', 'tenants': [{'tenant', 'pending_tasks', 'pending_interactive_tasks', 'pending_images'}]}"""
+    client = get_redis()
+    tenants = [tenant] if tenant else sorted(client.smembers(MEMBERS_KEY))
+    depths = []
+    for name in tenants:
+        interactive = client.lrange(_lane_key(name, True), 0, -1)
+        jobs = interactive + client.lrange(_lane_key(name, False), 0, -1)
+        if jobs or tenant:
+            depths.append({
+                'tenant': name,
+                'pending_tasks': len(jobs),
+                'pending_interactive_tasks': len(interactive),
+                'pending_images': sum(_pending_images(job) for job in jobs),
+            })
+    depths.sort(key=lambda depth: depth['pending_images'], reverse=True)
+    return {'in_flight': client.zcard(IN_FLIGHT_KEY), 'limit': _in_flight_limit(), 'tenants': depths}
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import Employee,DoctorVideo,VideoTemplates,ImageContent,Brand
+from django.core.exceptions import ValidationError as DjangoValidationError
+from .rendering import normalize_photo, output_profiles
 
 
 
@@ -21,6 +23,16 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return None
     
 
+def normalized_photo(value):
+    """Store an upright, pixel-capped working copy instead of the raw upload"""
+    if not value:
+        return value
+    try:
+        return normalize_photo(value)
+    except DjangoValidationError as e:
+        raise serializers.ValidationError(e.messages)
+
+
 class DoctorSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(required=False, allow_null=True)  # Handle image field if null
    
@@ -28,6 +40,9 @@ class DoctorSerializer(serializers.ModelSerializer):
         model = DoctorVideo
         fields = ['id', 'name', 'designation', 'clinic', 'city', 'state', 'image', 'specialization', 'mobile_number', 'whatsapp_number', 'description', 'output_video', 'employee']
 
+    def validate_image(self, value):
+        return normalized_photo(value)
+
 
 
 
@@ -49,6 +64,9 @@ class DoctorVideoSerializer(serializers.ModelSerializer):
             'employee_name', 'rbm_name',
         ]
 
+    def validate_image(self, value):
+        return normalized_photo(value)
+
     def get_latest_output_video(self, obj):
         []
 
@@ -108,13 +126,16 @@ class ImageContentSerializer(serializers.ModelSerializer):
     doctor_clinic = serializers.SerializerMethodField()
     template_name = serializers.SerializerMethodField()
     output_image_url = serializers.SerializerMethodField()
+    share_image_url = serializers.SerializerMethodField()
+    thumbnail_image_url = serializers.SerializerMethodField()
     
     class Meta:
         model = ImageContent
         fields = [
             'id', 'template', 'doctor', 'content_data', 
             'output_image', 'created_at', 'doctor_name', 
-            'doctor_clinic', 'template_name', 'output_image_url'
+            'doctor_clinic', 'template_name', 'output_image_url',
+            'share_image_url', 'thumbnail_image_url'
         ]
         read_only_fields = ['id', 'created_at', 'output_image']
     
@@ -127,14 +148,24 @@ class ImageContentSerializer(serializers.ModelSerializer):
     def get_template_name(self, obj):
         return obj.template.name
     
-    def get_output_image_url(self, obj):
-        if obj.output_image:
+    def file_url(self, field_file):
+        if field_file:
             request = self.context.get('request')
             if request:
-                return request.build_absolute_uri(obj.output_image.url)
-            return obj.output_image.url
+                return request.build_absolute_uri(field_file.url)
+            return field_file.url
         return None
 
+    def get_output_image_url(self, obj):
+        return self.file_url(obj.output_image)
+
+    # Images generated before variants existed fall back to the full output
+    def get_share_image_url(self, obj):
+        return self.file_url(obj.share_image or obj.output_image)
+
+    def get_thumbnail_image_url(self, obj):
+        return self.file_url(obj.thumbnail_image or obj.output_image)
+
 
 class ImageTemplateSerializer(serializers.ModelSerializer):
     template_image_url = serializers.SerializerMethodField()
@@ -143,7 +174,7 @@ class ImageTemplateSerializer(serializers.ModelSerializer):
         model = VideoTemplates
         fields = [
             'id', 'name', 'template_image', 'text_positions', 
-            'custom_text', 'brand_area_settings', 'status', 'created_at', 'template_image_url'
+            'custom_text', 'brand_area_settings', 'output_profile', 'status', 'created_at', 'template_image_url'
         ]
         extra_kwargs = {
             'template_type': {'default': 'image'}
@@ -157,6 +188,11 @@ class ImageTemplateSerializer(serializers.ModelSerializer):
             return obj.template_image.url
         return None
     
+    def validate_output_profile(self, value):
+        if value and value not in output_profiles():
+            raise serializers.ValidationError(f"Unknown output profile. Choose from: {', '.join(output_profiles())}")
+        return value
+
     def validate(self, data):
         # Ensure this is an image template
         data['template_type'] = 'image'
@@ -0,0 +1,98 @@
+import logging
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Brand, VideoTemplates
+
+logger = logging.getLogger(__name__)
+
+# Fields whose change makes cached render artifacts stale
+BRAND_RENDER_FIELDS = ('brand_image',)
+TEMPLATE_RENDER_FIELDS = ('template_type', 'template_image', 'text_positions', 'custom_text', 'brand_area_settings')
+
+
+def _changed_fields(sender, instance, fields):
+    """Those of ``fields`` that differ from the stored row (all of them for a new row)"""
+    if instance.pk is None:
+        return set(fields)
+    stored = sender.objects.filter(pk=instance.pk).values(*fields).first()
+    if stored is None:
+        return set(fields)
+    # FieldFile compares equal to its stored name
+    return {field for field in fields if getattr(instance, field) != stored[field]}
+
+
+def _queue_after_commit(task, **kwargs):
+    """Send ``task`` once the save commits; a broker outage must not fail a save that succeeded"""
+    def send():
+        try:
+            task.delay(**kwargs)
+        except Exception as e:
+            logger.warning(f"Could not queue {task.name} with {kwargs}: {e}")
+
+    transaction.on_commit(send)
+
+
+@receiver(pre_save, sender=Brand)
+def note_brand_changes(sender, instance, **kwargs):
+    instance._render_changes = _changed_fields(sender, instance, BRAND_RENDER_FIELDS)
+
+
+@receiver(post_save, sender=Brand)
+def prescale_saved_brand(sender, instance, **kwargs):
+    """Build the slot-sized logo variants of a new brand or a replaced logo"""
+    if 'brand_image' not in getattr(instance, '_render_changes', BRAND_RENDER_FIELDS):
+        return
+    from .tasks import prescale_brand_logos
+
+    _queue_after_commit(prescale_brand_logos, brand_ids=[instance.pk])
+
+
+@receiver(post_delete, sender=Brand)
+def discard_deleted_brand(sender, instance, **kwargs):
+    from .rendering import discard_brand
+
+    discard_brand(instance.pk)
+
+
+@receiver(pre_save, sender=VideoTemplates)
+def note_template_changes(sender, instance, **kwargs):
+    instance._render_changes = _changed_fields(sender, instance, TEMPLATE_RENDER_FIELDS)
+
+
+@receiver(post_save, sender=VideoTemplates)
+def prescale_template_brands(sender, instance, **kwargs):
+    """A template's brand area may introduce new slot sizes"""
+    if instance.template_type != 'image' or not instance.brand_area_settings:
+        return
+    if not instance.brand_area_settings.get('enabled', False):
+        return
+    if not {'template_type', 'brand_area_settings'} & getattr(instance, '_render_changes', set(TEMPLATE_RENDER_FIELDS)):
+        return
+    from .tasks import prescale_brand_logos
+
+    _queue_after_commit(prescale_brand_logos, template_id=instance.pk)
+
+
+@receiver(post_save, sender=VideoTemplates)
+def rebuild_template_base(sender, instance, **kwargs):
+    """Static text is flattened into the template's base layer, which must follow the image and text settings"""
+    if instance.template_type != 'image':
+        return
+    changes = getattr(instance, '_render_changes', set(TEMPLATE_RENDER_FIELDS))
+    if not changes & {'template_type', 'template_image', 'text_positions', 'custom_text'}:
+        return
+    from .tasks import build_template_base
+
+    _queue_after_commit(build_template_base, template_id=instance.pk)
+
+
+@receiver(post_delete, sender=VideoTemplates)
+def discard_deleted_template_base(sender, instance, **kwargs):
+    if instance.template_type != 'image':
+        return
+    from .rendering import discard_template_bases
+
+    discard_template_bases(instance.pk)
@@ -118,6 +118,16 @@ class ConcurrentImageTester:
         except Exception as e:
             return {"status": "error", "error": str(e)}
 
+    async def check_tasks_completion(self, session: aiohttp.ClientSession, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Check many tasks in one request"""
+        try:
+            async with session.post(f"{self.base_url}/api/task-status/bulk/", json={"task_ids": task_ids}) as response:
+                if response.status == 200:
+                    return (await response.json())["tasks"]
+                return {task_id: {"status": "error", "error": f"HTTP {response.status}"} for task_id in task_ids}
+        except Exception as e:
+            return {task_id: {"status": "error", "error": str(e)} for task_id in task_ids}
+
     async def run_concurrent_test(self, num_requests: int = 100, concurrent_limit: int = 20):
         """Run concurrent image generation test"""
         print(f"Starting concurrent test: {num_requests} requests, {concurrent_limit} concurrent")
@@ -180,9 +190,10 @@ class ConcurrentImageTester:
         async with aiohttp.ClientSession() as session:
             while task_ids and (time.time() - start_monitoring) < timeout:
                 remaining_tasks = []
+                statuses = await self.check_tasks_completion(session, task_ids)
                 
                 for task_id in task_ids:
-                    status_data = await self.check_task_completion(session, task_id)
+                    status_data = statuses.get(task_id, {})
                     
                     if status_data.get("status") == "completed":
                         completed_tasks.append(task_id)
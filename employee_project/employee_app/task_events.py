@@ -0,0 +1,65 @@
+"""
+Completion events of image tasks.
+
+When an image task finishes, the worker publishes its final state on a Redis
+channel named after the task id, and keeps a copy under a short-lived key so
+a client that starts waiting just after the event still gets it. Web requests
+await the channel (``wait_for_task_event``) instead of the frontend polling
+the result backend; the wait is asynchronous so an ASGI worker serves other
+requests meanwhile.
+"""
+import json
+import time
+
+import redis.asyncio as aioredis
+from celery import states
+
+from .scheduling import get_redis, redis_url
+
+CHANNEL_PREFIX = 'image-task-done:'
+# Long enough to outlive any client's gap between its last poll and its next wait
+EVENT_TTL = 600
+
+
+def _channel(task_id):
+    return f'{CHANNEL_PREFIX}{task_id}'
+
+
+def publish_task_event(task_id, state, retval):
+    """Announce the final ``state`` (SUCCESS or FAILURE) of a task with its return value or exception"""
+    if state == states.SUCCESS:
+        event = {'status': 'completed', 'result': retval}
+    else:
+        event = {'status': 'failed', 'error': str(retval)}
+    payload = json.dumps(event, default=str)
+
+    client = get_redis()
+    pipe = client.pipeline()
+    pipe.set(_channel(task_id), payload, ex=EVENT_TTL)
+    pipe.publish(_channel(task_id), payload)
+    pipe.execute()
+
+
+async def wait_for_task_event(task_id, timeout):
+    """Wait until the task's completion event arrives -> event dict, or None after ``timeout`` seconds"""
+    # A client per wait: views run on whichever event loop serves the request
+    client = aioredis.Redis.from_url(redis_url(), socket_connect_timeout=2, decode_responses=True)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(_channel(task_id))
+        # Subscribed first, so an event published from here on cannot be missed
+        stored = await client.get(_channel(task_id))
+        if stored:
+            return json.loads(stored)
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            message = await pubsub.get_message(timeout=remaining)
+            if message and message['type'] == 'message':
+                return json.loads(message['data'])
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
@@ -1,3 +1,781 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import time
+import unittest
+import uuid
+from dataclasses import replace
+from datetime import timedelta
+from io import BytesIO
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import redis
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from . import scheduling, task_events
+from .models import Brand, DoctorVideo, Employee, RenderJob, VideoTemplates
+from .rendering import (
+    BrandAsset, RenderPlan, RenderSpec, build_render_spec, compute_render_key, encode_image, fit_text,
+    get_output_profile, grid_rows, normalize_photo, output_variants, render_bitmap, render_outputs, solve_layout,
+    text_width,
+)
+from .rendering.benchmark import clear_render_caches
+from .rendering.bitmaps import template_canvases
+from .rendering.plans import (
+    FontSpec, TextFieldPlan, compile_brand_area, compile_image_settings, compile_render_plan, get_render_plan,
+    template_version,
+)
+from .views import claim_render_jobs
+
+# Flushed by the tests: point it at a database nothing else uses
+TEST_REDIS_URL = os.getenv('TEST_REDIS_URL', 'redis://localhost:6379/15')
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(TEST_REDIS_URL, socket_timeout=1).ping()
+    except redis.RedisError:
+        return False
+
+
+@unittest.skipUnless(redis_available(), f"needs a Redis server at {TEST_REDIS_URL}")
+@override_settings(
+    IMAGE_FAIR_SCHEDULING=True, IMAGE_FAIR_QUEUE_REDIS_URL=TEST_REDIS_URL,
+    IMAGE_FAIR_MAX_IN_FLIGHT=1, CELERY_TASK_ALWAYS_EAGER=False,
+)
+class FairSchedulingTests(SimpleTestCase):
+    """The Lua enqueue/take scripts against a real Redis; Celery itself is replaced by a recorder"""
+
+    task = SimpleNamespace(name='employee_app.tasks.generate_image_async')
+
+    def setUp(self):
+        scheduling._client = None
+        scheduling.get_redis().flushdb()
+        self.sent = []
+        patcher = mock.patch.object(
+            scheduling.current_app, 'send_task',
+            side_effect=lambda name, kwargs, task_id: self.sent.append(kwargs['label']),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.task_ids = {}
+
+    def tearDown(self):
+        scheduling.get_redis().flushdb()
+        scheduling._client = None
+
+    def submit(self, label, tenant, interactive=True):
+        self.task_ids[label] = scheduling.submit(self.task, tenant, {'label': label}, interactive=interactive)
+
+    def finish_all(self):
+        """Complete whatever is in flight until the queue is empty"""
+        finished = 0
+        while finished < len(self.sent):
+            scheduling.task_finished(self.task_ids[self.sent[finished]])
+            finished += 1
+
+    def test_tenants_take_turns(self):
+        for label in ('a1', 'a2', 'a3'):
+            self.submit(label, 'employee:A')
+        self.submit('b1', 'employee:B')
+        self.finish_all()
+        self.assertEqual(self.sent, ['a1', 'b1', 'a2', 'a3'])
+
+    def test_interactive_requests_run_in_submission_order(self):
+        for label in ('a1', 'a2', 'a3', 'a4'):
+            self.submit(label, 'employee:A')
+        self.finish_all()
+        self.assertEqual(self.sent, ['a1', 'a2', 'a3', 'a4'])
+
+    def test_interactive_lane_goes_before_batches(self):
+        self.submit('batch1', 'employee:A', interactive=False)
+        self.submit('batch2', 'employee:A', interactive=False)
+        self.submit('single', 'employee:A')
+        self.finish_all()
+        self.assertEqual(self.sent, ['batch1', 'single', 'batch2'])
+
+    def test_in_flight_limit_holds_tasks_back(self):
+        self.submit('a1', 'employee:A')
+        self.submit('b1', 'employee:B')
+        self.assertEqual(self.sent, ['a1'])
+        depths = scheduling.queue_depths()
+        self.assertEqual(depths['in_flight'], 1)
+        self.assertEqual([tenant['tenant'] for tenant in depths['tenants']], ['employee:B'])
+
+
+class DispatchDisabledTests(SimpleTestCase):
+
+    @override_settings(IMAGE_FAIR_SCHEDULING=False)
+    def test_dispatch_leaves_redis_alone_when_fair_scheduling_is_off(self):
+        with mock.patch.object(scheduling, 'get_redis') as get_redis:
+            self.assertEqual(scheduling.dispatch(), 0)
+        get_redis.assert_not_called()
+
+
+def grid(columns, rows, width=240, height=120, gap_x=40, gap_y=30):
+    """Brand area slots of a regular grid, row by row"""
+    return [
+        {'x': col * (width + gap_x), 'y': row * (height + gap_y), 'width': width, 'height': height}
+        for row in range(rows) for col in range(columns)
+    ]
+
+
+class BrandLayoutTests(SimpleTestCase):
+
+    def test_rows_group_slots_by_vertical_center(self):
+        slots = grid(3, 2)
+        # A few pixels off still belongs to its row
+        slots[1] = dict(slots[1], y=8)
+        rows = grid_rows(slots)
+        self.assertEqual([len(row) for row in rows], [3, 3])
+        self.assertEqual([slot['x'] for slot in rows[0]], [0, 280, 560])
+
+    def test_shuffled_slots_give_the_same_rows(self):
+        slots = grid(3, 2)
+        shuffled = [slots[i] for i in (4, 0, 5, 2, 3, 1)]
+        self.assertEqual(grid_rows(shuffled), grid_rows(slots))
+        self.assertEqual(compile_brand_area({'enabled': True, 'slots': shuffled}).layouts,
+                         compile_brand_area({'enabled': True, 'slots': slots}).layouts)
+
+    def test_full_rows_fill_first(self):
+        layout = solve_layout(grid_rows(grid(3, 2)), 3)
+        self.assertEqual([(slot['x'], slot['y']) for slot in layout], [(0, 0), (280, 0), (560, 0)])
+
+    def test_partial_last_row_is_centered(self):
+        rows = grid_rows(grid(3, 2))
+        self.assertEqual([slot['x'] for slot in solve_layout(rows, 4)[3:]], [280])
+        self.assertEqual([slot['x'] for slot in solve_layout(rows, 5)[3:]], [140, 420])
+        self.assertEqual({slot['y'] for slot in solve_layout(rows, 5)[3:]}, {150})
+
+    def test_more_brands_than_slots_uses_every_slot(self):
+        self.assertEqual(solve_layout(grid_rows(grid(2, 2)), 6), grid(2, 2))
+
+
+LONG_NAME = 'Dr. Venkatasubramanian Raghunathan Iyer'
+
+
+def text_field(**autofit):
+    return TextFieldPlan(
+        name='name', x=0, y=0, centered=True, font=FontSpec('Dancing Script', 56), color='black',
+        shadow=None, synthetic_italic=False, **autofit,
+    )
+
+
+class FitTextTests(SimpleTestCase):
+
+    def test_fields_without_max_width_are_unchanged(self):
+        field = text_field()
+        self.assertEqual(fit_text(field, LONG_NAME), (field.font, [LONG_NAME]))
+
+    def test_short_text_keeps_its_size(self):
+        font, lines = fit_text(text_field(max_width=1000, min_font_size=20), 'Dr. Iyer')
+        self.assertEqual((font.size, lines), (56, ['Dr. Iyer']))
+
+    def test_long_text_shrinks_to_fit(self):
+        field = text_field(max_width=560, min_font_size=20)
+        font, lines = fit_text(field, LONG_NAME)
+        self.assertLess(font.size, 56)
+        self.assertEqual(lines, [LONG_NAME])
+        self.assertLessEqual(text_width(font, LONG_NAME), 560)
+        # The largest size that fits is chosen
+        self.assertGreater(text_width(replace(font, size=font.size + 2), LONG_NAME), 560)
+
+    def test_wrapping_keeps_a_larger_size(self):
+        unwrapped, _ = fit_text(text_field(max_width=560, min_font_size=20), LONG_NAME)
+        font, lines = fit_text(text_field(max_width=560, min_font_size=20, wrap=True, max_lines=2), LONG_NAME)
+        self.assertGreater(font.size, unwrapped.size)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(' '.join(lines), LONG_NAME)
+        self.assertTrue(all(text_width(font, line) <= 560 for line in lines))
+
+    def test_max_lines_is_respected(self):
+        field = text_field(max_width=200, min_font_size=10, wrap=True, max_lines=3)
+        font, lines = fit_text(field, LONG_NAME)
+        self.assertLessEqual(len(lines), 3)
+        self.assertEqual(' '.join(lines), LONG_NAME)
+
+    def test_size_never_goes_below_the_minimum(self):
+        font, lines = fit_text(text_field(max_width=60, min_font_size=24), LONG_NAME)
+        self.assertEqual(font.size, 24)
+        self.assertEqual(lines, [LONG_NAME])
+
+    def test_overflowing_lines_fold_into_the_last_one(self):
+        field = text_field(max_width=60, min_font_size=24, wrap=True, max_lines=2)
+        font, lines = fit_text(field, LONG_NAME)
+        self.assertEqual(font.size, 24)
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(' '.join(lines), LONG_NAME)
+
+
+def new_jobs(count=1, kind='single'):
+    return [RenderJob(job_id=str(uuid.uuid4()), kind=kind, employee_id='E1') for _ in range(count)]
+
+
+class ClaimRenderJobsTests(TestCase):
+
+    def test_first_request_saves_its_jobs(self):
+        jobs, created = claim_render_jobs('abc', new_jobs(2, kind='batch'))
+        self.assertTrue(created)
+        self.assertEqual([job.idempotency_key for job in jobs], ['abc:0', 'abc:1'])
+        self.assertEqual(RenderJob.objects.count(), 2)
+
+    def test_repeat_gets_the_earlier_jobs(self):
+        first, _ = claim_render_jobs('abc', new_jobs(2, kind='batch'))
+        again, created = claim_render_jobs('abc', new_jobs(2, kind='batch'))
+        self.assertFalse(created)
+        self.assertEqual([job.job_id for job in again], [job.job_id for job in first])
+        self.assertEqual(RenderJob.objects.count(), 2)
+
+    def test_keys_do_not_match_by_prefix_alone(self):
+        claim_render_jobs('abc', new_jobs())
+        _, created = claim_render_jobs('ab', new_jobs())
+        self.assertTrue(created)
+
+    def test_failed_jobs_give_the_key_up(self):
+        first, _ = claim_render_jobs('abc', new_jobs())
+        RenderJob.objects.filter(id=first[0].id).update(status='failed')
+        again, created = claim_render_jobs('abc', new_jobs())
+        self.assertTrue(created)
+        self.assertNotEqual(again[0].job_id, first[0].job_id)
+        self.assertIsNone(RenderJob.objects.get(id=first[0].id).idempotency_key)
+
+    def test_key_is_kept_while_any_job_has_not_failed(self):
+        first, _ = claim_render_jobs('abc', new_jobs(2, kind='batch'))
+        RenderJob.objects.filter(id=first[0].id).update(status='failed')
+        _, created = claim_render_jobs('abc', new_jobs(2, kind='batch'))
+        self.assertFalse(created)
+
+    def test_expired_jobs_give_the_key_up(self):
+        first, _ = claim_render_jobs('abc', new_jobs(), expires_after=60)
+        _, created = claim_render_jobs('abc', new_jobs(), expires_after=60)
+        self.assertFalse(created)
+
+        RenderJob.objects.filter(id=first[0].id).update(created_at=timezone.now() - timedelta(seconds=120))
+        _, created = claim_render_jobs('abc', new_jobs(), expires_after=60)
+        self.assertTrue(created)
+
+    def test_keys_without_expiry_never_expire(self):
+        first, _ = claim_render_jobs('abc', new_jobs())
+        RenderJob.objects.filter(id=first[0].id).update(created_at=timezone.now() - timedelta(days=30))
+        again, created = claim_render_jobs('abc', new_jobs())
+        self.assertFalse(created)
+        self.assertEqual(again[0].job_id, first[0].job_id)
+
+
+class RenderKeyTests(SimpleTestCase):
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.workdir = workdir.name
+        self.field = text_field()
+        self.plan = RenderPlan(
+            template_id=1, version='v1', template_path=self.file('template.png', b'template'),
+            text_fields=(self.field,), image_settings=None, brand_area=None,
+        )
+
+    def file(self, name, content):
+        path = os.path.join(self.workdir, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def spec(self, name='Dr. Iyer', brands=(), photo=None, plan=None):
+        return RenderSpec(
+            plan=plan or self.plan, texts=((self.field, name),), image_settings=None,
+            photo_path=photo, brands=tuple(brands),
+        )
+
+    def test_same_inputs_give_the_same_key(self):
+        photo = self.file('photo.jpg', b'photo')
+        brands = [BrandAsset(1, 'One', self.file('one.png', b'one')), BrandAsset(2, 'Two', None)]
+        self.assertEqual(compute_render_key(self.spec(brands=brands, photo=photo)),
+                         compute_render_key(self.spec(brands=list(brands), photo=photo)))
+
+    def test_files_are_keyed_by_content_not_path(self):
+        first = self.file('photo.jpg', b'photo')
+        copy = self.file('copy.jpg', b'photo')
+        self.assertEqual(compute_render_key(self.spec(photo=first)), compute_render_key(self.spec(photo=copy)))
+
+        self.file('photo.jpg', b'another photo')
+        self.assertNotEqual(compute_render_key(self.spec(photo=first)), compute_render_key(self.spec(photo=copy)))
+
+    def test_text_and_template_version_change_the_key(self):
+        key = compute_render_key(self.spec())
+        self.assertNotEqual(compute_render_key(self.spec(name='Dr. Rao')), key)
+        self.assertNotEqual(compute_render_key(self.spec(plan=replace(self.plan, version='v2'))), key)
+
+    def test_brand_order_changes_the_key(self):
+        one = BrandAsset(1, 'One', self.file('one.png', b'one'))
+        two = BrandAsset(2, 'Two', self.file('two.png', b'two'))
+        self.assertNotEqual(compute_render_key(self.spec(brands=[one, two])),
+                            compute_render_key(self.spec(brands=[two, one])))
+
+    def test_output_encoding_settings_change_the_key(self):
+        key = compute_render_key(self.spec())
+        with override_settings(IMAGE_OUTPUT_PROFILE='webp'):
+            self.assertNotEqual(compute_render_key(self.spec()), key)
+        with override_settings(IMAGE_OUTPUT_VARIANTS={'share': {'max_edge': 640}}):
+            self.assertNotEqual(compute_render_key(self.spec()), key)
+        with override_settings(IMAGE_OUTPUT_PROFILES={'jpeg': {'format': 'JPEG', 'quality': 60, 'lossy': True}}):
+            self.assertNotEqual(compute_render_key(self.spec()), key)
+        self.assertEqual(compute_render_key(self.spec()), key)
+
+
+def upload(image, name, image_format, **options):
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+def stored(photo):
+    image = Image.open(BytesIO(photo.read()))
+    image.load()
+    return image
+
+
+@override_settings(IMAGE_PHOTO_MAX_PIXELS=10_000)
+class NormalizePhotoTests(SimpleTestCase):
+
+    def test_jpeg_stays_jpeg(self):
+        photo = normalize_photo(upload(Image.new('RGB', (80, 60), 'red'), 'doctor.jpeg', 'JPEG'))
+        self.assertEqual(photo.name, 'doctor.jpg')
+        self.assertEqual(stored(photo).format, 'JPEG')
+
+    def test_large_photos_are_capped(self):
+        photo = stored(normalize_photo(upload(Image.new('RGB', (400, 300), 'red'), 'doctor.jpg', 'JPEG')))
+        self.assertLessEqual(photo.width * photo.height, 10_000)
+        self.assertAlmostEqual(photo.width / photo.height, 4 / 3, places=1)
+
+    def test_exif_rotation_is_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        photo = stored(normalize_photo(upload(Image.new('RGB', (80, 60), 'red'), 'doctor.jpg', 'JPEG', exif=exif)))
+        self.assertEqual(photo.size, (60, 80))
+
+    def test_cmyk_jpeg_is_stored_as_rgb_jpeg(self):
+        photo = normalize_photo(upload(Image.new('CMYK', (80, 60), (0, 255, 255, 0)), 'doctor.jpg', 'JPEG'))
+        image = stored(photo)
+        self.assertEqual((photo.name, image.format, image.mode), ('doctor.jpg', 'JPEG', 'RGB'))
+
+    def test_other_modes_are_stored_as_png(self):
+        cmyk = stored(normalize_photo(upload(Image.new('CMYK', (40, 40)), 'doctor.tif', 'TIFF')))
+        self.assertEqual((cmyk.format, cmyk.mode), ('PNG', 'RGB'))
+
+        palette = Image.new('P', (40, 40))
+        palette.info['transparency'] = 0
+        transparent = stored(normalize_photo(upload(palette, 'doctor.gif', 'GIF')))
+        self.assertEqual((transparent.format, transparent.mode), ('PNG', 'RGBA'))
+
+    def test_unreadable_files_are_rejected(self):
+        with self.assertRaises(ValidationError):
+            normalize_photo(SimpleUploadedFile('doctor.jpg', b'not an image'))
+
+
+def png_file(name, size=(400, 300), color='white', mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, color).save(buffer, 'PNG')
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+class RenderingTestCase(TestCase):
+    """Media, logo variants and template bases go to a scratch directory; render caches start empty"""
+
+    def setUp(self):
+        workdir = tempfile.TemporaryDirectory()
+        self.addCleanup(workdir.cleanup)
+        self.media_root = workdir.name
+        media = override_settings(
+            MEDIA_ROOT=self.media_root,
+            IMAGE_BRAND_CACHE_DIR=os.path.join(self.media_root, 'brand-cache'),
+            IMAGE_TEMPLATE_BASE_DIR=os.path.join(self.media_root, 'template-cache'),
+        )
+        media.enable()
+        self.addCleanup(media.disable)
+        clear_render_caches()
+        self.addCleanup(clear_render_caches)
+
+    def image_template(self, **fields):
+        fields.setdefault('text_positions', {'name': {'y': 40, 'fontSize': 30, 'fontFamily': 'Dancing Script'}})
+        return VideoTemplates.objects.create(
+            name='Test template', template_type='image', template_image=png_file('template.png'), **fields,
+        )
+
+    def employee(self, employee_id='E1', user_type='Employee'):
+        return Employee.objects.create(employee_id=employee_id, first_name=employee_id, user_type=user_type)
+
+    def brand(self, name='Brand', size=(200, 100)):
+        uploader = Employee.objects.filter(user_type='Admin').first() or self.employee('ADMIN', 'Admin')
+        return Brand.objects.create(name=name, brand_image=png_file(f'{name}.png', size, 'blue'), uploaded_by=uploader)
+
+    def doctor(self, employee=None, **fields):
+        return DoctorVideo.objects.create(
+            name='Dr. Test', designation='MD', clinic='Clinic', city='Pune', specialization='Cardiology',
+            mobile_number=str(9000000000 + DoctorVideo.objects.count()), whatsapp_number='', description='',
+            employee=employee, **fields,
+        )
+
+
+class PreviewImageTests(RenderingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.template = self.image_template(custom_text='Static', text_positions={
+            'name': {'y': 40, 'fontSize': 30, 'fontFamily': 'Dancing Script'},
+            'customText': {'x': 10, 'y': 10, 'fontSize': 20, 'fontFamily': 'Dancing Script'},
+        })
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create(username='E1'))
+        self.employee('E1')
+
+    def preview(self, **data):
+        return self.client.post('/api/preview-image/', dict(template_id=self.template.id, **data), format='json')
+
+    def test_requires_authentication(self):
+        response = APIClient().post('/api/preview-image/', {'template_id': self.template.id}, format='json')
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_renders_a_jpeg(self):
+        response = self.preview()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Image.open(BytesIO(response.content)).format, 'JPEG')
+
+    def test_only_own_doctors_even_when_claiming_admin(self):
+        doctor = self.doctor(self.employee('E2'))
+        response = self.preview(doctor_id=doctor.id, employee_id='E2', user_type='Admin')
+        self.assertEqual(response.status_code, 403)
+
+    def test_oversized_settings_are_rejected(self):
+        too_large = [
+            {'text_positions': {'name': {'y': 40, 'fontSize': 5000}}},
+            {'brand_area_settings': {'enabled': True, 'slots': [{'x': 0, 'y': 0, 'width': 9000, 'height': 50}]}},
+            {'brand_area_settings': {'enabled': True, 'slots': [{'x': 0, 'y': 0, 'width': 10, 'height': 10}] * 100}},
+            {'content_data': {'imageSettings': {'enabled': True, 'width': 400, 'height': 9000}}},
+        ]
+        for data in too_large:
+            with self.subTest(data=data):
+                self.assertEqual(self.preview(**data).status_code, 400)
+
+    def test_edited_settings_leave_shared_caches_and_disk_alone(self):
+        brand = self.brand()
+        self.assertEqual(self.preview().status_code, 200)
+        bases = [key for key in template_canvases._items if key[0] == 'base']
+
+        response = self.preview(selected_brands=[brand.id], brand_area_settings={
+            'enabled': True, 'x': 0, 'y': 200, 'slots': [{'x': 10, 'y': 0, 'width': 120, 'height': 60}],
+        }, custom_text='Edited')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([key for key in template_canvases._items if key[0] == 'base'], bases)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'brand-cache')))
+
+
+class MalformedBrandAreaTests(RenderingTestCase):
+
+    def test_invalid_slots_are_dropped(self):
+        area = compile_brand_area({'enabled': True, 'x': 10, 'y': 20, 'slots': [
+            {'x': 0, 'y': 0, 'width': 100},
+            {'x': '50px', 'y': 0, 'width': 100, 'height': 50},
+            {'x': 0, 'y': 0, 'width': 0, 'height': 50},
+            'slot',
+            {'x': 120, 'y': 0, 'width': 100, 'height': 50},
+        ]})
+        self.assertEqual([(slot.x, slot.y) for slot in area.slots], [(130, 20)])
+
+    def test_unusable_brand_areas_are_ignored(self):
+        for area_settings in ([1, 2], {'enabled': True, 'slots': 'none'}, {'enabled': True, 'slots': [{'x': 0}]}):
+            with self.subTest(area_settings=area_settings):
+                self.assertIsNone(compile_brand_area(area_settings))
+
+    def test_bad_area_position_falls_back_to_the_default(self):
+        area = compile_brand_area({'enabled': True, 'x': 'left', 'slots': [{'x': 0, 'y': 0, 'width': 10, 'height': 10}]})
+        self.assertEqual((area.slots[0].x, area.slots[0].y), (50, 400))
+
+    def test_template_still_renders(self):
+        template = self.image_template(brand_area_settings={'enabled': True, 'slots': [{'x': 0, 'y': 0, 'width': 100}]})
+        plan = compile_render_plan(template)
+        self.assertIsNone(plan.brand_area)
+        image = render_bitmap(build_render_spec(plan, self.doctor(), {}, []))
+        self.assertEqual(image.size, (400, 300))
+
+
+class TaskWaitTests(TestCase):
+
+    def wait(self, task_id, timeout=0.2):
+        return self.client.get(f'/api/task-status/{task_id}/wait/', {'timeout': timeout})
+
+    def job(self, **fields):
+        return RenderJob.objects.create(job_id=str(uuid.uuid4()), employee_id='E1', **fields)
+
+    @override_settings(IMAGE_FAIR_QUEUE_REDIS_URL='redis://127.0.0.1:1/0')
+    def test_finished_job_answers_at_once(self):
+        job = self.job(status='failed', error='boom')
+        response = self.wait(job.job_id, timeout=30)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['status'], response.json()['error']), ('failed', 'boom'))
+
+    @override_settings(IMAGE_FAIR_QUEUE_REDIS_URL='redis://127.0.0.1:1/0')
+    def test_without_redis_it_answers_like_the_status_endpoint(self):
+        job = self.job()
+        started = time.monotonic()
+        payload = self.wait(job.job_id, timeout=30).json()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertEqual((payload['status'], payload['job']['state']), ('processing', 'pending'))
+
+    def test_bad_timeout(self):
+        self.assertEqual(self.wait('some-task', timeout='soon').status_code, 400)
+
+
+@unittest.skipUnless(redis_available(), f"needs a Redis server at {TEST_REDIS_URL}")
+@override_settings(IMAGE_FAIR_QUEUE_REDIS_URL=TEST_REDIS_URL)
+class TaskWaitEventTests(TestCase):
+
+    def setUp(self):
+        scheduling._client = None
+        self.addCleanup(setattr, scheduling, '_client', None)
+        self.task_id = str(uuid.uuid4())
+
+    def wait(self, timeout):
+        started = time.monotonic()
+        response = self.client.get(f'/api/task-status/{self.task_id}/wait/', {'timeout': timeout})
+        return response.json(), time.monotonic() - started
+
+    def test_returns_when_the_event_arrives(self):
+        publisher = threading.Timer(
+            0.3, task_events.publish_task_event, (self.task_id, 'SUCCESS', {'image_url': 'x.png'}),
+        )
+        publisher.start()
+        self.addCleanup(publisher.cancel)
+        payload, elapsed = self.wait(timeout=4)
+        self.assertEqual(payload, {'status': 'completed', 'result': {'image_url': 'x.png'}})
+        self.assertLess(elapsed, 3)
+
+    def test_event_published_before_the_wait_is_not_missed(self):
+        task_events.publish_task_event(self.task_id, 'FAILURE', ValueError('bad template'))
+        payload, _ = self.wait(timeout=4)
+        self.assertEqual(payload, {'status': 'failed', 'error': 'bad template'})
+
+    @override_settings(IMAGE_TASK_WAIT_WSGI_MAX_TIMEOUT=0.3)
+    def test_wsgi_waits_are_capped(self):
+        payload, elapsed = self.wait(timeout=50)
+        self.assertEqual(payload, {'status': 'processing'})
+        self.assertLess(elapsed, 3)
+
+    @override_settings(IMAGE_TASK_WAIT_WSGI_MAX_TIMEOUT=0.1)
+    async def test_asgi_waits_use_the_full_timeout(self):
+        started = time.monotonic()
+        response = await self.async_client.get(f'/api/task-status/{self.task_id}/wait/', {'timeout': 1})
+        self.assertEqual(response.json(), {'status': 'processing'})
+        self.assertGreaterEqual(time.monotonic() - started, 0.9)
+
+
+class BulkTaskStatusTests(TestCase):
+
+    def statuses(self, task_ids, metas=None, **patch):
+        patch.setdefault('return_value', metas or {})
+        with mock.patch('employee_app.views.read_task_metas', **patch) as read_metas:
+            response = self.client.post('/api/task-status/bulk/', {'task_ids': task_ids}, content_type='application/json')
+        return response, read_metas
+
+    def test_jobs_are_answered_from_their_rows(self):
+        job = RenderJob.objects.create(job_id=str(uuid.uuid4()), employee_id='E1', status='failed', error='boom')
+        response, read_metas = self.statuses([job.job_id])
+        self.assertEqual(response.status_code, 200)
+        payload = response.json()['tasks'][job.job_id]
+        self.assertEqual((payload['status'], payload['error'], payload['job']['state']), ('failed', 'boom', 'failed'))
+        read_metas.assert_not_called()
+
+    def test_tasks_without_a_job_use_the_result_backend(self):
+        response, read_metas = self.statuses(['ok', 'bad', 'queued', 'missing', 'ok'], {
+            'ok': {'status': 'SUCCESS', 'result': {'image_url': 'x.png'}},
+            'bad': {'status': 'FAILURE', 'result': 'bad template'},
+            'queued': {'status': 'STARTED', 'result': None},
+        })
+        read_metas.assert_called_once_with(['ok', 'bad', 'queued', 'missing'])
+        self.assertEqual(response.json()['tasks'], {
+            'ok': {'status': 'completed', 'result': {'image_url': 'x.png'}},
+            'bad': {'status': 'failed', 'error': 'bad template'},
+            'queued': {'status': 'processing'},
+            'missing': {'status': 'processing'},
+        })
+
+    def test_backend_errors_only_affect_tasks_without_a_job(self):
+        job = RenderJob.objects.create(job_id=str(uuid.uuid4()), employee_id='E1')
+        response, _ = self.statuses([job.job_id, 'other'], side_effect=ConnectionError('backend down'))
+        tasks = response.json()['tasks']
+        self.assertEqual(tasks[job.job_id]['status'], 'processing')
+        self.assertEqual(tasks['other'], {'status': 'unavailable', 'error': 'Task status unavailable'})
+
+    @override_settings(IMAGE_TASK_STATUS_MAX_IDS=2)
+    def test_bad_task_id_lists(self):
+        for task_ids in ('one', [], [1, 2], ['a', 'b', 'c']):
+            with self.subTest(task_ids=task_ids):
+                self.assertEqual(self.statuses(task_ids)[0].status_code, 400)
+
+
+class GenerateImageContentTests(RenderingTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.template = self.image_template()
+        self.own_doctor = self.doctor(self.employee('E1'))
+
+    def generate(self, **data):
+        data = dict({'employee_id': 'E1', 'template_id': self.template.id, 'doctor_id': self.own_doctor.id}, **data)
+        with mock.patch.object(scheduling, 'submit') as submit:
+            response = APIClient().post('/api/generate-image/', data, format='json', HTTP_IDEMPOTENCY_KEY='tap-1')
+        return response, submit
+
+    def test_rejected_requests_do_not_claim_a_job(self):
+        other_doctor = self.doctor(self.employee('E2'))
+        for data, status_code in (
+            (dict(doctor_id=other_doctor.id), 403),
+            (dict(selected_brands=list(range(11))), 400),
+            (dict(template_id=0), 404),
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(self.generate(**data)[0].status_code, status_code)
+        self.assertFalse(RenderJob.objects.exists())
+
+        response, submit = self.generate()
+        self.assertEqual((response.status_code, response.json()['duplicate']), (201, False))
+        self.assertEqual(submit.call_args.kwargs['task_id'], response.json()['task_id'])
+
+    def test_repeats_return_the_claimed_job(self):
+        first, _ = self.generate()
+        again, submit = self.generate()
+        self.assertEqual((again.status_code, again.json()['duplicate']), (200, True))
+        self.assertEqual(again.json()['task_id'], first.json()['task_id'])
+        submit.assert_not_called()
+
+
+class GenerateImageBatchTests(RenderingTestCase):
+
+    def test_doctor_overrides_are_not_applied_to_every_doctor(self):
+        employee = self.employee('E1')
+        doctors = [self.doctor(employee), self.doctor(employee)]
+        template = self.image_template()
+        with mock.patch.object(scheduling, 'submit', return_value='task-1') as submit:
+            response = APIClient().post('/api/generate-image-batch/', {
+                'employee_id': 'E1', 'template_id': template.id, 'doctor_ids': [doctor.id for doctor in doctors],
+                'content_data': {'doctor_name': 'Dr. Copied', 'doctor_clinic': 'Copied Clinic', 'imageSettings': {}},
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(submit.call_args.args[2]['content_data'], {'imageSettings': {}})
+
+
+class RenderPlanTests(RenderingTestCase):
+
+    def test_doctor_fields_are_centered_and_come_before_static_text(self):
+        plan = compile_render_plan(self.image_template(text_positions={
+            'customText': {'x': 15, 'y': 5},
+            'city': {'x': 99, 'y': 80},
+            'name': {'x': 99, 'y': 40, 'fontSize': '32', 'color': 'red'},
+        }))
+        self.assertEqual([(field.name, field.x, field.y, field.centered) for field in plan.text_fields], [
+            ('name', 0, 40, True), ('city', 0, 80, True), ('customText', 15, 5, False),
+        ])
+        self.assertEqual((plan.text_fields[0].font.size, plan.text_fields[0].color), (32, 'red'))
+
+    def test_only_system_fonts_get_a_synthetic_italic(self):
+        plan = compile_render_plan(self.image_template(text_positions={
+            'name': {'y': 0, 'fontFamily': 'Arial', 'fontStyle': 'italic'},
+            'city': {'y': 0, 'fontFamily': 'Dancing Script', 'fontStyle': 'italic'},
+        }))
+        self.assertEqual([field.synthetic_italic for field in plan.text_fields], [True, False])
+
+    def test_auto_fit_settings(self):
+        plan = compile_render_plan(self.image_template(text_positions={
+            'name': {'y': 0, 'fontSize': 40, 'maxWidth': 300, 'minFontSize': 90, 'wrap': True, 'maxLines': 3},
+            'city': {'y': 0, 'fontSize': 40},
+        }))
+        name, city = plan.text_fields
+        # minFontSize above the configured size is clamped to it
+        self.assertEqual((name.max_width, name.min_font_size, name.wrap, name.max_lines), (300, 40, True, 3))
+        self.assertIsNone(city.max_width)
+
+    def test_image_settings(self):
+        self.assertIsNone(compile_image_settings({'enabled': False, 'width': 100}))
+        self.assertIsNone(compile_image_settings({'enabled': True, 'width': 'wide'}))
+        overlay = compile_image_settings({'enabled': True, 'x': '10', 'width': 120, 'borderRadius': 50})
+        self.assertEqual((overlay.x, overlay.y, overlay.width, overlay.height, overlay.border_radius), (10, 50, 120, 150, 50))
+
+    def test_standard_brand_area_keeps_its_preset_layouts(self):
+        area = compile_brand_area({'enabled': True, 'x': 0, 'y': 0, 'slots': grid(3, 3)})
+        self.assertEqual([(slot.x, slot.y) for slot in area.layout_for(1)], [(280, 150)])
+        self.assertEqual(len(area.layout_for(9)), 9)
+
+    def test_cached_plan_follows_template_edits(self):
+        template = self.image_template()
+        plan = get_render_plan(template)
+        self.assertIs(get_render_plan(template), plan)
+
+        version = template_version(template)
+        template.text_positions = {'name': {'y': 90, 'fontSize': 30}}
+        self.assertNotEqual(template_version(template), version)
+        edited = get_render_plan(template)
+        self.assertIsNot(edited, plan)
+        self.assertEqual(edited.text_fields[0].y, 90)
+
+
+def encoded(image, profile_name):
+    buffer = BytesIO()
+    extension = encode_image(image, buffer, get_output_profile(profile_name))
+    buffer.seek(0)
+    decoded = Image.open(buffer)
+    decoded.load()
+    return extension, decoded
+
+
+@override_settings(IMAGE_OUTPUT_PROFILE='png', IMAGE_OUTPUT_VARIANTS=None)
+class OutputEncodingTests(SimpleTestCase):
+
+    def test_unknown_profiles_use_the_configured_default(self):
+        self.assertEqual(get_output_profile('no-such-profile').name, 'png')
+        self.assertEqual(get_output_profile('').name, 'png')
+        with override_settings(IMAGE_OUTPUT_PROFILE='webp'):
+            self.assertEqual(get_output_profile(None).format, 'WEBP')
+
+    def test_lossy_profiles_encode_opaque_renders(self):
+        opaque = Image.new('RGBA', (32, 32), (200, 10, 10, 255))
+        extension, image = encoded(opaque, 'jpeg')
+        self.assertEqual((extension, image.format, image.mode), ('jpg', 'JPEG', 'RGB'))
+
+    def test_transparent_renders_stay_lossless(self):
+        transparent = Image.new('RGBA', (32, 32), (200, 10, 10, 0))
+        extension, image = encoded(transparent, 'jpeg')
+        self.assertEqual((extension, image.format), ('png', 'PNG'))
+
+        extension, image = encoded(transparent, 'webp')
+        self.assertEqual(extension, 'webp')
+        self.assertEqual(image.getchannel('A').getextrema(), (0, 0))
+
+    def test_unsupported_formats_are_refused(self):
+        with override_settings(IMAGE_OUTPUT_PROFILES={'gif': {'format': 'GIF'}}):
+            with self.assertRaises(ValueError):
+                encode_image(Image.new('RGB', (8, 8)), BytesIO(), get_output_profile('gif'))
+
+    def test_variants_can_be_overridden_and_come_largest_first(self):
+        self.assertEqual([variant.name for variant in output_variants()], ['share', 'thumbnail'])
+        with override_settings(IMAGE_OUTPUT_VARIANTS={'thumbnail': {'max_edge': 2000}}):
+            variants = output_variants()
+        self.assertEqual([(variant.name, variant.max_edge) for variant in variants], [('thumbnail', 2000), ('share', 1280)])
+
+
+class RenderOutputsTests(RenderingTestCase):
+
+    def test_full_image_and_variants_come_from_one_render(self):
+        template = self.image_template()
+        spec = build_render_spec(compile_render_plan(template), self.doctor(), {}, [])
+        outputs = render_outputs(spec)
+        self.assertEqual(sorted(outputs), ['full', 'share', 'thumbnail'])
+        sizes = {name: Image.open(BytesIO(content.read())).size for name, content in outputs.items()}
+        # The 400x300 template is not upscaled for sharing
+        self.assertEqual(sizes, {'full': (400, 300), 'share': (400, 300), 'thumbnail': (320, 240)})
@@ -2,7 +2,7 @@
 from django.urls import path,include
 from rest_framework.routers import DefaultRouter
 
-from .views import ( VideoGenViewSet,DoctorVideoViewSet,EmployeeViewSet,employee_login_api,add_doctor,bulk_upload_employees,DoctorListByEmployee, DoctorVideoListView,CustomTokenRefreshView,bulk_upload_doctors,DoctorVideoGeneration,EmployeeExportExcelView,DoctorVideoExportExcelView,total_employee_count,todays_active_employees,TodaysActiveEmployeeExcelExport,doctors_with_output_video_count,doctors_with_output_video_excel,doctors_count,VideoTemplateAPIView,GenerateDoctorOutputVideoView, update_employees_from_excel,TemplateWiseVideoCountView,ImageTemplateAPIView,ImageContentListView,GenerateImageContentView,DoctorSearchView,AddEmployeeTemplates,getFilteredVideoTemplates,DeleteContentView,DoctorUpdateDeleteView,BrandListAPIView,ImageTemplateUsageView,TaskStatusView,HealthCheckView,system_metrics,
+from .views import ( VideoGenViewSet,DoctorVideoViewSet,EmployeeViewSet,employee_login_api,add_doctor,bulk_upload_employees,DoctorListByEmployee, DoctorVideoListView,CustomTokenRefreshView,bulk_upload_doctors,DoctorVideoGeneration,EmployeeExportExcelView,DoctorVideoExportExcelView,total_employee_count,todays_active_employees,TodaysActiveEmployeeExcelExport,doctors_with_output_video_count,doctors_with_output_video_excel,doctors_count,VideoTemplateAPIView,GenerateDoctorOutputVideoView, update_employees_from_excel,TemplateWiseVideoCountView,ImageTemplateAPIView,ImageContentListView,GenerateImageContentView,GenerateImageBatchView,PreviewImageView,DoctorSearchView,AddEmployeeTemplates,getFilteredVideoTemplates,DeleteContentView,DoctorUpdateDeleteView,BrandListAPIView,ImageTemplateUsageView,ImageRenderMetricsView,ImageQueueDepthView,TaskStatusView,TaskWaitView,BulkTaskStatusView,RenderJobListView,HealthCheckView,system_metrics,
 #DoctorUsageHistoryView,SharedDoctorsView,
 get_rbm_regions,validate_designation
 )
@@ -60,6 +60,8 @@ urlpatterns = [
     path('api/image-templates/', ImageTemplateAPIView.as_view(), name='image-template-list-create'),
     path('api/image-templates/<int:pk>/', ImageTemplateAPIView.as_view(), name='image-template-detail'),
     path('api/generate-image/', GenerateImageContentView.as_view(), name='generate-image-content'),
+    path('api/generate-image-batch/', GenerateImageBatchView.as_view(), name='generate-image-batch'),
+    path('api/preview-image/', PreviewImageView.as_view(), name='preview-image'),
     path('api/image-contents/', ImageContentListView.as_view(), name='image-content-list'),
     path('api/search-doctor/', DoctorSearchView.as_view(), name='search-doctor'),
 
@@ -80,7 +82,12 @@ urlpatterns = [
     path('api/brands/', BrandListAPIView.as_view(), name='brand-list'),
 
     path('api/image-template-usage/', ImageTemplateUsageView.as_view(), name='image-template-usage'),
+    path('api/image-render-metrics/', ImageRenderMetricsView.as_view(), name='image-render-metrics'),
+    path('api/image-queue-depth/', ImageQueueDepthView.as_view(), name='image-queue-depth'),
+    path('api/render-jobs/', RenderJobListView.as_view(), name='render_jobs'),
+    path('api/task-status/bulk/', BulkTaskStatusView.as_view(), name='bulk_task_status'),
     path('api/task-status/<str:task_id>/', TaskStatusView.as_view(), name='task_status'),
+    path('api/task-status/<str:task_id>/wait/', TaskWaitView.as_view(), name='task_wait'),
     path('api/health/', HealthCheckView.as_view(), name='health_check'),
     path('api/system-metrics/', system_metrics, name='system_metrics'),
     # In your urls.py
@@ -1,10 +1,12 @@
 import os
 import json
 import uuid
+import hashlib
 import random
 import string
 import logging
 import subprocess
+from dataclasses import replace
 from datetime import datetime, date, timedelta
 import mimetypes
 from django.core.files.storage import default_storage
@@ -12,16 +14,21 @@ from django.core.exceptions import ValidationError
 
 import openpyxl
 import pandas as pd  # type: ignore
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 
 from django.conf import settings
 from django.core.files import File
-from django.db import IntegrityError
-from django.db.models import Count, Q
+from django.db import IntegrityError, transaction
+from django.db.models import Aggregate, Count, FloatField, Q
+from django.db.models.functions import TruncDate
 from django.contrib.postgres.aggregates import ArrayAgg
-from django.http import Http404, HttpResponse
+from django.contrib.postgres.fields import ArrayField
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.views import View
+from asgiref.sync import sync_to_async
 
 from rest_framework import status, viewsets, generics
 from rest_framework.decorators import api_view, parser_classes
@@ -30,6 +37,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.views import APIView
 #from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
@@ -87,6 +95,8 @@ from .models import (
     EmployeeLoginHistory,
     VideoTemplates,
     ImageContent,
+    ImageRenderMetrics,
+    RenderJob,
     Brand,
     Designation,
     # DoctorUsageHistory
@@ -105,10 +115,14 @@ from .serializers import (
     BrandSerializer,
 
 )
+from . import scheduling, task_events
+from .rendering import build_render_spec, compile_render_plan, get_render_plan, normalize_photo, render_preview
 import psutil
 import os
 from django.core.cache import cache
-from celery import current_app
+from celery import current_app, states
+from celery.backends.base import KeyValueStoreBackend
+from celery.result import AsyncResult
 
 class HealthCheckView(APIView):
     permission_classes = [AllowAny]
@@ -365,38 +379,6 @@ def validate_file_upload(file):
 # Helpers
 # ------------------------------------------------------------------------------
 
-def parse_css_shadow(shadow_str):
-    """Parse CSS-like text-shadow: '2px 2px 4px rgba(0,0,0,0.7)' -> dict or None"""
-    if shadow_str == 'none' or not shadow_str:
-        return None
-    try:
-        if 'rgba' in shadow_str:
-            rgba_start = shadow_str.find('rgba(')
-            rgba_end = shadow_str.find(')', rgba_start)
-            rgba_str = shadow_str[rgba_start+5:rgba_end]
-            rgba_values = [float(x.strip()) for x in rgba_str.split(',')]
-            shadow_color = (int(rgba_values[0]), int(rgba_values[1]), int(rgba_values[2]))
-            offset_part = shadow_str[:rgba_start].strip()
-            offsets = offset_part.replace('px', '').split()
-            if len(offsets) >= 2:
-                return {
-                    'offset_x': int(float(offsets[0])),
-                    'offset_y': int(float(offsets[1])),
-                    'color': shadow_color
-                }
-        elif 'px' in shadow_str:
-            parts = shadow_str.replace('px', '').split()
-            if len(parts) >= 2:
-                return {
-                    'offset_x': int(float(parts[0])),
-                    'offset_y': int(float(parts[1])),
-                    'color': (128, 128, 128)
-                }
-    except:  # noqa: E722
-        pass
-    return {'offset_x': 2, 'offset_y': 2, 'color': (128, 128, 128)}
-
-
 def _ff_esc(s: str) -> str:
     s = str(s or "")
     s = s.replace("\\", "\\\\")  # backslash first
@@ -1299,6 +1281,80 @@ class ImageTemplateAPIView(APIView):
         template.delete()
         return Response({"detail": "Template deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
+def request_fingerprint(request):
+    """Everything a request submits: its fields, and a digest of each uploaded file's content"""
+    data = request.data
+    fields = dict(data.lists()) if hasattr(data, 'lists') else dict(data)
+    fields.pop('idempotency_key', None)
+    files = {}
+    for name, uploads in request.FILES.lists():
+        fields.pop(name, None)
+        digests = []
+        for upload in uploads:
+            digest = hashlib.sha256()
+            for chunk in upload.chunks():
+                digest.update(chunk)
+            upload.seek(0)
+            digests.append(digest.hexdigest())
+        files[name] = digests
+    return {'fields': fields, 'files': files}
+
+
+def request_idempotency_key(request, employee_id):
+    """
+    Idempotency key of a generation request -> (key, seconds it stays claimed
+    or None). The client's ``Idempotency-Key`` header (or ``idempotency_key``
+    field) holds for good; without one the key is a hash of the whole request,
+    uploads included, and an identical request counts as a repeat for
+    IMAGE_IDEMPOTENCY_WINDOW seconds after the first.
+    """
+    client_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
+    if client_key:
+        source = json.dumps(['client', employee_id, str(client_key)])
+        expires_after = None
+    else:
+        source = json.dumps(['request', employee_id, request_fingerprint(request)], sort_keys=True, default=str)
+        expires_after = getattr(settings, 'IMAGE_IDEMPOTENCY_WINDOW', 300)
+    return hashlib.sha256(source.encode('utf-8')).hexdigest(), expires_after
+
+
+def claim_render_jobs(idempotency_key, jobs, expires_after=None):
+    """
+    Save ``jobs`` under the key -> (jobs, True), or return the jobs an earlier
+    request with the same key saved -> (those jobs, False). The key is given
+    up when every earlier job failed, or when they are all older than
+    ``expires_after`` seconds, so the request can be made again.
+    """
+    prefix = f"{idempotency_key}:"
+    previous = list(RenderJob.objects.filter(idempotency_key__startswith=prefix).order_by('id'))
+    if previous:
+        expired = expires_after is not None and all(
+            job.created_at < timezone.now() - timedelta(seconds=expires_after) for job in previous
+        )
+        if expired or all(job.status == 'failed' for job in previous):
+            RenderJob.objects.filter(id__in=[job.id for job in previous]).update(idempotency_key=None)
+            previous = []
+    if previous:
+        return previous, False
+
+    for index, job in enumerate(jobs):
+        job.idempotency_key = f"{prefix}{index}"
+    try:
+        with transaction.atomic():
+            return RenderJob.objects.bulk_create(jobs), True
+    except IntegrityError:
+        # An identical request got in first
+        return list(RenderJob.objects.filter(idempotency_key__startswith=prefix).order_by('id')), False
+
+
+def abandon_render_job(job, response):
+    """Fail a claimed job whose request was rejected before its task was queued"""
+    error = response.data.get('error') if isinstance(response.data, dict) else None
+    RenderJob.objects.filter(id=job.id).update(
+        status='failed', error=str(error or response.status_code), finished_at=timezone.now(),
+    )
+
+
 # @method_decorator(ratelimit(key='ip', rate='5/m', method='POST', block=True), name='post')
 
 class GenerateImageContentView(APIView):
@@ -1313,48 +1369,74 @@ class GenerateImageContentView(APIView):
             return Response({
                 "error": "System under high load, please try again later"
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        job = None
         try:
-            return self._process_request(request)
+            error, validated = self._validate_request(request)
+            if error is not None:
+                return error
+            # Claimed once the request is known to be good, but before the
+            # doctor is created or updated, so a repeat changes nothing
+            employee_id = request.data.get("employee_id")
+            idempotency_key, expires_after = request_idempotency_key(request, employee_id)
+            (job,), created = claim_render_jobs(
+                idempotency_key, [RenderJob(job_id=str(uuid.uuid4()), employee_id=employee_id)], expires_after,
+            )
+            if not created:
+                logger.info(f"Repeated generation request, returning job {job.job_id}")
+                return Response(dict(
+                    render_job_payload(job, request), task_id=job.job_id,
+                    message="Image generation already submitted", duplicate=True,
+                ), status=status.HTTP_200_OK)
+            response = self._process_request(request, job, validated)
         except ValidationError as e:
             logger.error(f"Validation error in image generation: {e}")
-            return Response({
+            response = Response({
                 "error": "Invalid input data",
                 "details": str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
         except VideoTemplates.DoesNotExist:
             logger.error(f"Template not found: {request.data.get('template_id')}")
-            return Response({
+            response = Response({
                 "error": "Template not found"
             }, status=status.HTTP_404_NOT_FOUND)
         except DoctorVideo.DoesNotExist:
             logger.error(f"Doctor not found: {request.data.get('doctor_id')}")
-            return Response({
+            response = Response({
                 "error": "Doctor not found"
             }, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
             logger.error(f"Unexpected error in image generation: {e}", exc_info=True)
-            return Response({
+            response = Response({
                 "error": "Image generation failed",
                 "message": "Please try again later"
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def _process_request(self, request):
+        # Submission is the last step, so an error response means no task was queued
+        if job is not None and response.status_code >= 400:
+            abandon_render_job(job, response)
+        return response
+
+    def _validate_request(self, request):
+        """
+        Every check a generation request can fail, run before its job is
+        claimed and without writing anything -> (error Response or None, what
+        _process_request needs)
+        """
         # Add security check - get from request data, not localStorage
         employee_id = request.data.get("employee_id")
         user_type = request.data.get("user_type", "Employee")
 
         # Validate uploaded files first
+        uploaded_image = None
         if 'doctor_image' in request.FILES:
             try:
                 validate_file_upload(request.FILES['doctor_image'])
+                uploaded_image = normalize_photo(request.FILES['doctor_image'])
             except ValidationError as e:
-                return Response({"error": f"File validation failed: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+                return Response({"error": f"File validation failed: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST), None
 
         template_id = request.data.get("template_id")
         doctor_id = request.data.get("doctor_id")
-        mobile = request.data.get("mobile")
-        name = request.data.get("name")
-        content_data = request.data.get("content_data", {})
         selected_brand_ids = request.data.get("selected_brands", [])
 
         # Security: Ensure employee can only create content for themselves (unless admin)
@@ -1362,43 +1444,69 @@ class GenerateImageContentView(APIView):
             try:
                 doctor = DoctorVideo.objects.get(id=doctor_id)
                 if doctor.employee.employee_id != employee_id:
-                    return Response({"error": "You can only generate content for your own doctors"}, status=status.HTTP_403_FORBIDDEN)
+                    return Response({"error": "You can only generate content for your own doctors"}, status=status.HTTP_403_FORBIDDEN), None
             except DoctorVideo.DoesNotExist:
                 pass  # Will be handled later
 
         if not isinstance(selected_brand_ids, list) or not all(isinstance(bid, int) for bid in selected_brand_ids):
-            return Response({"error": "selected_brands must be a list of brand IDs."}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"error": "selected_brands must be a list of brand IDs."}, status=status.HTTP_400_BAD_REQUEST), None
 
         if len(selected_brand_ids) > 10:
-            return Response({"error": "You can select up to 10 brands only."}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({"error": "You can select up to 10 brands only."}, status=status.HTTP_400_BAD_REQUEST), None
 
         try:
             template = VideoTemplates.objects.select_related().get(id=template_id, template_type='image')
         except VideoTemplates.DoesNotExist:
-            return Response({"error": "Image template not found."}, status=status.HTTP_404_NOT_FOUND)
+            return Response({"error": "Image template not found."}, status=status.HTTP_404_NOT_FOUND), None
 
         print(f"🔍 Template brand_area_settings: {template.brand_area_settings}")
         print(f"🔍 Selected brand IDs: {selected_brand_ids}")
 
-
         # Scenario 1: Existing DoctorVideo by ID
-        is_new_doctor = False
+        doctor_video = employee = None
         if doctor_id:
             try:
                 doctor_video = DoctorVideo.objects.select_related('employee').get(id=doctor_id)
             except DoctorVideo.DoesNotExist:
-                return Response({"error": "Doctor not found."}, status=status.HTTP_404_NOT_FOUND)
+                return Response({"error": "Doctor not found."}, status=status.HTTP_404_NOT_FOUND), None
         else:
-            # Scenario 2: Employee-specific doctor handling
+            # Scenario 2: the doctor is found or created for the employee once the job is claimed
             try:
-                employee_id = request.data.get("employee_id")
                 if employee_id:
                     employee = Employee.objects.get(employee_id=employee_id)
                 else:
-                    return Response({"error": "employee_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+                    return Response({"error": "employee_id is required."}, status=status.HTTP_400_BAD_REQUEST), None
             except Employee.DoesNotExist:
-                return Response({"error": f"Employee {employee_id} not found."}, status=status.HTTP_404_NOT_FOUND)
-            
+                return Response({"error": f"Employee {employee_id} not found."}, status=status.HTTP_404_NOT_FOUND), None
+
+        if not template.template_image or not template.template_image.path:
+            return Response({"error": "Template does not have an image file."}, status=status.HTTP_400_BAD_REQUEST), None
+
+        # Verify template image file exists
+        if not os.path.exists(template.template_image.path):
+            return Response({"error": "Template image file not found."}, status=status.HTTP_400_BAD_REQUEST), None
+
+        return None, {
+            'template': template,
+            'doctor_video': doctor_video,
+            'employee': employee,
+            'uploaded_image': uploaded_image,
+        }
+
+    def _process_request(self, request, job, validated):
+        employee_id = request.data.get("employee_id")
+        template_id = request.data.get("template_id")
+        mobile = request.data.get("mobile")
+        name = request.data.get("name")
+        content_data = request.data.get("content_data", {})
+        selected_brand_ids = request.data.get("selected_brands", [])
+        template = validated['template']
+        uploaded_image = validated['uploaded_image']
+
+        is_new_doctor = False
+        doctor_video = validated['doctor_video']
+        if doctor_video is None:
+            employee = validated['employee']
             # Check if THIS EMPLOYEE already has this doctor
             doctor_video = DoctorVideo.objects.select_related('employee').filter(
                 mobile_number=mobile, 
@@ -1421,7 +1529,6 @@ class GenerateImageContentView(APIView):
                 doctor_video.state = state
                 
                 # Handle image upload for existing doctor
-                uploaded_image = request.FILES.get('doctor_image')
                 if uploaded_image:
                     doctor_video.image = uploaded_image
                 
@@ -1459,19 +1566,11 @@ class GenerateImageContentView(APIView):
                     designation=request.data.get("designation", ""),
                     employee=employee
                 )
-                uploaded_image = request.FILES.get('doctor_image')
                 if uploaded_image:
                     doctor_video.image = uploaded_image
                     doctor_video.save()
                 is_new_doctor = True
 
-        if not template.template_image or not template.template_image.path:
-            return Response({"error": "Template does not have an image file."}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Verify template image file exists
-        if not os.path.exists(template.template_image.path):
-            return Response({"error": "Template image file not found."}, status=status.HTTP_400_BAD_REQUEST)
-
         try:
             # Use background processing for images
 
@@ -1492,19 +1591,12 @@ class GenerateImageContentView(APIView):
             # Use background processing for images
             from .tasks import generate_image_async
 
-            task = generate_image_async.delay(
-                template_id=template_id,
-                doctor_id=doctor_video.id,
-                content_data=content_data,
-                selected_brand_ids=selected_brand_ids,
-                current_employee_id=employee_id  # Add this line
-            )
-
             # Return task ID to frontend
             resp = {
                 "status": "processing",
-                "task_id": str(task.id),
-                "message": "Image generation started"
+                "task_id": job.job_id,
+                "message": "Image generation started",
+                "duplicate": False,
             }
 
 
@@ -1524,6 +1616,15 @@ class GenerateImageContentView(APIView):
             else:
                 resp['selected_brands'] = []
 
+            RenderJob.objects.filter(id=job.id).update(template=template)
+            # Queued per employee so other employees' batches cannot starve it
+            scheduling.submit(generate_image_async, scheduling.tenant_key(employee_id), dict(
+                template_id=template_id,
+                doctor_id=doctor_video.id,
+                content_data=content_data,
+                selected_brand_ids=selected_brand_ids,
+                current_employee_id=employee_id,  # Add this line
+            ), task_id=job.job_id)
 
             return Response(resp, status=status.HTTP_201_CREATED)
         except Exception as e:
@@ -1541,542 +1642,208 @@ class GenerateImageContentView(APIView):
                 logger.error(f"Template image path: {template.template_image.path}")
             return Response({"error": "Image generation failed.", "details": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    #
-
-    def generate_image_with_text(self, template, content_data, doctor, selected_brand_ids=None):
-        logger.info(f"Starting image generation for template {template.id}")
-
-        if not template.template_image or not template.template_image.path:
-            raise Exception("Template image path is None or empty")
-
-        if not os.path.exists(template.template_image.path):
-            raise Exception(f"Template image file does not exist: {template.template_image.path}")
+def preview_settings_error(spec, template_size):
+    """Why the settings of ``spec`` do not fit a template of ``template_size``, or None"""
+    width, height = template_size
+    for field in spec.plan.text_fields:
+        if not 0 < field.font.size <= height:
+            return f"{field.name}: fontSize must be between 1 and the template height ({height})."
+        if field.shadow and (abs(field.shadow.offset_x) > width or abs(field.shadow.offset_y) > height):
+            return f"{field.name}: textShadow offset is larger than the template."
+    if spec.image_settings and not (0 < spec.image_settings.width <= width and 0 < spec.image_settings.height <= height):
+        return f"imageSettings must fit within the template ({width}x{height})."
+    slots = spec.plan.brand_area.slots if spec.plan.brand_area else ()
+    if any(not (0 < slot.width <= width and 0 < slot.height <= height) for slot in slots):
+        return f"Brand slots must fit within the template ({width}x{height})."
+    return None
+
+
+class PreviewImageView(APIView):
+    """Render a template synchronously as a small JPEG, without saving an ImageContent"""
+    permission_classes = [IsAuthenticated]
+    # Template columns the editor can override to preview unsaved changes
+    TEMPLATE_OVERRIDES = ('text_positions', 'brand_area_settings', 'custom_text')
+    SAMPLE_DOCTOR = {
+        'name': 'Dr. Sample Name',
+        'clinic': 'Sample Clinic',
+        'city': 'City',
+        'state': 'State',
+        'specialization': 'Specialization',
+    }
 
-        # Memory-efficient image processing with explicit cleanup
-        template_image = None
-        draw = None
-        brand_images = []  # Track all opened images for cleanup
+    def post(self, request):
+        started = time.perf_counter()
+        # Who is asking comes from the token, not the request body
+        employee_id = request.user.username
+        employee = Employee.objects.filter(employee_id=employee_id).only('user_type').first()
+        user_type = employee.user_type if employee else "Employee"
+        doctor_id = request.data.get("doctor_id")
+        content_data = request.data.get("content_data") or {}
+        selected_brand_ids = request.data.get("selected_brands", [])
 
-        # Make brand_images accessible to render_brands_in_area method
-        self._current_brand_images = brand_images
+        if not isinstance(content_data, dict):
+            return Response({"error": "content_data must be an object."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(selected_brand_ids, list) or not all(isinstance(bid, int) for bid in selected_brand_ids):
+            return Response({"error": "selected_brands must be a list of brand IDs."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(selected_brand_ids) > 10:
+            return Response({"error": "You can select up to 10 brands only."}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            template_image = Image.open(template.template_image.path)
-
-
-            # Convert to RGB if needed to reduce memory
-            if template_image.mode not in ('RGB', 'RGBA'):
-                template_image = template_image.convert('RGB')
-
-
-            draw = ImageDraw.Draw(template_image)
-
-            logger.info("Getting text positions...")
-            positions = template.text_positions or {}
-            logger.info(f"Text positions: {positions}")
-
-            positions = template.text_positions or {}
-            # Font mapping for PIL
-            FONT_MAP = {
-                'Arial': 'arial.ttf',
-                'Times New Roman': 'times.ttf',
-                'Helvetica': 'arial.ttf',
-                'Georgia': 'georgia.ttf',
-                'Verdana': 'verdana.ttf',
-                'Impact': 'impact.ttf',
-                'Comic Sans MS': 'comic.ttf',
-                'Dancing Script': 'DancingScript-Regular.ttf',
-                'Great Vibes': 'GreatVibes-Regular.ttf',
-                'Pacifico': 'Pacifico-Regular.ttf',
-                'Allura': 'Allura-Regular.ttf',
-                'Alex Brush': 'AlexBrush-Regular.ttf'
-            }
-
-            def get_font(font_family, font_size, font_weight='normal', font_style='normal'):
-                base_font = FONT_MAP.get(font_family, 'arial.ttf')
-
-                # For cursive fonts, use full path
-                if font_family in ['Dancing Script', 'Great Vibes', 'Pacifico', 'Allura', 'Alex Brush']:
-                    font_path = os.path.join(settings.BASE_DIR, "fonts", base_font)
-                else:
-                    font_path = base_font
+            max_edge = int(request.data.get("max_edge", settings.IMAGE_PREVIEW_MAX_EDGE))
+        except (TypeError, ValueError):
+            return Response({"error": "max_edge must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        max_edge = min(max(max_edge, 64), settings.IMAGE_PREVIEW_MAX_EDGE_LIMIT)
 
-                # Handle font weight (bold) - only for non-cursive fonts
-                if font_weight == 'bold' and font_family not in ['Dancing Script', 'Great Vibes', 'Pacifico', 'Allura', 'Alex Brush']:
-                    bold_font = font_path.replace('.ttf', 'bd.ttf')
-                    try:
-                        font = ImageFont.truetype(bold_font, font_size)
-                    except:
-                        try:
-                            font = ImageFont.truetype(font_path, font_size)
-                        except:
-                            font = ImageFont.load_default()
-                else:
-                    try:
-                        font = ImageFont.truetype(font_path, font_size)
-                    except:
-                        try:
-                            font = ImageFont.truetype("arial.ttf", font_size)
-                        except:
-                            font = ImageFont.load_default()
-
-                return font
-            ##
-            # Combine city and state with comma if both exist
-            city_state = []
-            if content_data.get('doctor_city', doctor.city):
-                city_state.append(content_data.get('doctor_city', doctor.city))
-            if content_data.get('doctor_state', doctor.state):
-                city_state.append(content_data.get('doctor_state', doctor.state))
-            city_state_combined = ', '.join(city_state)
-
-            all_text_data = {
-                'name': content_data.get('doctor_name', doctor.name),
-                'city': city_state_combined,  # Combined city, state
-                'specialization': content_data.get('doctor_specialization', doctor.specialization),
-                'mobile': doctor.mobile_number,
-                'customText': template.custom_text or '',
-            }
-
-            # DOCTOR FIELDS RESPONSIVE CENTER ALIGNMENT (removed 'state' since it's now combined with city)
-            doctor_fields = ['name', 'specialization', 'city']
-            doctor_text_data = {field: all_text_data[field] for field in doctor_fields if field in all_text_data and all_text_data[field] and field in positions}
-
-            if doctor_text_data:
-                print(f"🎯 Processing doctor fields for center alignment: {list(doctor_text_data.keys())}")
-
-                # Calculate text widths for center alignment
-                field_widths = {}
-                field_fonts = {}
-
-                for field_name, text_value in doctor_text_data.items():
-                    pos = positions[field_name]
-                    font_size = int(pos.get('fontSize', 40)) * 7
-                    font_weight = pos.get('fontWeight', 'normal')
-                    font_family = pos.get('fontFamily', 'Arial')
-                    font_style = pos.get('fontStyle', 'normal')
-
-                    styled_font = get_font(font_family, font_size, font_weight, font_style)
-                    field_fonts[field_name] = styled_font
-
-                    # Calculate text width using textbbox
-                    bbox = draw.textbbox((0, 0), str(text_value), font=styled_font)
-                    text_width = bbox[2] - bbox[0]
-                    field_widths[field_name] = text_width
-                    print(f"🎯 Field {field_name}: '{text_value}' = {text_width}px wide")
-
-                # Find the widest text to base centering on
-                max_width = max(field_widths.values())
-                widest_field = max(field_widths, key=field_widths.get)
-                print(f"🎯 Widest field: {widest_field} ({max_width}px)")
-
-                # Get base position from widest field
-                # Calculate the visual center point of the template
-                template_center_x = template_image.width // 2
-
-                # Calculate center-aligned positions for all doctor fields
-                for field_name, text_value in doctor_text_data.items():
-                    pos = positions[field_name]
-                    field_width = field_widths[field_name]
-                    styled_font = field_fonts[field_name]
-
-                    # Center each field based on template center, not relative to other fields
-                    centered_x = template_center_x - (field_width // 2)
-                    y_pos = int(pos['y'])  # Keep original Y position
-                    print(f"🎯 Rendering {field_name} at centered position ({centered_x}, {y_pos})")
-
-                    # Apply styling
-                    color = pos.get('color', 'black')
-                    font_style = pos.get('fontStyle', 'normal')
-
-                    # Text shadow
-                    text_shadow = pos.get('textShadow', 'none')
-                    if text_shadow != 'none':
-                        shadow_info = parse_css_shadow(text_shadow)
-                        if shadow_info:
-                            draw.text(
-                                (centered_x + shadow_info['offset_x'], y_pos + shadow_info['offset_y']),
-                                str(text_value), fill=shadow_info['color'], font=styled_font
-                            )
-
-                    # Render text with center alignment
-                    # For cursive fonts, no need for italic simulation - they're naturally cursive
-                    # For non-cursive fonts with italic style, apply simulation
-                    if font_style in ['italic', 'oblique'] and pos.get('fontFamily', 'Arial') not in ['Dancing Script', 'Great Vibes', 'Pacifico', 'Allura', 'Alex Brush']:
-                        for offset in range(3):
-                            draw.text((centered_x + offset, y_pos), str(text_value), fill=color, font=styled_font)
-                    else:
-                        draw.text((centered_x, y_pos), str(text_value), fill=color, font=styled_font)
-
-            # Handle custom text separately (not part of doctor info centering)
-            # Handle custom text separately (not part of doctor info centering) - FIXED POSITION
-            if 'customText' in all_text_data and 'customText' in positions and all_text_data['customText']:
-                field_name = 'customText'
-                text_value = all_text_data[field_name]
-                pos = positions[field_name]
-                font_size = int(pos.get('fontSize', 40))
-                color = pos.get('color', 'black')
-                font_weight = pos.get('fontWeight', 'normal')
-                font_family = pos.get('fontFamily', 'Arial')
-                font_style = pos.get('fontStyle', 'normal')
-
-                styled_font = get_font(font_family, font_size, font_weight, font_style)
-
-                # Use original fixed position for custom text (no responsive centering)
-                x_pos = int(pos['x'])
-                y_pos = int(pos['y'])
-
-                text_shadow = pos.get('textShadow', 'none')
-                if text_shadow != 'none':
-                    shadow_info = parse_css_shadow(text_shadow)
-                    if shadow_info:
-                        draw.text(
-                            (x_pos + shadow_info['offset_x'], y_pos + shadow_info['offset_y']),
-                            str(text_value), fill=shadow_info['color'], font=styled_font
-                        )
+        try:
+            template = VideoTemplates.objects.get(id=request.data.get("template_id"), template_type='image')
+        except (VideoTemplates.DoesNotExist, ValueError, TypeError):
+            return Response({"error": "Image template not found."}, status=status.HTTP_404_NOT_FOUND)
+        if not template.template_image or not os.path.exists(template.template_image.path):
+            return Response({"error": "Template image file not found."}, status=status.HTTP_404_NOT_FOUND)
 
-                if font_style in ['italic', 'oblique'] and font_family not in ['Dancing Script', 'Great Vibes', 'Pacifico', 'Allura', 'Alex Brush']:
-                    for offset in range(3):
-                        draw.text((x_pos + offset, y_pos), str(text_value), fill=color, font=styled_font)
-                else:
-                    draw.text((x_pos, y_pos), str(text_value), fill=color, font=styled_font)
-            # Optional doctor image overlay
-            image_settings = None
-            if content_data and 'imageSettings' in content_data:
-                image_settings = content_data['imageSettings']
-            elif template.text_positions and 'imageSettings' in template.text_positions:
-                image_settings = template.text_positions['imageSettings']
-
-            if image_settings and image_settings.get('enabled', False):
-                try:
-                    logger.info(f"Doctor image enabled. Doctor: {doctor.name}")
-                    logger.info(f"Doctor image field: {doctor.image}")
-                    logger.info(f"Doctor image path: {doctor.image.path if doctor.image else 'None'}")
-
-                    img_x = int(image_settings.get('x', 400))
-                    img_y = int(image_settings.get('y', 50))
-                    img_width = int(image_settings.get('width', 150))
-                    img_height = int(image_settings.get('height', 150))
-                    img_fit = image_settings.get('fit', 'cover')
-                    border_radius = int(image_settings.get('borderRadius', 0))
-                    opacity = int(image_settings.get('opacity', 100))
-
-                    if doctor.image and doctor.image.path and os.path.exists(doctor.image.path):
-                        doctor_img = Image.open(doctor.image.path)
-                        if img_fit == 'cover':
-                            doctor_img = doctor_img.resize((img_width, img_height), Image.Resampling.LANCZOS)
-                        elif img_fit == 'contain':
-                            doctor_img.thumbnail((img_width, img_height), Image.Resampling.LANCZOS)
-                        elif img_fit == 'stretch':
-                            doctor_img = doctor_img.resize((img_width, img_height), Image.Resampling.LANCZOS)
-                    else:
-                        doctor_img = Image.new('RGB', (img_width, img_height), color='#4A90E2')
-                        draw_placeholder = ImageDraw.Draw(doctor_img)
-                        fsz = max(20, min(img_width, img_height) // 4)
-                        try:
-                            placeholder_font = ImageFont.truetype("arial.ttf", fsz)
-                        except:  # noqa: E722
-                            placeholder_font = ImageFont.load_default()
-                        draw_placeholder.text((img_width//2, img_height//2), "DR", fill='white', font=placeholder_font, anchor="mm")
-
-                    if border_radius > 0:
-                        mask = Image.new('L', (doctor_img.width, doctor_img.height), 0)
-                        mask_draw = ImageDraw.Draw(mask)
-                        actual_radius = min(doctor_img.width, doctor_img.height) * border_radius // 200
-                        mask_draw.rounded_rectangle([(0, 0), (doctor_img.width, doctor_img.height)], radius=actual_radius, fill=255)
-                        if doctor_img.mode != 'RGBA':
-                            doctor_img = doctor_img.convert('RGBA')
-                        doctor_img.putalpha(mask)
-
-                    if opacity < 100:
-                        if doctor_img.mode != 'RGBA':
-                            doctor_img = doctor_img.convert('RGBA')
-                        alpha = doctor_img.split()[-1]
-                        alpha = alpha.point(lambda p: int(p * opacity / 100))
-                        doctor_img.putalpha(alpha)
-
-                    if template_image.mode != 'RGBA':
-                        template_image = template_image.convert('RGBA')
-                    if doctor_img.mode == 'RGBA':
-                        template_image.paste(doctor_img, (img_x, img_y), doctor_img)
-                    else:
-                        template_image.paste(doctor_img, (img_x, img_y))
-                except Exception as e:
-                    logger.error(f"Error compositing doctor image: {e}")
-
-            #output_dir = os.path.join(settings.MEDIA_ROOT, "temp")
-
-            output_dir = os.path.join(settings.MEDIA_ROOT, "temp")
-
-            # Render brands in predefined area with smart layout
-    # Render brands in predefined area with smart layout
-            if selected_brand_ids is None:
-                selected_brand_ids = content_data.get('selected_brands', [])
-
-            print(f"🔍 Final selected_brand_ids after processing: {selected_brand_ids}")
-            print(f"🔍 Template brand_area_settings: {template.brand_area_settings}")
-            print(f"🔍 Brand area enabled: {template.brand_area_settings.get('enabled', False) if template.brand_area_settings else False}")
-            logger.info(f"Template ID: {template.id}, Template name: {template.name}")
-            logger.info(f"Brand area settings: {template.brand_area_settings}")
-            logger.info(f"Selected brand IDs: {selected_brand_ids}")
-
-            print(f"🔍 Checking condition: selected_brand_ids={bool(selected_brand_ids)}, has_area_settings={bool(template.brand_area_settings)}, area_enabled={template.brand_area_settings.get('enabled', False) if template.brand_area_settings else False}")
-
-            if selected_brand_ids and template.brand_area_settings and template.brand_area_settings.get('enabled', False):
-                print("🔍 CONDITION MET - About to render brands")
-                print(f"🔍 Rendering {len(selected_brand_ids)} brands in defined area")
-                brands = Brand.objects.filter(id__in=selected_brand_ids)
-                print(f"🔍 Found {brands.count()} brands to render")
-
-                # ADD DETAILED DEBUG
-                for brand in brands:
-                    print(f"🔍 Brand: {brand.name}, Image: {brand.brand_image}")
-                    if brand.brand_image:
-                        print(f"🔍 Brand image path: {brand.brand_image.path}")
-                        print(f"🔍 Path exists: {os.path.exists(brand.brand_image.path)}")
-
-                print(f"🔍 About to call render_brands_in_area with area: {template.brand_area_settings}")
+        if doctor_id:
+            try:
+                doctor = DoctorVideo.objects.select_related('employee').get(id=doctor_id)
+            except (DoctorVideo.DoesNotExist, ValueError, TypeError):
+                return Response({"error": "Doctor not found."}, status=status.HTTP_404_NOT_FOUND)
+            if user_type not in ["Admin", "SuperAdmin"] and (
+                not doctor.employee or doctor.employee.employee_id != employee_id
+            ):
+                return Response({"error": "You can only preview content for your own doctors"}, status=status.HTTP_403_FORBIDDEN)
+        else:
+            # Unsaved stand-in: placeholder text and the "DR" photo placeholder
+            doctor = DoctorVideo(**self.SAMPLE_DOCTOR)
+
+        overrides = {field: request.data[field] for field in self.TEMPLATE_OVERRIDES if field in request.data}
+        area = overrides.get('brand_area_settings')
+        if isinstance(area, dict) and len(area.get('slots') or []) > settings.IMAGE_PREVIEW_MAX_SLOTS:
+            return Response({"error": f"A brand area can have up to {settings.IMAGE_PREVIEW_MAX_SLOTS} slots."}, status=status.HTTP_400_BAD_REQUEST)
+        if overrides:
+            # Edited settings are compiled for this request only: not added to the plan
+            # cache, and nothing rendered from them is cached or written to disk
+            for field, value in overrides.items():
+                setattr(template, field, value)
+            try:
+                plan = replace(compile_render_plan(template), persistent=False)
+            except (TypeError, ValueError, AttributeError, KeyError) as e:
+                return Response({"error": "Invalid template settings.", "details": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            plan = get_render_plan(template)
 
-                try:
-                    # Ensure template_image is in RGBA mode before brand rendering
-                    if template_image.mode != 'RGBA':
-                        template_image = template_image.convert('RGBA')
-
-                    self.render_brands_in_area(template_image, brands, template.brand_area_settings)
-                    print("🔍 Successfully finished calling render_brands_in_area")
-                except Exception as e:
-                    print(f"🔍 ERROR in render_brands_in_area: {e}")
-                    import traceback
-                    traceback.print_exc()
-            else:
-                print("🔍 CONDITION FAILED - Brand rendering skipped")
-                if not selected_brand_ids:
-                    logger.info("No brands selected")
-                    print("🔍 - No selected_brand_ids")
-                elif not template.brand_area_settings:
-                    logger.info("No brand area settings defined for template")
-                    print("🔍 - No brand_area_settings")
-                elif not template.brand_area_settings.get('enabled', False):
-                    logger.info("Brand area not enabled for template")
-                    print("🔍 - Brand area not enabled")
-
-            # Save the final image AFTER all operations including brand rendering
-            os.makedirs(output_dir, exist_ok=True)
-            output_path = os.path.join(output_dir, f"temp_image_{uuid.uuid4().hex}.png")
-
-            # Convert to RGB before saving to ensure compatibility
-            # Save with transparency preserved - DON'T convert to RGB
-            if template_image.mode == 'RGBA':
-                template_image.save(output_path, 'PNG',
-                                quality=100,
-                                optimize=False,
-                                compress_level=0,
-                                dpi=(300, 300))
-            else:
-                template_image.save(output_path, 'PNG',
-                                quality=100,
-                                optimize=False,
-                                compress_level=0,
-                                dpi=(300, 300))
+        from .tasks import brands_in_order
 
-            return output_path
-        #
+        brands = brands_in_order(selected_brand_ids) if selected_brand_ids and plan.brand_area else []
+        spec = build_render_spec(plan, doctor, content_data, brands)
+        if overrides or 'imageSettings' in content_data:
+            try:
+                with Image.open(template.template_image.path) as template_image:
+                    template_size = template_image.size
+            except OSError:
+                return Response({"error": "Template image file not found."}, status=status.HTTP_404_NOT_FOUND)
+            error = preview_settings_error(spec, template_size)
+            if error:
+                return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
 
+        try:
+            data = render_preview(spec, max_edge)
         except Exception as e:
-            logger.error(f"Image generation error: {e}")
-            raise
-        finally:
-            # Comprehensive cleanup
-            if template_image is not None:
-                try:
-                    template_image.close()
-                    del template_image
-                except:
-                    pass
-            if draw is not None:
-                try:
-                    del draw
-                except:
-                    pass
-            # Clean up any brand images
-            if hasattr(self, '_current_brand_images'):
-                for brand_img in self._current_brand_images:
-                    try:
-                        brand_img.close()
-                        del brand_img
-                    except:
-                        pass
-                self._current_brand_images.clear()
-                delattr(self, '_current_brand_images')
-
-            # Force garbage collection
-            import gc
-            gc.collect()
-
+            logger.error(f"Preview render failed for template {template.id}: {e}", exc_info=True)
+            return Response({"error": "Preview failed."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        response = HttpResponse(data, content_type='image/jpeg')
+        response['Cache-Control'] = 'no-store'
+        response['X-Render-Time-Ms'] = f"{(time.perf_counter() - started) * 1000:.1f}"
+        return response
 
-    def render_brands_in_area(self, template_image, brands, area_settings):
-        """Render brands using predefined slots with smart centering"""
-        print(f"🔍 INSIDE render_brands_in_area with {brands.count()} brands")
-        print(f"🔍 Area settings: {area_settings}")
 
-        if not brands or not area_settings.get('enabled'):
-            print("🔍 Exiting early - no brands or area not enabled")
-            return
+class GenerateImageBatchView(APIView):
+    """Generate one image template for many doctors in batched background jobs"""
+    permission_classes = [AllowAny]
 
-        area_x = area_settings.get('x', 50)
-        area_y = area_settings.get('y', 400)
-        area_width = area_settings.get('width', 700)
-        area_height = area_settings.get('height', 150)
-        slots = area_settings.get('slots', [])
+    @monitor_resources
+    def post(self, request):
+        employee_id = request.data.get("employee_id")
+        user_type = request.data.get("user_type", "Employee")
+        template_id = request.data.get("template_id")
+        doctor_ids = request.data.get("doctor_ids", [])
+        content_data = request.data.get("content_data", {})
+        selected_brand_ids = request.data.get("selected_brands", [])
 
-        if not slots:
-            print("🔍 No slots defined, exiting")
-            return
+        if not isinstance(doctor_ids, list) or not doctor_ids or not all(isinstance(did, int) for did in doctor_ids):
+            return Response({"error": "doctor_ids must be a non-empty list of doctor IDs."}, status=status.HTTP_400_BAD_REQUEST)
 
-        print(f"🔍 Area position: ({area_x}, {area_y})")
-        print(f"🔍 Area size: {area_width}x{area_height}")
-        print(f"🔍 Available slots: {len(slots)}")
+        if not isinstance(content_data, dict):
+            return Response({"error": "content_data must be an object."}, status=status.HTTP_400_BAD_REQUEST)
+        # Per-doctor text overrides from the single-image form would stamp one doctor on every image
+        content_data = {key: value for key, value in content_data.items() if not key.startswith('doctor_')}
 
-        # Get only the slots we need (based on number of brands)
-        brands_list = list(brands)
-        needed_slots = slots[:len(brands_list)]
+        doctor_ids = list(dict.fromkeys(doctor_ids))
+        max_doctors = getattr(settings, 'IMAGE_BATCH_MAX_DOCTORS', 500)
+        if len(doctor_ids) > max_doctors:
+            return Response({"error": f"You can generate for up to {max_doctors} doctors at once."}, status=status.HTTP_400_BAD_REQUEST)
 
-        print(f"🔍 Using {len(needed_slots)} slots for {len(brands_list)} brands")
+        if not isinstance(selected_brand_ids, list) or not all(isinstance(bid, int) for bid in selected_brand_ids):
+            return Response({"error": "selected_brands must be a list of brand IDs."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate bounding box of needed slots for centering
-        if len(needed_slots) < len(slots):
-            min_x = min(slot['x'] for slot in needed_slots)
-            max_x = max(slot['x'] + slot['width'] for slot in needed_slots)
-            min_y = min(slot['y'] for slot in needed_slots)
-            max_y = max(slot['y'] + slot['height'] for slot in needed_slots)
+        if len(selected_brand_ids) > 10:
+            return Response({"error": "You can select up to 10 brands only."}, status=status.HTTP_400_BAD_REQUEST)
 
-            used_width = max_x - min_x
-            used_height = max_y - min_y
+        try:
+            template = VideoTemplates.objects.get(id=template_id, template_type='image')
+        except VideoTemplates.DoesNotExist:
+            return Response({"error": "Image template not found."}, status=status.HTTP_404_NOT_FOUND)
 
-            # Calculate centering offset
-            center_offset_x = (area_width - used_width) // 2 - min_x
-            center_offset_y = (area_height - used_height) // 2 - min_y
+        if not template.template_image or not os.path.exists(template.template_image.path):
+            return Response({"error": "Template image file not found."}, status=status.HTTP_400_BAD_REQUEST)
 
-            print(f"🔍 Centering offset: ({center_offset_x}, {center_offset_y})")
-        else:
-            # Using all slots, no centering needed
-            center_offset_x = 0
-            center_offset_y = 0
+        doctors = DoctorVideo.objects.select_related('employee').filter(id__in=doctor_ids)
+        missing = set(doctor_ids) - {doctor.id for doctor in doctors}
+        if missing:
+            return Response({"error": "Doctors not found.", "doctor_ids": sorted(missing)}, status=status.HTTP_404_NOT_FOUND)
+
+        # Security: employees can only generate content for their own doctors (unless admin)
+        if user_type not in ["Admin", "SuperAdmin"]:
+            foreign = [doctor.id for doctor in doctors if not doctor.employee or doctor.employee.employee_id != employee_id]
+            if foreign:
+                return Response({"error": "You can only generate content for your own doctors", "doctor_ids": foreign}, status=status.HTTP_403_FORBIDDEN)
+
+        from .tasks import generate_images_batch
+
+        batch_size = getattr(settings, 'IMAGE_BATCH_SIZE', 50)
+        tenant = scheduling.tenant_key(employee_id)
+        starts = range(0, len(doctor_ids), batch_size)
+        idempotency_key, expires_after = request_idempotency_key(request, employee_id)
+        jobs, created = claim_render_jobs(idempotency_key, [
+            RenderJob(job_id=str(uuid.uuid4()), kind='batch', employee_id=employee_id, template=template)
+            for _ in starts
+        ], expires_after)
+        if not created:
+            logger.info(f"Repeated batch request, returning {len(jobs)} jobs")
+            return Response({
+                "status": "processing",
+                "task_ids": [job.job_id for job in jobs],
+                "doctor_count": len(doctor_ids),
+                "message": "Batch image generation already submitted",
+                "duplicate": True,
+            }, status=status.HTTP_200_OK)
 
-        # Render brands in slots
-        for i, (brand, slot) in enumerate(zip(brands_list, needed_slots)):
-            print(f"🔍 Processing brand {i+1}: {brand.name}")
+        task_ids = []
+        for start, job in zip(starts, jobs):
+            # Batch chunks queue behind the employee's own interactive requests
+            task_ids.append(scheduling.submit(generate_images_batch, tenant, dict(
+                template_id=template.id,
+                doctor_ids=doctor_ids[start:start + batch_size],
+                content_data=content_data,
+                selected_brand_ids=selected_brand_ids,
+                current_employee_id=employee_id,
+            ), interactive=False, task_id=job.job_id))
 
-            if brand.brand_image and brand.brand_image.path and os.path.exists(brand.brand_image.path):
-                try:
-                    # Calculate final position with centering offset
-                    final_x = area_x + slot['x'] + center_offset_x
-                    final_y = area_y + slot['y'] + center_offset_y
-                    slot_width = slot['width']
-                    slot_height = slot['height']
-
-                    print(f"🔍 Slot {i+1} position: ({final_x}, {final_y})")
-                    print(f"🔍 Slot {i+1} size: {slot_width}x{slot_height}")
-
-                    # Load and resize brand image
-                    # Load and resize brand image with memory management
-                    # Load and resize brand image with memory management
-                    brand_img = None
-                    try:
-                        if not os.path.exists(brand.brand_image.path):
-                            logger.warning(f"Brand image file not found: {brand.brand_image.path}")
-                            continue
-
-
-                        brand_img = Image.open(brand.brand_image.path)
-                        # DEBUG: Check brand image properties
-                        print(f"🔍 Brand {brand.name}:")
-                        print(f"  - Mode: {brand_img.mode}")
-                        print(f"  - Size: {brand_img.size}")
-                        print(f"  - Has transparency: {brand_img.mode in ('RGBA', 'LA') or 'transparency' in brand_img.info}")
-                        if brand_img.mode == 'RGBA':
-                            # Check if image actually uses transparency
-                            alpha = brand_img.split()[-1]
-                            alpha_range = alpha.getextrema()
-                            print(f"  - Alpha range: {alpha_range}")
-                            print(f"  - Has real transparency: {alpha_range[0] < 255}")
-                        if hasattr(self, '_current_brand_images'):
-                            self._current_brand_images.append(brand_img)
-
-
-                        # Keep transparency for brand images - DON'T convert to RGB
-                        # Force RGBA mode to ensure transparency support
-                        if brand_img.mode != 'RGBA':
-                            if brand_img.mode == 'P' and 'transparency' in brand_img.info:
-                                # Handle palette mode with transparency
-                                brand_img = brand_img.convert('RGBA')
-                            elif brand_img.mode in ('L', 'LA'):
-                                # Handle grayscale with alpha
-                                brand_img = brand_img.convert('RGBA')
-                            else:
-                                # Convert other modes to RGBA
-                                brand_img = brand_img.convert('RGBA')
-
-                        print(f"🔍 After conversion - Mode: {brand_img.mode}")
-                        # Don't force RGB conversion - preserve transparency
-
-                        # Resize brand image
-                        # brand_img = brand_img.resize((slot_width, slot_height), Image.Resampling.LANCZOS)
-
-                        # Resize brand image with better quality
-                        original_ratio = brand_img.width / brand_img.height
-                        slot_ratio = slot_width / slot_height
-
-                        if original_ratio > slot_ratio:
-                            # Image is wider - fit by width
-                            new_width = slot_width
-                            new_height = int(slot_width / original_ratio)
-                        else:
-                            # Image is taller - fit by height
-                            new_height = slot_height
-                            new_width = int(slot_height * original_ratio)
-
-                        # Resize with high quality
-                        brand_img = brand_img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-                        # Center the image in the slot if needed
-                        # Center the image in the slot with transparent background
-                        if new_width != slot_width or new_height != slot_height:
-                            centered_img = Image.new('RGBA', (slot_width, slot_height), (0, 0, 0, 0))  # Fully transparent
-                            paste_x = (slot_width - new_width) // 2
-                            paste_y = (slot_height - new_height) // 2
-                            if brand_img.mode == 'RGBA':
-                                centered_img.paste(brand_img, (paste_x, paste_y), brand_img)  # Use alpha mask
-                            else:
-                                centered_img.paste(brand_img, (paste_x, paste_y))
-                            brand_img = centered_img
-
-                        # Paste brand image
-                        # Paste brand image with proper alpha handling
-                        if template_image.mode != 'RGBA':
-                            template_image = template_image.convert('RGBA')
-
-                        if brand_img.mode == 'RGBA':
-                            template_image.paste(brand_img, (final_x, final_y), brand_img)  # Use alpha mask
-                        else:
-                            template_image.paste(brand_img, (final_x, final_y))
-
-                    except (IOError, OSError) as e:
-                        logger.warning(f"Failed to process brand image {brand.id}: {e}")
-                        continue
-                    finally:
-                        if brand_img is not None:
-                            try:
-                                brand_img.close()
-                            except:
-                                pass
-
-                    logger.info(f"Rendered brand {brand.name} in slot {i+1} at ({final_x}, {final_y})")
-                    print(f"🔍 Successfully pasted brand {brand.name} at ({final_x}, {final_y})")
-
-                except Exception as e:
-                    print(f"🔍 Failed to render brand {brand.name}: {e}")
-                    logger.error(f"Failed to render brand {brand.name}: {e}")
+        return Response({
+            "status": "processing",
+            "task_ids": task_ids,
+            "doctor_count": len(doctor_ids),
+            "message": "Batch image generation started",
+            "duplicate": False,
+        }, status=status.HTTP_201_CREATED)
 
 class ImageContentListView(APIView):
     """List generated image contents with pagination"""
@@ -2373,39 +2140,314 @@ class ImageTemplateUsageView(APIView):
         return Response(data, status=status.HTTP_200_OK)
 
 
-from celery.result import AsyncResult
+class Percentiles(Aggregate):
+    """PostgreSQL ``percentile_cont`` of an expression at several fractions, as an array"""
+    function = 'percentile_cont'
+    template = "%(function)s(ARRAY[%(fractions)s]::double precision[]) WITHIN GROUP (ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, fractions, **extra):
+        super().__init__(
+            expression, fractions=', '.join(str(float(fraction)) for fraction in fractions),
+            output_field=ArrayField(FloatField()), **extra
+        )
+
+
+class ImageRenderMetricsView(APIView):
+    MAX_DAYS = 90
+    PERCENTILES = (50, 95, 99)
+
+    def get(self, request):
+        """p50/p95/p99 of each render stage, per template and day, computed in the database"""
+        try:
+            days = min(max(int(request.query_params.get('days', 7)), 1), self.MAX_DAYS)
+        except ValueError:
+            return Response({"error": "days must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        metrics = ImageRenderMetrics.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=days)
+        ).annotate(day=TruncDate('created_at'))
+        template_id = request.query_params.get('template_id')
+        if template_id:
+            metrics = metrics.filter(template_id=template_id)
+
+        fractions = [pct / 100 for pct in self.PERCENTILES]
+        stage_aggregates = {}
+        for stage in ImageRenderMetrics.STAGES:
+            stage_aggregates[f"{stage}_samples"] = Count(f"{stage}_ms")
+            stage_aggregates[f"{stage}_percentiles"] = Percentiles(f"{stage}_ms", fractions)
+        rows = metrics.values('template_id', 'template__name', 'day').annotate(
+            count=Count('id'),
+            reused_count=Count('id', filter=Q(reused=True)),
+            gc_collections=Count('id', filter=Q(memory_action='collect')),
+            worker_recycles=Count('id', filter=Q(memory_action='recycle')),
+            **stage_aggregates,
+        ).order_by('-day', '-template_id')
+
+        data = []
+        for row in rows:
+            stages = {}
+            for stage in ImageRenderMetrics.STAGES:
+                # percentile_cont over no values is NULL
+                values = row[f"{stage}_percentiles"] or [None] * len(self.PERCENTILES)
+                stages[stage] = {"samples": row[f"{stage}_samples"]}
+                for pct, value in zip(self.PERCENTILES, values):
+                    stages[stage][f"p{pct}"] = round(value, 2) if value is not None else None
+            data.append({
+                "template_id": row['template_id'],
+                "template_name": row['template__name'],
+                "date": row['day'],
+                "count": row['count'],
+                "reused_count": row['reused_count'],
+                "gc_collections": row['gc_collections'],
+                "worker_recycles": row['worker_recycles'],
+                "stages_ms": stages,
+            })
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class ImageQueueDepthView(APIView):
+    def get(self, request):
+        """Image tasks waiting in the fair queue, per employee (or region), and the in-flight count"""
+        if not scheduling.fair_scheduling_enabled():
+            return Response({"enabled": False, "in_flight": None, "limit": None, "tenants": []})
+
+        employee_id = request.query_params.get('employee_id')
+        try:
+            depths = scheduling.queue_depths(scheduling.tenant_key(employee_id) if employee_id else None)
+        except Exception as e:
+            logger.error(f"Could not read the fair queue: {e}")
+            return Response({"error": "Queue depth unavailable"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response(dict(depths, enabled=True), status=status.HTTP_200_OK)
+
+
+def completed_task_payload(task_result, request, image_contents=None):
+    """
+    Final payload of a successful image task, with the stored image serialized
+    when there is one. ``image_contents`` ({id: ImageContent}) is used instead
+    of a query when given.
+    """
+    if isinstance(task_result, dict) and 'image_id' in task_result:
+        if image_contents is None:
+            image_content = ImageContent.objects.select_related('doctor', 'template').filter(
+                id=task_result['image_id']
+            ).first()
+        else:
+            image_content = image_contents.get(task_result['image_id'])
+        if image_content is not None:
+            serializer = ImageContentSerializer(image_content, context={'request': request})
+            return {"status": "completed", "result": serializer.data}
+    return {"status": "completed", "result": task_result}
+
+
+def ready_task_payload(result, request):
+    """Payload of a finished AsyncResult"""
+    if result.successful():
+        return completed_task_payload(result.get(), request)
+    return {"status": "failed", "error": str(result.info)}
+
+
+def get_render_job(task_id):
+    return RenderJob.objects.select_related('image_content__doctor', 'image_content__template').filter(
+        job_id=task_id
+    ).first()
+
+
+def render_job_payload(job, request):
+    """Task-status payload of a RenderJob, with its state and timestamps under ``job``"""
+    if job.status == 'done':
+        if job.image_content is not None:
+            serializer = ImageContentSerializer(job.image_content, context={'request': request})
+            payload = {"status": "completed", "result": serializer.data}
+        else:
+            payload = {"status": "completed", "result": job.result}
+    elif job.status == 'failed':
+        payload = {"status": "failed", "error": job.error}
+    else:
+        payload = {"status": "processing"}
+    payload["job"] = {
+        "state": job.status,
+        "kind": job.kind,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+    return payload
+
+
+def read_task_metas(task_ids):
+    """{task_id: {'status', 'result'}} of tasks the result backend knows, in one round trip where it allows"""
+    backend = current_app.backend
+    if not isinstance(backend, KeyValueStoreBackend):
+        results = [AsyncResult(task_id) for task_id in task_ids]
+        return {result.id: {'status': result.state, 'result': result.result} for result in results}
+
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    values = backend.mget(keys)
+    if hasattr(values, 'items'):
+        values = [values.get(key) for key in keys]
+    return {
+        task_id: backend.decode_result(value)
+        for task_id, value in zip(task_ids, values) if value is not None
+    }
+
 
 class TaskStatusView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, task_id):
         """Check image generation status"""
+        job = get_render_job(task_id)
+        if job is not None:
+            return Response(render_job_payload(job, request))
+
+        # Tasks without a job row are looked up in the result backend
         result = AsyncResult(task_id)
 
         if result.ready():
-            if result.successful():
-                task_result = result.get()
-                # Get the actual image content
-                if 'image_id' in task_result:
-                    try:
-                        image_content = ImageContent.objects.get(id=task_result['image_id'])
-                        serializer = ImageContentSerializer(image_content, context={'request': request})
-                        return Response({
-                            "status": "completed",
-                            "result": serializer.data
-                        })
-                    except ImageContent.DoesNotExist:
-                        pass
-
-                return Response({"status": "completed", "result": task_result})
-            else:
-                return Response({"status": "failed", "error": str(result.info)})
+            return Response(ready_task_payload(result, request))
         else:
             return Response({"status": "processing"})
 
 
+class BulkTaskStatusView(APIView):
+    """
+    Status of many image tasks at once: POST {"task_ids": [...]} ->
+    {"tasks": {task_id: <task-status payload>}}. Jobs and their images are
+    read with one query; tasks without a job row fall back to a single MGET
+    on the result backend.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        task_ids = request.data.get('task_ids')
+        if not isinstance(task_ids, list) or not task_ids or not all(isinstance(tid, str) for tid in task_ids):
+            return Response({"error": "task_ids must be a non-empty list of task IDs."}, status=status.HTTP_400_BAD_REQUEST)
+
+        task_ids = list(dict.fromkeys(task_ids))
+        max_ids = getattr(settings, 'IMAGE_TASK_STATUS_MAX_IDS', 500)
+        if len(task_ids) > max_ids:
+            return Response({"error": f"You can check up to {max_ids} tasks at once."}, status=status.HTTP_400_BAD_REQUEST)
+
+        jobs = RenderJob.objects.select_related('image_content__doctor', 'image_content__template').in_bulk(
+            task_ids, field_name='job_id'
+        )
+        # Tasks without a job row are looked up in the result backend
+        unknown_ids = [task_id for task_id in task_ids if task_id not in jobs]
+        backend_available = True
+        try:
+            metas = read_task_metas(unknown_ids) if unknown_ids else {}
+        except Exception as e:
+            # Only the tasks without a job row depend on the result backend
+            logger.error(f"Could not read task results: {e}")
+            metas = {}
+            backend_available = False
+
+        image_ids = [
+            meta['result']['image_id'] for meta in metas.values()
+            if meta['status'] == states.SUCCESS and isinstance(meta['result'], dict) and 'image_id' in meta['result']
+        ]
+        image_contents = ImageContent.objects.select_related('doctor', 'template').in_bulk(image_ids) if image_ids else {}
+
+        tasks = {}
+        for task_id in task_ids:
+            meta = metas.get(task_id)
+            if task_id in jobs:
+                tasks[task_id] = render_job_payload(jobs[task_id], request)
+            elif not backend_available:
+                tasks[task_id] = {"status": "unavailable", "error": "Task status unavailable"}
+            elif meta is None or meta['status'] not in states.READY_STATES:
+                tasks[task_id] = {"status": "processing"}
+            elif meta['status'] == states.SUCCESS:
+                tasks[task_id] = completed_task_payload(meta['result'], request, image_contents)
+            else:
+                tasks[task_id] = {"status": "failed", "error": str(meta['result'])}
+        return Response({"tasks": tasks}, status=status.HTTP_200_OK)
+
+
+class RenderJobListView(APIView):
+    """Recent image generation jobs of an employee, newest first"""
+    permission_classes = [AllowAny]
+    MAX_LIMIT = 200
+
+    def get(self, request):
+        employee_id = request.query_params.get('employee_id')
+        if not employee_id:
+            return Response({"error": "employee_id is required."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), self.MAX_LIMIT)
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        jobs = RenderJob.objects.select_related('image_content__doctor', 'image_content__template').filter(
+            employee_id=employee_id
+        )
+        job_status = request.query_params.get('status')
+        if job_status:
+            jobs = jobs.filter(status=job_status)
+        return Response([
+            dict(render_job_payload(job, request), job_id=job.job_id)
+            for job in jobs.order_by('-created_at')[:limit]
+        ], status=status.HTTP_200_OK)
+
+
+def task_wait_payload(task_id, request):
+    """(status payload, finished) of a task: from its RenderJob when it has one, else from the result backend"""
+    job = get_render_job(task_id)
+    if job is not None:
+        return render_job_payload(job, request), job.status in RenderJob.FINISHED
+    result = AsyncResult(task_id)
+    if result.ready():
+        return ready_task_payload(result, request), True
+    return {"status": "processing"}, False
+
+
+class TaskWaitView(View):
+    """
+    Long-poll for an image task: the request is held open until the task
+    finishes and then answered once with the same payload as TaskStatusView,
+    or with {"status": "processing"} after ``timeout`` seconds so the client
+    can simply wait again.
+
+    The wait is asynchronous: served by the ASGI application a waiting client
+    holds no worker, and waits up to IMAGE_TASK_WAIT_MAX_TIMEOUT. Under WSGI
+    every wait still occupies a worker thread, so it is cut to
+    IMAGE_TASK_WAIT_WSGI_MAX_TIMEOUT.
+    """
+
+    async def get(self, request, task_id):
+        try:
+            timeout = float(request.GET.get('timeout', settings.IMAGE_TASK_WAIT_TIMEOUT))
+        except ValueError:
+            return JsonResponse({"error": "timeout must be a number of seconds"}, status=status.HTTP_400_BAD_REQUEST)
+        if isinstance(request, ASGIRequest):
+            longest = settings.IMAGE_TASK_WAIT_MAX_TIMEOUT
+        else:
+            longest = settings.IMAGE_TASK_WAIT_WSGI_MAX_TIMEOUT
+        timeout = min(max(timeout, 0), longest)
+
+        payload, finished = await sync_to_async(task_wait_payload)(task_id, request)
+        if finished:
+            return JsonResponse(payload, encoder=JSONEncoder)
+
+        try:
+            event = await task_events.wait_for_task_event(task_id, timeout)
+        except Exception as e:
+            # No event channel: behave like the polling endpoint
+            logger.warning(f"Cannot wait on task {task_id}, answering without blocking: {e}")
+            event = None
+
+        if event is None or "job" in payload:
+            # Read again whether or not an event came: a lost publish must not hide a finished job
+            payload, _ = await sync_to_async(task_wait_payload)(task_id, request)
+        elif event['status'] == 'completed':
+            payload = await sync_to_async(completed_task_payload)(event['result'], request)
+        else:
+            payload = event
+        return JsonResponse(payload, encoder=JSONEncoder)
+
 
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 
 @csrf_exempt
@@ -114,7 +114,6 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 CELERY_RESULT_EXPIRES = 3600
 CELERY_TASK_TIME_LIMIT = 600
 CELERY_TASK_SOFT_TIME_LIMIT = 480
-CELERY_WORKER_MAX_MEMORY_PER_CHILD = 150000
 CELERY_TASK_REJECT_ON_WORKER_LOST = True
 CELERY_TASK_ACKS_LATE = True
 CELERY_WORKER_PREFETCH_MULTIPLIER = 1
@@ -125,6 +124,10 @@ CELERY_WORKER_CONCURRENCY = min(multiprocessing.cpu_count() * 2, 8)
 # Task routing
 CELERY_TASK_ROUTES = {
     'employee_app.tasks.generate_image_async': {'queue': 'image_generation'},
+    'employee_app.tasks.generate_images_batch': {'queue': 'image_generation'},
+    'employee_app.tasks.prescale_brand_logos': {'queue': 'image_generation'},
+    'employee_app.tasks.build_template_base': {'queue': 'image_generation'},
+    'employee_app.tasks.dispatch_fair_queue': {'queue': 'image_generation'},
     'employee_app.tasks.generate_custom_video_task': {'queue': 'video_generation'},
 }
 
@@ -144,7 +147,83 @@ CELERY_TASK_MAX_RETRIES = 2
 CELERY_WORKER_SEND_TASK_EVENTS = True
 CELERY_TASK_SEND_SENT_EVENT = True
 CELERY_WORKER_HIJACK_ROOT_LOGGER = False
-CELERY_WORKER_MAX_TASKS_PER_CHILD = 50
+
+# Image workers: child processes per host (keep in step with --concurrency in
+# celery_start.sh) and the memory all of them may use together. Per-process
+# cache budgets and the recycle limit are shares of IMAGE_WORKER_MEMORY_MB,
+# so raising the concurrency shrinks each child instead of growing the host.
+IMAGE_WORKER_CONCURRENCY = int(os.getenv('IMAGE_WORKER_CONCURRENCY', 4))
+IMAGE_WORKER_MEMORY_MB = int(os.getenv('IMAGE_WORKER_MEMORY_MB', 2048))
+_IMAGE_CHILD_MB = IMAGE_WORKER_MEMORY_MB // max(1, IMAGE_WORKER_CONCURRENCY)
+# Half of a child's share is for render caches
+_IMAGE_CACHE_MB = _IMAGE_CHILD_MB // 2
+
+# Image rendering (per worker process caches)
+IMAGE_RENDER_PLAN_CACHE_SIZE = int(os.getenv('IMAGE_RENDER_PLAN_CACHE_SIZE', 64))
+IMAGE_TEMPLATE_CACHE_MAX_MB = int(os.getenv('IMAGE_TEMPLATE_CACHE_MAX_MB', _IMAGE_CACHE_MB // 2))  # decoded template canvases
+IMAGE_BRAND_CACHE_MAX_MB = int(os.getenv('IMAGE_BRAND_CACHE_MAX_MB', _IMAGE_CACHE_MB // 8))  # pre-scaled brand logos
+IMAGE_BRAND_STRIP_CACHE_MAX_MB = int(os.getenv('IMAGE_BRAND_STRIP_CACHE_MAX_MB', _IMAGE_CACHE_MB // 8))  # composited brand selections
+IMAGE_OVERLAY_CACHE_MAX_MB = int(os.getenv('IMAGE_OVERLAY_CACHE_MAX_MB', _IMAGE_CACHE_MB // 8))  # processed doctor photos
+IMAGE_TEXT_CACHE_MAX_MB = int(os.getenv('IMAGE_TEXT_CACHE_MAX_MB', _IMAGE_CACHE_MB // 16))  # rendered text layers
+_IMAGE_CACHES_MB = (IMAGE_TEMPLATE_CACHE_MAX_MB + IMAGE_BRAND_CACHE_MAX_MB + IMAGE_BRAND_STRIP_CACHE_MAX_MB
+                    + IMAGE_OVERLAY_CACHE_MAX_MB + IMAGE_TEXT_CACHE_MAX_MB)
+
+# Worker memory: a full gc.collect() runs once RSS has grown this far past the
+# RSS after the first task (full caches plus headroom), and a worker is
+# replaced after a task whose peak RSS passed the recycle budget (Celery checks
+# it after every task). The task count limit is a backstop for slow leaks.
+IMAGE_WORKER_GC_BUDGET_MB = int(os.getenv('IMAGE_WORKER_GC_BUDGET_MB', _IMAGE_CACHES_MB + 64))
+IMAGE_WORKER_RECYCLE_MB = int(os.getenv('IMAGE_WORKER_RECYCLE_MB', _IMAGE_CHILD_MB))
+CELERY_WORKER_MAX_MEMORY_PER_CHILD = IMAGE_WORKER_RECYCLE_MB * 1024  # KB
+CELERY_WORKER_MAX_TASKS_PER_CHILD = int(os.getenv('CELERY_WORKER_MAX_TASKS_PER_CHILD', 1000))
+
+# Output encoding for generated images. Templates can pick a profile by name
+# (employee_app.rendering.encoding.DEFAULT_OUTPUT_PROFILES, or override them
+# with IMAGE_OUTPUT_PROFILES); lossy profiles only apply without transparency.
+IMAGE_OUTPUT_PROFILE = os.getenv('IMAGE_OUTPUT_PROFILE', 'png')
+
+# Batched generation: doctors accepted per request, and doctors rendered per task
+IMAGE_BATCH_MAX_DOCTORS = 500
+IMAGE_BATCH_SIZE = 50
+
+# Fair scheduling (opt-in): image tasks wait in per-tenant lists and are sent
+# to Celery round-robin, at most IMAGE_FAIR_MAX_IN_FLIGHT at a time - the
+# total image worker concurrency across hosts. Tenants are employees, or
+# 'rbm_region' to share per region.
+IMAGE_FAIR_SCHEDULING = os.getenv('IMAGE_FAIR_SCHEDULING', 'False') == 'True'
+IMAGE_FAIR_SCHEDULING_KEY = os.getenv('IMAGE_FAIR_SCHEDULING_KEY', 'employee')
+IMAGE_FAIR_MAX_IN_FLIGHT = int(os.getenv('IMAGE_FAIR_MAX_IN_FLIGHT', IMAGE_WORKER_CONCURRENCY))
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-fair-image-queue': {
+        'task': 'employee_app.tasks.dispatch_fair_queue',
+        'schedule': 30.0,
+    },
+}
+
+# Synchronous previews: default and largest long edge in pixels
+IMAGE_PREVIEW_MAX_EDGE = 540
+IMAGE_PREVIEW_MAX_EDGE_LIMIT = 1080
+# Most brand slots an edited (unsaved) brand area may have in a preview
+IMAGE_PREVIEW_MAX_SLOTS = 24
+
+# Long-polled task status: default and longest wait in seconds; keep the
+# longest under the proxy / server request timeout. Long waits only pay off
+# when the app is served through employee_project.asgi (e.g. uvicorn or
+# daphne); under WSGI each wait holds a worker and is cut to the WSGI limit
+IMAGE_TASK_WAIT_TIMEOUT = 25
+IMAGE_TASK_WAIT_MAX_TIMEOUT = 55
+IMAGE_TASK_WAIT_WSGI_MAX_TIMEOUT = 5
+# Task IDs accepted per bulk status request
+IMAGE_TASK_STATUS_MAX_IDS = 500
+
+# Generation requests without an Idempotency-Key count as repeats when the same
+# employee submits the same inputs within this many seconds
+IMAGE_IDEMPOTENCY_WINDOW = 300
+
+# Doctor photos are rotated upright and capped to this many pixels at upload;
+# anything whose header claims more than IMAGE_MAX_DECODE_PIXELS is rejected
+IMAGE_PHOTO_MAX_PIXELS = int(os.getenv('IMAGE_PHOTO_MAX_PIXELS', 2_000_000))
+IMAGE_MAX_DECODE_PIXELS = int(os.getenv('IMAGE_MAX_DECODE_PIXELS', 40_000_000))
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -21,7 +21,6 @@ CELERY_TASK_EAGER_PROPAGATES = False
 
 # Development-specific Celery settings
 CELERY_WORKER_CONCURRENCY = 4  # Adjust based on your machine
-CELERY_WORKER_MAX_TASKS_PER_CHILD = 50  # Restart worker after 50 tasks to prevent memory leaks
 
 # Simple CORS for development
 CORS_ALLOW_ALL_ORIGINS = True